@@ -0,0 +1,426 @@
+# benchmarks/bench_excel.py
+
+"""Benchmarks of the ExcelManager and DateManager operations.
+
+Synthetic workbooks are generated offline, then every operation runs in a fresh
+worker process so its wall time, peak resident memory and bytes read and written
+are measured in isolation. Results are written as JSON and can be compared with
+a stored baseline.
+
+Examples:
+    $ python benchmarks/bench_excel.py --sizes 1000,100000 --output bench.json
+
+    $ python benchmarks/bench_excel.py --baseline bench.json --tolerance 0.25
+
+    $ python benchmarks/bench_excel.py --operations get_dataframe,overwrite_sheet --cases wide
+
+The benchmark contains the following cases:
+
+- `narrow` - 5 columns of integers, floats and strings.
+- `wide` - 100 numeric columns.
+- `many_sheets` - 20 narrow sheets in one workbook.
+- `dates` - 10 datetime columns and 2 other columns.
+- `styled` - the narrow columns with every cell formatted, cycling through 1000
+  cell formats with their own fonts, fills, borders and number formats.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import numpy as np  # noqa: E402
+import openpyxl  # noqa: E402
+import pandas as pd  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+SHEET = "Data"
+CASES = {
+    "narrow": {"columns": 5, "sheets": 1},
+    "wide": {"columns": 100, "sheets": 1},
+    "many_sheets": {"columns": 5, "sheets": 20},
+    "dates": {"columns": 12, "sheets": 1},
+    "styled": {"columns": 5, "sheets": 1},
+}
+STYLES = 1000
+OPERATIONS = {}
+
+
+def make_dataframe(case: str, rows: int, seed: int = 0) -> pd.DataFrame:
+    """Return the synthetic dataframe of a case."""
+    rng = np.random.default_rng(seed)
+    columns = CASES[case]["columns"]
+    if case == "wide":
+        return pd.DataFrame(rng.random((rows, columns)), columns=[f"c{i}" for i in range(columns)])
+    if case == "dates":
+        start = np.datetime64("2020-01-01")
+        data = {
+            f"d{i}": pd.to_datetime(start + rng.integers(0, 3650, rows).astype("timedelta64[D]"))
+            for i in range(columns - 2)
+        }
+        data["amount"] = rng.random(rows)
+        data["label"] = [f"row {i}" for i in range(rows)]
+        return pd.DataFrame(data)
+    return pd.DataFrame({
+        "id": np.arange(rows),
+        "amount": rng.random(rows),
+        "quantity": rng.integers(0, 1000, rows),
+        "label": [f"item {i % 1000}" for i in range(rows)],
+        "flag": rng.random(rows) > 0.5,
+    })
+
+
+def make_workbook(path: str, case: str, rows: int) -> None:
+    """Write the synthetic workbook of a case."""
+    from excel_manager import _xlsx
+
+    wb = openpyxl.Workbook()
+    wb.active.title = SHEET
+    for i in range(1, CASES[case]["sheets"]):
+        wb.create_sheet(f"{SHEET}{i}")
+    wb.save(path)
+    dataframe = make_dataframe(case, rows)
+    for sheet in wb.sheetnames:
+        _xlsx.write_sheet(path, sheet, dataframe)
+    if case == "styled":
+        _add_styles(path)
+
+
+def _add_styles(path: str) -> None:
+    """Format every cell of the workbook with one of `STYLES` distinct cell formats.
+
+    The styles part is taken from a small workbook formatted with openpyxl and
+    the cells of the large sheet get a style index, so heavily formatted
+    workbooks are generated without formatting every cell through openpyxl.
+    """
+    import re
+    import zipfile
+    from openpyxl.styles import Border, Font, PatternFill, Side
+    from excel_manager import _xlsx
+
+    template = openpyxl.Workbook()
+    sheet = template.active
+    for i in range(STYLES):
+        cell = sheet.cell(row=i + 1, column=1, value=i)
+        color = f"{(i * 2654435761) % 0xFFFFFF:06X}"
+        cell.font = Font(name="Calibri", size=9 + i % 5, bold=i % 2 == 0, color=color)
+        cell.fill = PatternFill("solid", fgColor=color[::-1])
+        cell.border = Border(bottom=Side(style="thin", color=color))
+        cell.number_format = f'#,##0.{"0" * (i % 4 + 1)};[Red]-#,##0.{"0" * (i % 4 + 1)}'
+    with tempfile.TemporaryDirectory() as directory:
+        template.save(os.path.join(directory, "styles.xlsx"))
+        with zipfile.ZipFile(os.path.join(directory, "styles.xlsx")) as zf:
+            styles = zf.read("xl/styles.xml")
+    with zipfile.ZipFile(path) as zf:
+        part = _xlsx.sheet_parts(zf)[SHEET]
+        content = zf.read(part)
+    counter = iter(range(1 << 62))
+    content = re.sub(rb"<c r=", lambda _: b'<c s="%d" r=' % (next(counter) % STYLES + 1), content)
+    _xlsx.rewrite_archive(path, {"xl/styles.xml": styles, part: content})
+
+
+def operation(function):
+    """Register a benchmarked operation.
+
+    The function prepares the operation and returns the timed callable and a
+    check of its outcome, which raises if the operation did not complete.
+    """
+    OPERATIONS[function.__name__] = function
+    return function
+
+
+class OperationFailed(Exception):
+    """An operation did not produce the expected outcome, so its timing is meaningless."""
+
+
+def _expect(description: str, expected, actual) -> None:
+    if actual != expected:
+        raise OperationFailed(f"{description}: expected {expected}, got {actual}.")
+
+
+def _rows_of(rows: int):
+    """Return a check of the number of rows of a returned dataframe."""
+    return lambda dataframe: _expect("rows returned", rows, len(dataframe))
+
+
+def _rows_in(manager, workbook: str, rows: int):
+    """Return a check of the number of rows of the sheet, read back after the operation."""
+    def check(_):
+        count = sum(len(chunk) for chunk in manager.iter_dataframes(workbook, SHEET, chunksize=50000))
+        _expect(f"rows in {SHEET}", rows, count)
+    return check
+
+
+def _manager():
+    from excel_manager import ExcelManager
+
+    return ExcelManager(log_file=os.devnull)
+
+
+@operation
+def get_dataframe(workbook: str, case: str, rows: int):
+    manager = _manager()
+    return lambda: manager.get_dataframe(workbook, SHEET), _rows_of(rows)
+
+
+@operation
+def get_dataframe_values(workbook: str, case: str, rows: int):
+    manager = _manager()
+    return lambda: manager.get_dataframe(workbook, SHEET, engine="values"), _rows_of(rows)
+
+
+@operation
+def iter_dataframes(workbook: str, case: str, rows: int):
+    manager = _manager()
+
+    def run():
+        return sum(len(chunk) for chunk in manager.iter_dataframes(workbook, SHEET, chunksize=50000))
+
+    return run, lambda count: _expect("rows returned", rows, count)
+
+
+@operation
+def overwrite_sheet(workbook: str, case: str, rows: int):
+    manager = _manager()
+    # one row more than the sheet holds, so an overwrite that did not happen fails the check.
+    dataframe = make_dataframe(case, rows + 1, seed=1)
+    return lambda: manager.overwrite_sheet(workbook, SHEET, dataframe), _rows_in(manager, workbook, len(dataframe))
+
+
+@operation
+def overwrite_sheet_streaming(workbook: str, case: str, rows: int):
+    manager = _manager()
+    dataframe = make_dataframe(case, rows + 1, seed=1)
+    return (lambda: manager.overwrite_sheet(workbook, SHEET, dataframe, streaming=True),
+            _rows_in(manager, workbook, len(dataframe)))
+
+
+@operation
+def append_dataframe(workbook: str, case: str, rows: int):
+    manager = _manager()
+    dataframe = make_dataframe(case, 100, seed=2)
+    return lambda: manager.append_dataframe(workbook, SHEET, dataframe), _rows_in(manager, workbook, rows + 100)
+
+
+@operation
+def reposition_sheet(workbook: str, case: str, rows: int):
+    manager = _manager()
+    last = openpyxl.load_workbook(workbook, read_only=True).sheetnames[-1]
+
+    def check(_):
+        _expect("first sheet", last, openpyxl.load_workbook(workbook, read_only=True).sheetnames[0])
+
+    return lambda: manager.reposition_sheet(workbook, last), check
+
+
+def _timestamp_to_date(case: str, rows: int, date_type: str):
+    from date_manager import DateManager
+
+    manager = DateManager(log_file=os.devnull, date_type=date_type)
+    dataframe = make_dataframe(case, rows)
+    for column in dataframe.columns:
+        if pd.api.types.is_datetime64_dtype(dataframe[column]):
+            dataframe[column] = dataframe[column].astype("datetime64[ns]")
+    return lambda: manager.timestamp_to_date(dataframe), _rows_of(rows)
+
+
+@operation
+def timestamp_to_date(workbook: str, case: str, rows: int):
+    return _timestamp_to_date(case, rows, "object")
+
+
+@operation
+def timestamp_to_date_datetime64(workbook: str, case: str, rows: int):
+    return _timestamp_to_date(case, rows, "datetime64")
+
+
+@operation
+def timestamp_to_date_date32(workbook: str, case: str, rows: int):
+    return _timestamp_to_date(case, rows, "date32")
+
+
+def _io_counters() -> dict:
+    """Return the bytes read and written by the process so far, if available."""
+    try:
+        with open("/proc/self/io") as handle:
+            counters = dict(line.split(": ") for line in handle.read().splitlines())
+        return {"read": int(counters["rchar"]), "written": int(counters["wchar"])}
+    except (OSError, KeyError, ValueError):
+        return {"read": None, "written": None}
+
+
+def _reset_peak_rss() -> None:
+    """Reset the peak resident memory of the process, where Linux allows it."""
+    try:
+        with open("/proc/self/clear_refs", "w") as handle:
+            handle.write("5")
+    except OSError:
+        pass
+
+
+def _peak_rss() -> float:
+    """Return the peak resident memory of the process in MB, if available.
+
+    On Linux the high water mark of /proc/self/status is used, as ru_maxrss is
+    inherited from the parent process across exec.
+    """
+    try:
+        with open("/proc/self/status") as handle:
+            for line in handle:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def measure(name: str, workbook: str, case: str, rows: int) -> dict:
+    """Run one operation in the current process and return its measurements.
+
+    Raises:
+        OperationFailed: If the outcome of the operation is not the expected one.
+    """
+    logging.disable(logging.CRITICAL)
+    run, check = OPERATIONS[name](workbook, case, rows)
+    _reset_peak_rss()
+    before = _io_counters()
+    start = time.perf_counter()
+    outcome = run()
+    wall = time.perf_counter() - start
+    after = _io_counters()
+    check(outcome)
+    delta = {
+        key: None if before[key] is None else after[key] - before[key] for key in before
+    }
+    return {
+        "wall_s": round(wall, 6),
+        "peak_rss_mb": _peak_rss(),
+        "read_bytes": delta["read"],
+        "written_bytes": delta["written"],
+    }
+
+
+def run(sizes: list, cases: list, operations: list, repeat: int = 1) -> tuple:
+    """Run every operation on every case and size, each in a fresh process.
+
+    Operations whose outcome is not the expected one are not timed but listed
+    as failures.
+
+    Returns:
+        tuple: One result dict per case, size and operation, with the best wall
+            time of `repeat` runs, and one failure dict per failed operation.
+    """
+    context = multiprocessing.get_context("spawn")
+    results = []
+    failures = []
+    with tempfile.TemporaryDirectory() as directory:
+        for case in cases:
+            for rows in sizes:
+                source = os.path.join(directory, f"{case}_{rows}.xlsx")
+                make_workbook(source, case, rows)
+                for name in operations:
+                    runs = []
+                    try:
+                        for _ in range(repeat):
+                            workbook = os.path.join(directory, "work.xlsx")
+                            shutil.copy(source, workbook)
+                            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                                runs.append(executor.submit(measure, name, workbook, case, rows).result())
+                    except OperationFailed as e:
+                        failures.append({"case": case, "rows": rows, "operation": name, "error": str(e)})
+                        print(f"{case:>12} {rows:>8} {name:>26}     FAILED {e}", flush=True)
+                        continue
+                    best = min(runs, key=lambda result: result["wall_s"])
+                    result = {
+                        "case": case, "rows": rows, "operation": name,
+                        "workbook_bytes": os.path.getsize(source), **best,
+                    }
+                    results.append(result)
+                    print(f"{case:>12} {rows:>8} {name:>26} {best['wall_s']:>10.3f}s "
+                          f"{best['peak_rss_mb'] or 0:>9.1f}MB", flush=True)
+    return results, failures
+
+
+def compare(results: list, baseline: list, tolerance: float) -> list:
+    """Return the measurements that regressed beyond `tolerance` against the baseline."""
+    reference = {(r["case"], r["rows"], r["operation"]): r for r in baseline}
+    regressions = []
+    for result in results:
+        base = reference.get((result["case"], result["rows"], result["operation"]))
+        if base is None:
+            continue
+        for metric in ("wall_s", "peak_rss_mb"):
+            if result.get(metric) is None or not base.get(metric):
+                continue
+            ratio = result[metric] / base[metric]
+            if ratio > 1 + tolerance:
+                regressions.append({
+                    "case": result["case"], "rows": result["rows"], "operation": result["operation"],
+                    "metric": metric, "baseline": base[metric], "current": result[metric],
+                    "ratio": round(ratio, 3),
+                })
+    return regressions
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,100000",
+                        help="comma separated row counts, up to 1000000")
+    parser.add_argument("--cases", default=",".join(CASES), help="comma separated cases")
+    parser.add_argument("--operations", default=",".join(OPERATIONS), help="comma separated operations")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per measurement, the best is kept")
+    parser.add_argument("--output", default="bench_results.json", help="path of the JSON results")
+    parser.add_argument("--baseline", help="path of JSON results to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed relative slowdown or memory growth against the baseline")
+    args = parser.parse_args(argv)
+
+    results, failures = run(
+        [int(size) for size in args.sizes.split(",")],
+        args.cases.split(","), args.operations.split(","), args.repeat,
+    )
+    document = {
+        "meta": {
+            "python": platform.python_version(), "platform": platform.platform(),
+            "pandas": pd.__version__, "openpyxl": openpyxl.__version__,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+        "failures": failures,
+    }
+    with open(args.output, "w") as handle:
+        json.dump(document, handle, indent=2)
+    print(f"Results written to {args.output}.")
+    if failures:
+        print(f"{len(failures)} operations failed and were not timed.")
+
+    if args.baseline:
+        with open(args.baseline) as handle:
+            regressions = compare(results, json.load(handle)["results"], args.tolerance)
+        for regression in regressions:
+            print("REGRESSION {case} {rows} {operation} {metric}: {baseline} -> {current} (x{ratio})".format(**regression))
+        if regressions:
+            return 1
+        print("No regression against the baseline.")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
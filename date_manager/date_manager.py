@@ -14,68 +14,228 @@ Examples:
 
     >>> converted_df = date_manager.timestamp_to_date_column('datetime_column', df)
 
+    >>> # keep the dates in a vectorized column rather than Python date objects.
+    >>> date_manager = DateManager(log_file='abc.log', date_type='datetime64')
+    >>> converted_df = date_manager.timestamp_to_date(df)
+    >>> converted_df = date_manager.timestamp_to_date(df, date_type='date32')
+
+    >>> # also convert Excel serial numbers and columns of date strings.
+    >>> converted_df = date_manager.timestamp_to_date(df, serial_columns=['serial'], parse_strings=True)
+
 The module contains the following methods:
 
-- `__init__(log_file)` - creates the instance of the class.
-- `timestamp_to_date(dataframe)` - returns the dataframe with all datetime column modified to date datatype.
-- `timestamp_to_date_column(column, dataframe)` - returns the dataframe with specific datetime column to date datatype.
+- `__init__(log_file, date_type)` - creates the instance of the class.
+- `to_date(series, date_type)` - returns the datetime series converted to dates.
+- `timestamp_to_date(dataframe, date_type, serial_columns, parse_strings)` - returns the dataframe with all datetime column modified to date datatype.
+- `timestamp_to_date_column(column, dataframe, date_type)` - returns the dataframe with specific datetime column to date datatype.
 """
 
+from typing import Optional
+import warnings
+import numpy as np
 import pandas as pd
+from pandas.tseries.api import guess_datetime_format
 from log_manager.log_manager import LogManager
 
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pa = None
+
+
+DATE_TYPES = ("object", "datetime64", "date32")
+EXCEL_EPOCH = np.datetime64("1899-12-30", "us")
+
+
+def serial_to_datetime(series: pd.Series) -> pd.Series:
+    """Convert Excel serial day numbers to datetimes with NumPy arithmetic.
+
+    Serials before 60 are shifted by one day, as Excel counts a 29 February 1900
+    that did not exist. Missing values become NaT.
+    """
+    values = series.to_numpy(dtype="float64", na_value=np.nan)
+    values = np.where(values < 60, values + 1, values)
+    result = np.full(len(values), np.datetime64("NaT"), dtype="datetime64[us]")
+    valid = np.isfinite(values)
+    result[valid] = EXCEL_EPOCH + np.round(values[valid] * 86400e6).astype("int64").astype("timedelta64[us]")
+    return pd.Series(result, index=series.index, name=series.name)
+
 
 class DateManager:
-    def __init__(self, log_file: str = './Custom-Python_Tools.log'):
+    def __init__(self, log_file: str = './Custom-Python_Tools.log', date_type: str = 'object'):
         """
         Args:
             log_file: The path to the log file.
+            date_type: The type dates are converted to by default, see `to_date`.
         """
         self.log = LogManager(log_name='DateManager', log_file=log_file)
+        self.date_type = date_type
+        self._formats = {}
         self.log.info("DateManager initialized.")
 
-    def timestamp_to_date(self, dataframe: pd.DataFrame) -> pd.DataFrame:
+    def _parse_strings(self, column, series: pd.Series) -> Optional[pd.Series]:
+        """Parse a column of date strings with one format for the whole column.
+
+        The format is guessed from the first value and kept for the column, so
+        the next chunks of the same sheet are parsed without guessing again. A
+        column is only converted when every value matches the format.
+        """
+        values = series.dropna()
+        if values.empty:
+            return None
+        date_format = self._formats.get(column)
+        for attempt in range(2):
+            if date_format is None:
+                with warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    date_format = guess_datetime_format(str(values.iloc[0]))
+                if date_format is None:
+                    return None
+            parsed = pd.to_datetime(series, format=date_format, errors="coerce")
+            if parsed.notna().sum() == len(values):
+                self._formats[column] = date_format
+                return parsed
+            self._formats.pop(column, None)
+            date_format = None
+        return None
+
+    def _as_datetime(
+            self, column, series: pd.Series, serial: bool = False,
+            parse_strings: bool = False, date_type: str = None) -> Optional[pd.Series]:
+        """Return a column as naive datetimes if it holds dates, None otherwise.
+
+        Datetime columns of any resolution are kept, timezone-aware ones keep
+        their local time. Object columns are converted when all their values are
+        datetimes, or dates when the target type is not `object`. Numbers are
+        only read as Excel serials when `serial` is set, and strings only parsed
+        with `parse_strings`.
+        """
+        dtype = series.dtype
+        if isinstance(dtype, pd.ArrowDtype):
+            if pa is not None and pa.types.is_timestamp(dtype.pyarrow_dtype):
+                return series.astype(f"datetime64[{dtype.pyarrow_dtype.unit}]")
+            return None
+        if isinstance(dtype, pd.DatetimeTZDtype):
+            return series.dt.tz_localize(None)
+        if pd.api.types.is_datetime64_dtype(dtype):
+            return series
+        if serial and pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype):
+            return serial_to_datetime(series)
+        if dtype == object or pd.api.types.is_string_dtype(dtype):
+            kind = pd.api.types.infer_dtype(series, skipna=True)
+            if kind in ("datetime", "datetime64") or (kind == "date" and (date_type or self.date_type) != "object"):
+                try:
+                    series = pd.to_datetime(series)
+                except (ValueError, TypeError):
+                    return None
+                if isinstance(series.dtype, pd.DatetimeTZDtype):
+                    series = series.dt.tz_localize(None)
+                return series if pd.api.types.is_datetime64_dtype(series.dtype) else None
+            if kind == "string" and parse_strings:
+                return self._parse_strings(column, series)
+        return None
+
+    def to_date(self, series: pd.Series, date_type: str = None) -> pd.Series:
+        """Convert a datetime series to dates.
+
+        The `object` type gives Python date objects, one per row. `datetime64`
+        keeps the datetime64 dtype with the time set to midnight, and `date32`
+        gives an Arrow date column of 4 bytes per row (pyarrow is needed, installed
+        with the `dates` extra). Both keep the column vectorized, so it stays
+        compact and fast to compare and group.
+
+        Args:
+            series: The datetime series to convert.
+            date_type: One of `object`, `datetime64` or `date32`, the default of
+                the instance if None.
+
+        Returns:
+            pd.Series: The series of dates.
+
+        Raises:
+            ValueError: If the date type is not supported.
+            ImportError: If pyarrow is needed but not installed.
+        """
+        date_type = date_type or self.date_type
+        if date_type == "object":
+            return series.dt.date
+        if date_type == "datetime64":
+            return series.dt.normalize()
+        if date_type == "date32":
+            if pa is None:
+                raise ImportError("pyarrow is required for the date32 date type.")
+            if series.dt.tz is not None:
+                series = series.dt.tz_localize(None)
+            return series.dt.normalize().astype(pd.ArrowDtype(pa.date32()))
+        raise ValueError(f"Date type '{date_type}' not supported, use one of {list(DATE_TYPES)}.")
+
+    def timestamp_to_date(
+            self, dataframe: pd.DataFrame, date_type: str = None, serial_columns: list = None,
+            parse_strings: bool = False) -> pd.DataFrame:
         """ Convert datetime columns in a dataframe to date type.
 
+        Datetime columns of any resolution or timezone are converted, as are
+        object columns holding only datetimes. The columns are found in one pass
+        over the dtypes and all converted columns are assigned at once.
+
         Args:
             dataframe: The dataframe containing the datetime columns.
+            date_type: One of `object`, `datetime64` or `date32`, see `to_date`.
+            serial_columns: The numeric columns holding Excel serial day numbers,
+                converted with NumPy arithmetic.
+            parse_strings: Whether string columns are parsed as dates, with one
+                format guessed per column and reused for later dataframes.
 
         Returns:
             pd.DataFrame: The input dataframe with the datetime columns converted to date type.
         """
-        datetime_columns = [
-            col for col, dtype in dataframe.dtypes.items() if dtype == 'datetime64[ns]'
-        ]
+        serial_columns = set(serial_columns or ())
+        converted = {}
+        for col, series in dataframe.items():
+            values = self._as_datetime(col, series, col in serial_columns, parse_strings, date_type)
+            if values is not None:
+                converted[col] = self.to_date(values, date_type)
 
         self.log.info('Datetime columns successfully fetched from dataframe.')
-        self.log.info(f"Datetime columns: {datetime_columns}")
+        self.log.info("Datetime columns: %s", list(converted))
 
-        for col in datetime_columns:
-            dataframe[col] = dataframe[col].dt.date
-            self.log.info(f"Datetime column:{col} converted.")
+        if converted:
+            dataframe[list(converted)] = pd.DataFrame(converted, index=dataframe.index)
+            self.log.info("Datetime columns:%s converted.", list(converted))
 
         return dataframe
 
-    def timestamp_to_date_column(self, column: str, dataframe: pd.DataFrame) -> pd.DataFrame:
+    def timestamp_to_date_column(
+            self, column: str, dataframe: pd.DataFrame, date_type: str = None, serial: bool = False,
+            parse_strings: bool = False) -> pd.DataFrame:
         """Convert a datetime column in a dataframe to date type.
 
+        The column is detected like in `timestamp_to_date`.
+
         Args:
             column: The name of the datetime column to convert.
             dataframe: The dataframe containing the datetime column.
+            date_type: One of `object`, `datetime64` or `date32`, see `to_date`.
+            serial: Whether the column holds Excel serial day numbers.
+            parse_strings: Whether a string column is parsed as dates.
 
         Returns:
             pd.DataFrame: The input dataframe with the datetime column converted to date type.
 
         Raises:
-            ValueError: If the input dataframe does not contain the specified datetime column.
+            ValueError: If the input dataframe does not contain the specified datetime column,
+                the column does not hold dates or the date type is not supported.
         """
         try:
             if column not in dataframe.columns:
                 raise ValueError(
                     f"The input dataframe does not contain the specified datetime column: {column}"
                 )
-            dataframe[column] = dataframe[column].dt.date
-            self.log.info(f"Datetime column:{column} converted.")
-        except ValueError as e:
+            values = self._as_datetime(column, dataframe[column], serial, parse_strings, date_type)
+            if values is None:
+                raise ValueError(f"The column {column} does not hold dates.")
+            dataframe[column] = self.to_date(values, date_type)
+            self.log.info("Datetime column:%s converted.", column)
+        except (ValueError, ImportError) as e:
             self.log.error(e)
         return dataframe
@@ -2,6 +2,7 @@ import pandas as pd
 import unittest
 
 from date_manager import DateManager
+from date_manager import date_manager
 
 
 class TestDateManager(unittest.TestCase):
@@ -35,6 +36,32 @@ class TestDateManager(unittest.TestCase):
         result_df = self.obj_date.timestamp_to_date_column('timestamp_col_1', self.df)
         pd.testing.assert_frame_equal(result_df, expected_df)
 
+    def test_timestamp_to_date_detection(self) -> None:
+        df = pd.DataFrame({
+            'tz_col': pd.date_range('2022-01-01 23:00', periods=3, tz='Europe/Paris'),
+            'seconds_col': pd.date_range('2022-01-01', periods=3).astype('datetime64[s]'),
+            'object_col': pd.Series(list(pd.date_range('2022-01-01 06:00', periods=3)), dtype=object),
+            'serial_col': [44562.25, 44563.0, 44564.75],
+            'string_col': ['2022-01-01', '2022-01-02', '2022-01-03'],
+            'other_col': [1, 2, 3],
+        })
+        result_df = self.obj_date.timestamp_to_date(df, serial_columns=['serial_col'], parse_strings=True)
+        expected = list(pd.date_range('2022-01-01', periods=3).date)
+        for column in ['tz_col', 'seconds_col', 'object_col', 'serial_col', 'string_col']:
+            self.assertEqual(result_df[column].tolist(), expected)
+        self.assertEqual(result_df['other_col'].tolist(), [1, 2, 3])
+
+    @unittest.skipIf(date_manager.pa is None, "pyarrow is not installed")
+    def test_timestamp_to_date_column_date_types(self) -> None:
+        self.df['timestamp_col_1'] = (self.df['timestamp_col_1'] + pd.Timedelta(hours=6)).astype('datetime64[ns]')
+        result_df = self.obj_date.timestamp_to_date_column('timestamp_col_1', self.df.copy(), date_type='datetime64')
+        pd.testing.assert_series_equal(
+            result_df['timestamp_col_1'], pd.Series(pd.date_range('2022-01-01', periods=5), name='timestamp_col_1'),
+            check_dtype=False)
+        result_df = self.obj_date.timestamp_to_date_column('timestamp_col_1', self.df.copy(), date_type='date32')
+        self.assertEqual(str(result_df['timestamp_col_1'].dtype), 'date32[day][pyarrow]')
+        self.assertEqual(result_df['timestamp_col_1'].tolist(), list(pd.date_range('2022-01-01', periods=5).date))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,59 @@
+# excel_manager/__main__.py
+
+"""Command line export of Excel sheets to CSV, Parquet or Feather files.
+
+Examples:
+    $ python -m excel_manager export report.xlsx Sheet1 sheet1.parquet
+    $ python -m excel_manager export report.xlsx Sheet1 sheet1.csv --chunksize 50000
+    $ excel-export export-dir reports/ exports/ --format feather --workers 4
+"""
+
+import argparse
+import sys
+from excel_manager.excel_manager import ExcelManager
+
+
+def main(argv: list = None) -> int:
+    """Run the command line and return its exit status."""
+    parser = argparse.ArgumentParser(prog="excel-export", description=__doc__.splitlines()[0])
+    parser.add_argument("--log-file", default="./Custom-Python_Tools.log", help="path of the log file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    sheet = commands.add_parser("export", help="export one sheet of a workbook")
+    sheet.add_argument("workbook", help="path of the Excel workbook")
+    sheet.add_argument("sheet", help="name of the sheet to export")
+    sheet.add_argument("target", help="path of the file to write")
+    sheet.add_argument("--format", choices=["csv", "parquet", "feather"],
+                       help="format of the file, taken from the target suffix by default")
+    sheet.add_argument("--chunksize", type=int, default=100000, help="rows read and written at a time")
+
+    directory = commands.add_parser("export-dir", help="export every sheet of the workbooks of a directory")
+    directory.add_argument("directory", help="directory holding the Excel workbooks")
+    directory.add_argument("target_directory", help="directory where the files are written")
+    directory.add_argument("--format", choices=["csv", "parquet", "feather"], default="parquet",
+                           help="format of the files")
+    directory.add_argument("--pattern", default="*.xlsx", help="glob pattern selecting the workbooks")
+    directory.add_argument("--workers", type=int, help="number of worker processes")
+    directory.add_argument("--chunksize", type=int, default=100000, help="rows read and written at a time")
+    args = parser.parse_args(argv)
+
+    excel_manager = ExcelManager(log_file=args.log_file)
+    if args.command == "export":
+        rows = excel_manager.export_sheet(
+            args.workbook, args.sheet, args.target, format=args.format, chunksize=args.chunksize)
+        if rows is None:
+            print(f"{args.sheet} of {args.workbook} not exported, see {args.log_file}.", file=sys.stderr)
+            return 1
+        print(f"{rows} rows exported to {args.target}.")
+        return 0
+    results = excel_manager.export_directory(
+        args.directory, args.target_directory, format=args.format,
+        max_workers=args.workers, chunksize=args.chunksize, pattern=args.pattern)
+    for path, sheets in results.items():
+        status = ", ".join(f"{name}: {rows} rows" for name, rows in sheets.items()) or "failed"
+        print(f"{path}: {status}")
+    return 0 if all(results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+# excel_manager/_cache.py
+
+"""Caches of the dataframes read from Excel workbooks."""
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+import hashlib
+import os
+import tempfile
+import threading
+import pandas as pd
+
+try:
+    import pyarrow.feather as feather
+except ImportError:  # pragma: no cover - pyarrow is optional
+    feather = None
+
+
+class ReadCache:
+    """A size bounded LRU cache of dataframes keyed on the identity of the workbook file.
+
+    The key holds the resolved path, modification time and size of the file, so
+    a workbook changed on disk is never served from the cache. Dataframes are
+    copied when they are stored and when they are returned, so callers cannot
+    change the cached content.
+
+    Attributes:
+        max_bytes (int): The maximum memory usage of the cached dataframes.
+        hits (int): The number of lookups served from the cache.
+        misses (int): The number of lookups not found in the cache.
+        evictions (int): The number of dataframes evicted to make room.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        """
+        Args:
+            max_bytes: The maximum memory usage of the cached dataframes.
+        """
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(workbook: str, sheet: str, options: tuple = ()) -> Optional[tuple]:
+        """Return the cache key of a read, or None if the workbook is not a file found on disk."""
+        try:
+            path = Path(workbook).resolve()
+            stat = path.stat()
+        except (OSError, TypeError):
+            return None
+        return str(path), stat.st_mtime_ns, stat.st_size, sheet, options
+
+    def get(self, key: Optional[tuple]) -> Optional[pd.DataFrame]:
+        """Return a copy of the cached dataframe, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key) if key is not None else None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0].copy()
+
+    def put(self, key: Optional[tuple], dataframe: pd.DataFrame) -> None:
+        """Store a copy of a dataframe, evicting the least recently used ones."""
+        if key is None:
+            return
+        size = int(dataframe.memory_usage(index=True, deep=True).sum())
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._size -= self._entries.pop(key)[1]
+            self._entries[key] = (dataframe.copy(), size)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= evicted
+                self.evictions += 1
+
+    def invalidate(self, workbook: str) -> None:
+        """Drop every cached dataframe read from a workbook."""
+        path = str(Path(workbook).resolve())
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == path]:
+                self._size -= self._entries.pop(key)[1]
+
+    def clear(self) -> None:
+        """Drop every cached dataframe."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def info(self) -> dict:
+        """Return the counters of the cache."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "size": self._size,
+                "max_size": self.max_bytes,
+            }
+
+
+class SidecarCache:
+    """An on-disk cache of parsed sheets shared between processes.
+
+    Each sheet is stored in its own file named after the workbook path and the
+    file identity (modification time and size), in Feather format, which needs
+    pyarrow. Feather files hold only data, so loading a file written by another
+    process cannot run code, and they are memory-mapped when loaded. Sheets
+    Feather cannot store, such as columns of mixed types, are not cached. Files
+    are written atomically, older versions of a workbook's sheet are removed when
+    a new one is stored, and the least recently used files are removed once the
+    directory grows beyond `max_bytes`.
+
+    Attributes:
+        directory (Path): The directory holding the cached sheets.
+        max_bytes (int): The maximum total size of the cached files.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 1024 ** 3) -> None:
+        """
+        Args:
+            directory: The directory holding the cached sheets.
+            max_bytes: The maximum total size of the cached files.
+
+        Raises:
+            ImportError: If pyarrow is not installed.
+        """
+        if feather is None:
+            raise ImportError("pyarrow is required for the cache directory.")
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _prefix(self, key: tuple) -> str:
+        """Return the part of the file name shared by every version of a sheet."""
+        return hashlib.sha1(repr((key[0], key[3], key[4])).encode("utf-8")).hexdigest()[:20]
+
+    def _file(self, key: tuple) -> Path:
+        """Return the path a key is stored at."""
+        name = f"{self._prefix(key)}-{hashlib.sha1(repr(key).encode('utf-8')).hexdigest()[:20]}"
+        return self.directory / f"{name}.feather"
+
+    def get(self, key: Optional[tuple]) -> Optional[pd.DataFrame]:
+        """Load a cached sheet, or return None if it is not stored."""
+        if key is None:
+            return None
+        path = self._file(key)
+        try:
+            dataframe = feather.read_table(path, memory_map=True).to_pandas()
+        except (OSError, ValueError):
+            return None
+        os.utime(path)
+        return dataframe
+
+    def put(self, key: Optional[tuple], dataframe: pd.DataFrame) -> bool:
+        """Store a parsed sheet, then evict files beyond the size limit.
+
+        Older versions of the sheet are removed even if it cannot be stored.
+
+        Returns:
+            bool: Whether the sheet was stored; False if Feather cannot store it.
+        """
+        if key is None:
+            return False
+        path = self._file(key)
+        handle, temp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        os.close(handle)
+        try:
+            feather.write_feather(dataframe, temp, compression="uncompressed")
+            os.replace(temp, path)
+            stored = True
+        except (ValueError, TypeError, NotImplementedError):
+            stored = False
+        finally:
+            if os.path.exists(temp):
+                os.remove(temp)
+        for stale in self.directory.glob(f"{self._prefix(key)}-*"):
+            if stale != path or not stored:
+                stale.unlink(missing_ok=True)
+        self.evict()
+        return stored
+
+    def evict(self) -> None:
+        """Remove the least recently used files until the cache fits in `max_bytes`."""
+        files = []
+        for path in self.directory.iterdir():
+            if path.suffix == ".feather":
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
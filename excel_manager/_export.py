@@ -0,0 +1,123 @@
+# excel_manager/_export.py
+
+"""Writers streaming dataframe chunks into CSV, Parquet and Feather files."""
+
+from pathlib import Path
+from typing import Iterable, Iterator
+import os
+import pandas as pd
+from excel_manager._locking import atomic_path
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pa = None
+    pq = None
+
+
+FORMATS = {"csv": ".csv", "parquet": ".parquet", "feather": ".feather"}
+
+
+def export_format(target: str, format: str = None) -> str:
+    """Return the export format, taken from the suffix of the target when not given.
+
+    Raises:
+        ValueError: If the format is not supported.
+    """
+    if format is None:
+        format = Path(target).suffix.lstrip(".").lower()
+    if format not in FORMATS:
+        raise ValueError(f"Export format '{format}' not supported, use one of {list(FORMATS)}.")
+    return format
+
+
+def _open_writer(temp: str, schema, format: str):
+    """Open the Parquet or Feather writer of a file."""
+    if format == "parquet":
+        return pq.ParquetWriter(temp, schema)
+    return pa.ipc.new_file(temp, schema)
+
+
+def _tables(path: str, format: str) -> Iterator:
+    """Yield the row groups or record batches of a file written by `_open_writer`, one at a time."""
+    if format == "parquet":
+        parquet = pq.ParquetFile(path)
+        for index in range(parquet.num_row_groups):
+            yield parquet.read_row_group(index)
+    else:
+        with pa.memory_map(path) as source:
+            reader = pa.ipc.open_file(source)
+            for index in range(reader.num_record_batches):
+                yield pa.Table.from_batches([reader.get_batch(index)])
+
+
+def _widen(temp: str, schema, format: str):
+    """Rewrite the chunks already written with wider column types and return the reopened writer."""
+    previous = f"{temp}.previous"
+    os.replace(temp, previous)
+    try:
+        writer = _open_writer(temp, schema, format)
+        for table in _tables(previous, format):
+            writer.write_table(table.cast(schema))
+    finally:
+        os.remove(previous)
+    return writer
+
+
+def write_chunks(chunks: Iterable[pd.DataFrame], target: str, format: str) -> int:
+    """Write dataframes one after the other into a single file.
+
+    CSV chunks are appended to the file, Parquet chunks are written as row
+    groups and Feather chunks as record batches, so only one chunk is held in
+    memory. The column types of Parquet and Feather files are unified across the
+    chunks: when a chunk needs a wider type than the ones written so far, such
+    as floats in a column of integers or values in a column that was empty, the
+    chunks already written are rewritten with the wider types. The file is
+    replaced atomically once every chunk is written.
+
+    Args:
+        chunks: The dataframes to write, all with the same columns.
+        target: The path of the file to write.
+        format: One of `csv`, `parquet` or `feather`.
+
+    Returns:
+        int: The number of rows written.
+
+    Raises:
+        ImportError: If pyarrow is needed but not installed.
+    """
+    if format != "csv" and pa is None:
+        raise ImportError(f"pyarrow is required to export to {format}.")
+    rows = 0
+    with atomic_path(target) as temp:
+        if format == "csv":
+            with open(temp, "w", newline="", encoding="utf-8") as handle:
+                header = True
+                for chunk in chunks:
+                    chunk.to_csv(handle, index=False, header=header)
+                    header = False
+                    rows += len(chunk)
+        else:
+            writer = None
+            schema = None
+            try:
+                for chunk in chunks:
+                    table = pa.Table.from_pandas(chunk, preserve_index=False)
+                    if writer is None:
+                        schema = table.schema
+                        writer = _open_writer(temp, schema, format)
+                    elif not table.schema.equals(schema):
+                        unified = pa.unify_schemas([schema, table.schema], promote_options="permissive")
+                        if not unified.equals(schema, check_metadata=False):
+                            writer.close()
+                            writer = None
+                            schema = unified.with_metadata(table.schema.metadata)
+                            writer = _widen(temp, schema, format)
+                        table = table.cast(schema)
+                    writer.write_table(table)
+                    rows += len(chunk)
+            finally:
+                if writer is not None:
+                    writer.close()
+    return rows
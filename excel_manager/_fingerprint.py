@@ -0,0 +1,70 @@
+# excel_manager/_fingerprint.py
+
+"""Content fingerprints of the sheets written to a workbook, kept in a sidecar file."""
+
+from pathlib import Path
+from typing import Optional
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+from excel_manager._locking import atomic_path
+
+
+def fingerprint(dataframe: pd.DataFrame) -> str:
+    """Return a digest of the column names, dtypes and values of a dataframe.
+
+    Columns with a NumPy numeric or datetime dtype are hashed from their buffers,
+    other columns, including timezone-aware and extension dtypes whose arrays
+    hold objects, from `pd.util.hash_pandas_object`, so no value is converted
+    to text.
+    """
+    digest = hashlib.sha1()
+    digest.update(repr([(str(name), str(dtype)) for name, dtype in dataframe.dtypes.items()]).encode("utf-8"))
+    digest.update(repr(dataframe.shape).encode("utf-8"))
+    for _, column in dataframe.items():
+        if isinstance(column.dtype, np.dtype) and column.dtype.kind in "biufcmM":
+            digest.update(column.to_numpy().tobytes())
+        else:
+            digest.update(pd.util.hash_pandas_object(column, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def fingerprint_path(workbook: str) -> Path:
+    """Return the path of the fingerprint file of a workbook."""
+    path = Path(workbook)
+    return path.with_name(f".{path.name}.fingerprints.json")
+
+
+def stamp(workbook: str) -> Optional[list]:
+    """Return the identity of the workbook file, None if it cannot be found."""
+    try:
+        stat = os.stat(workbook)
+    except OSError:
+        return None
+    return [stat.st_ino, stat.st_mtime_ns, stat.st_size]
+
+
+def load(workbook: str) -> dict:
+    """Return the fingerprints of the sheets, empty if the workbook changed since they were stored."""
+    try:
+        with open(fingerprint_path(workbook), encoding="utf-8") as handle:
+            stored = json.load(handle)
+    except (OSError, ValueError):
+        return {}
+    if stored.get("stamp") != stamp(workbook):
+        return {}
+    return stored.get("sheets", {})
+
+
+def store(workbook: str, sheets: dict) -> None:
+    """Store the fingerprints of the sheets for the current content of the workbook."""
+    with atomic_path(fingerprint_path(workbook)) as temp:
+        with open(temp, "w", encoding="utf-8") as handle:
+            json.dump({"stamp": stamp(workbook), "sheets": sheets}, handle)
+
+
+def discard(workbook: str) -> None:
+    """Remove the fingerprint file of a workbook."""
+    fingerprint_path(workbook).unlink(missing_ok=True)
@@ -0,0 +1,107 @@
+# excel_manager/_locking.py
+
+"""Advisory locks and atomic replacement of workbook files."""
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+    import msvcrt
+
+
+_held = threading.local()
+
+
+def lock_path(workbook: str) -> Path:
+    """Return the path of the lock file of a workbook."""
+    path = Path(workbook)
+    return path.with_name(f".{path.name}.lock")
+
+
+@contextmanager
+def workbook_lock(workbook: str) -> Iterator[None]:
+    """Hold an exclusive advisory lock on a workbook.
+
+    The lock is taken on a hidden lock file next to the workbook, so it works
+    across threads and processes as long as every writer uses it. The lock file
+    is left in place, removing it would let two writers lock different files.
+    The lock is reentrant within a thread.
+
+    Args:
+        workbook: The path to the Excel workbook.
+    """
+    held = _held.__dict__.setdefault("paths", {})
+    key = str(Path(workbook).resolve())
+    if held.get(key):
+        held[key] += 1
+        try:
+            yield
+        finally:
+            held[key] -= 1
+        return
+    with open(lock_path(workbook), "a+b") as handle:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        else:
+            while True:
+                try:
+                    handle.seek(0)
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    time.sleep(0.05)
+        held[key] = 1
+        try:
+            yield
+        finally:
+            held[key] = 0
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def atomic_path(workbook: str) -> Iterator[str]:
+    """Give a temporary path that replaces the workbook once it has been written.
+
+    The temporary file is created next to the workbook, flushed to disk and then
+    renamed over it, so readers see either the old or the new workbook and never
+    a partly written one. Nothing is replaced if the block raises.
+
+    Args:
+        workbook: The path to the Excel workbook.
+
+    Yields:
+        str: The path to write the new workbook to.
+    """
+    path = Path(workbook)
+    handle, temp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    os.close(handle)
+    try:
+        yield temp
+        with open(temp, "rb+") as written:
+            os.fsync(written.fileno())
+        if path.exists():
+            shutil.copymode(path, temp)
+        os.replace(temp, path)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+    if hasattr(os, "O_DIRECTORY"):
+        directory = os.open(path.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
@@ -0,0 +1,203 @@
+# excel_manager/_reader.py
+
+"""Values-only reader of xlsx worksheets.
+
+The reader streams the XML of a worksheet and keeps only the cell values. The
+styles part is scanned once for the number formats of the cell formats, which
+are only used to tell dates from numbers; fonts, fills, borders and formulas
+are never parsed. Worksheets expose the `iter_rows` method of openpyxl
+read-only worksheets, so the rest of the read path does not depend on the
+engine.
+"""
+
+from datetime import datetime
+from typing import Iterator, Optional
+from xml.etree import ElementTree
+import re
+import zipfile
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format, is_timedelta_format
+from openpyxl.utils import column_index_from_string
+from openpyxl.utils.datetime import CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900, from_excel
+from excel_manager import _xlsx
+
+
+_NS = f"{{{_xlsx.MAIN_NS}}}"
+_ROW = f"{_NS}row"
+_CELL = f"{_NS}c"
+_VALUE = f"{_NS}v"
+_INLINE = f"{_NS}is"
+_TEXT = f"{_NS}t"
+_RUN = f"{_NS}r"
+_SHEET_DATA = f"{_NS}sheetData"
+_DATE1904 = re.compile(rb'<(?:\w+:)?workbookPr\b[^>]*?\bdate1904="(1|true)"')
+
+
+def _string(element) -> str:
+    """Return the text of a shared or inline string, leaving out phonetic runs."""
+    text = element.find(_TEXT)
+    if text is not None:
+        return text.text or ""
+    return "".join(run.findtext(_TEXT) or "" for run in element.iter(_RUN))
+
+
+def shared_strings(zf: zipfile.ZipFile, part: Optional[str]) -> list:
+    """Return the shared strings of a workbook, streamed from their part."""
+    strings = []
+    if part is None or part not in zf.NameToInfo:
+        return strings
+    with zf.open(part) as member:
+        for _, element in ElementTree.iterparse(member):
+            if element.tag == f"{_NS}si":
+                strings.append(_string(element))
+                element.clear()
+    return strings
+
+
+def date_formats(zf: zipfile.ZipFile, part: Optional[str]) -> tuple:
+    """Return the indexes of the cell formats showing dates and showing durations.
+
+    Only the custom number formats and the `numFmtId` of the cell formats are
+    read from the styles part.
+    """
+    if part is None or part not in zf.NameToInfo:
+        return frozenset(), frozenset()
+    root = ElementTree.fromstring(zf.read(part))
+    codes = dict(BUILTIN_FORMATS)
+    for element in root.iter(f"{_NS}numFmt"):
+        codes[int(element.get("numFmtId"))] = element.get("formatCode", "")
+    dates = set()
+    durations = set()
+    xfs = root.find(f"{_NS}cellXfs")
+    for index, xf in enumerate(xfs if xfs is not None else ()):
+        code = codes.get(int(xf.get("numFmtId", 0)), "")
+        if is_timedelta_format(code):
+            durations.add(index)
+        elif is_date_format(code):
+            dates.add(index)
+    return frozenset(dates), frozenset(durations)
+
+
+class ValuesWorkbook:
+    """A workbook opened for reading cell values only.
+
+    The shared strings and the date formats are read when the workbook is
+    opened; worksheets are streamed when their rows are iterated.
+
+    Attributes:
+        sheetnames (list): The names of the sheets, in workbook order.
+    """
+
+    def __init__(self, source) -> None:
+        """
+        Args:
+            source: The path to the Excel workbook, or a file-like object holding it.
+        """
+        self._zf = zipfile.ZipFile(source)
+        try:
+            part = _xlsx.workbook_part(self._zf)
+            targets = {rel["type"].rsplit("/", 1)[-1]: rel["target"] for rel in _xlsx.relationships(self._zf, part).values()}
+            self._parts = _xlsx.sheet_parts(self._zf)
+            self._strings = shared_strings(self._zf, targets.get("sharedStrings"))
+            self._dates, self._durations = date_formats(self._zf, targets.get("styles"))
+            self._epoch = CALENDAR_MAC_1904 if _DATE1904.search(self._zf.read(part)) else CALENDAR_WINDOWS_1900
+        except Exception:
+            self._zf.close()
+            raise
+        self.sheetnames = list(self._parts)
+
+    def __getitem__(self, sheet: str) -> "ValuesSheet":
+        if sheet not in self._parts:
+            raise KeyError(f"Worksheet {sheet} does not exist.")
+        return ValuesSheet(self, self._parts[sheet])
+
+    def close(self) -> None:
+        """Close the archive of the workbook."""
+        self._zf.close()
+
+
+class ValuesSheet:
+    """A worksheet whose rows are read as values straight from its XML.
+
+    Attributes:
+        max_column (int): The last column of the dimension of the sheet, None if unknown.
+    """
+
+    def __init__(self, workbook: ValuesWorkbook, part: str) -> None:
+        self._workbook = workbook
+        self._part = part
+        self.max_column = _xlsx.scan_sheet(workbook._zf, part, protection=False)["columns"]
+
+    def _value(self, cell):
+        """Return the value of a cell like openpyxl does, with errors as missing values."""
+        kind = cell.get("t", "n")
+        if kind == "inlineStr":
+            inline = cell.find(_INLINE)
+            return None if inline is None else _string(inline)
+        value = cell.findtext(_VALUE)
+        if value is None or (not value and kind != "str"):
+            return None
+        if kind == "n":
+            number = float(value) if "." in value or "E" in value or "e" in value else int(value)
+            style = int(cell.get("s", 0))
+            if style in self._workbook._dates:
+                return from_excel(number, self._workbook._epoch)
+            if style in self._workbook._durations:
+                return from_excel(number, self._workbook._epoch, timedelta=True)
+            return number
+        if kind == "s":
+            return self._workbook._strings[int(value)]
+        if kind == "str":
+            return value
+        if kind == "b":
+            return value == "1" or value == "true"
+        if kind == "d":
+            return datetime.fromisoformat(value.rstrip("Z"))
+        return None
+
+    def _row(self, element, min_col: int, max_col: Optional[int]) -> tuple:
+        """Return the values of a row element between two columns."""
+        values = {}
+        column = 0
+        for cell in element.iter(_CELL):
+            ref = cell.get("r")
+            column = column_index_from_string(ref.rstrip("0123456789")) if ref else column + 1
+            if column < min_col or (max_col is not None and column > max_col):
+                continue
+            values[column] = self._value(cell)
+        last = max_col if max_col is not None else max(values, default=min_col - 1)
+        return tuple(values.get(column) for column in range(min_col, last + 1))
+
+    def iter_rows(
+            self, min_row: int = None, max_row: int = None, min_col: int = None,
+            max_col: int = None, values_only: bool = True) -> Iterator[tuple]:
+        """Yield the values of the rows of the sheet, like openpyxl `iter_rows(values_only=True)`.
+
+        Rows missing from the XML are yielded empty, so positions are kept. Rows
+        are padded to `max_col`, or to the dimension of the sheet.
+        """
+        min_row = min_row or 1
+        min_col = min_col or 1
+        max_col = max_col or self.max_column
+        empty = (None,) * (max_col - min_col + 1) if max_col else ()
+        expected = min_row
+        number = 0
+        sheet_data = None
+        with self._workbook._zf.open(self._part) as member:
+            for event, element in ElementTree.iterparse(member, events=("start", "end")):
+                if event == "start":
+                    if element.tag == _SHEET_DATA:
+                        sheet_data = element
+                    continue
+                if element.tag != _ROW:
+                    continue
+                number = int(element.get("r") or number + 1)
+                if number >= min_row:
+                    if max_row is not None and number > max_row:
+                        break
+                    while expected < number:
+                        yield empty
+                        expected += 1
+                    yield self._row(element, min_col, max_col)
+                    expected = number + 1
+                if sheet_data is not None:
+                    sheet_data.clear()
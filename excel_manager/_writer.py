@@ -0,0 +1,74 @@
+# excel_manager/_writer.py
+
+"""Single-writer queue merging the appends of many producers to one workbook."""
+
+from concurrent.futures import Future
+import threading
+import pandas as pd
+
+
+class WriterQueue:
+    """Queue of appends to a workbook, written by one background thread.
+
+    Producers add appends from any thread and get a future back. The writer
+    thread takes every pending append at once and writes them in a single
+    session, so under contention many appends cost one load and one save. The
+    thread stops when the queue is empty and is started again by the next append.
+
+    Attributes:
+        workbook (str): The path to the Excel workbook.
+        batches (int): The number of sessions written.
+        appends (int): The number of appends written.
+    """
+
+    def __init__(self, manager, workbook: str) -> None:
+        """
+        Args:
+            manager: The ExcelManager writing the appends.
+            workbook: The path to the Excel workbook.
+        """
+        self.manager = manager
+        self.workbook = workbook
+        self.batches = 0
+        self.appends = 0
+        self._pending = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def put(self, sheet: str, dataframe: pd.DataFrame, password: str = None) -> Future:
+        """Queue an append and return a future resolved once it is saved."""
+        future = Future()
+        with self._lock:
+            self._pending.append((sheet, dataframe, password, future))
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name=f"WriterQueue({self.workbook})")
+                self._thread.start()
+        return future
+
+    def join(self) -> None:
+        """Wait until every queued append has been written."""
+        while True:
+            with self._lock:
+                thread = self._thread
+            if thread is None:
+                return
+            thread.join()
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                if not batch:
+                    self._thread = None
+                    return
+            try:
+                saved = self.manager._append_batch(self.workbook, [item[:3] for item in batch])
+            except Exception as e:
+                for *_, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.appends += len(batch)
+            for *_, future in batch:
+                future.set_result(saved)
@@ -0,0 +1,748 @@
+# excel_manager/_xlsx.py
+
+"""Helpers working directly on the parts of an xlsx archive.
+
+These functions read and rewrite the XML members of the zip archive without
+loading the workbook in openpyxl, so their cost depends on the parts they touch
+rather than on the size of the whole workbook.
+"""
+
+from datetime import date, datetime, time
+from typing import Dict, Iterable, Iterator, Optional
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+import html
+import os
+import posixpath
+import re
+import zipfile
+import numpy as np
+import pandas as pd
+from openpyxl.utils import column_index_from_string, get_column_letter
+from openpyxl.utils.protection import hash_password
+from excel_manager._locking import atomic_path
+
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+CALC_CHAIN_TYPE = REL_NS + "/calcChain"
+
+EXCEL_EPOCH = np.datetime64("1899-12-30", "ns")
+_ILLEGAL_CHARACTERS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_DATE_FORMAT_ID = 14
+_DATETIME_FORMAT_ID = 22
+
+
+class ArchiveError(Exception):
+    """Raised when the archive does not have the structure of an xlsx workbook."""
+
+
+def _rels_path(part: str) -> str:
+    """Return the path of the relationships part of `part`."""
+    folder, name = posixpath.split(part)
+    return posixpath.join(folder, "_rels", name + ".rels")
+
+
+def _resolve(source: str, target: str) -> str:
+    """Resolve a relationship target relative to the part that declares it."""
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return posixpath.normpath(posixpath.join(posixpath.dirname(source), target))
+
+
+def workbook_part(zf: zipfile.ZipFile) -> str:
+    """Return the path of the workbook part of the archive."""
+    try:
+        root = ElementTree.fromstring(zf.read("_rels/.rels"))
+    except KeyError:
+        raise ArchiveError("Missing package relationships.")
+    for rel in root.iter(f"{{{PKG_REL_NS}}}Relationship"):
+        if rel.get("Type", "").endswith("/officeDocument"):
+            return _resolve("", rel.get("Target"))
+    raise ArchiveError("Missing workbook part.")
+
+
+def relationships(zf: zipfile.ZipFile, part: str) -> Dict[str, dict]:
+    """Return the relationships of a part keyed by their id."""
+    try:
+        root = ElementTree.fromstring(zf.read(_rels_path(part)))
+    except KeyError:
+        return {}
+    return {
+        rel.get("Id"): {
+            "type": rel.get("Type"),
+            "target": _resolve(part, rel.get("Target")),
+            "external": rel.get("TargetMode") == "External",
+        }
+        for rel in root.iter(f"{{{PKG_REL_NS}}}Relationship")
+    }
+
+
+def sheet_parts(zf: zipfile.ZipFile) -> Dict[str, str]:
+    """Return the path of every worksheet part keyed by sheet name, in workbook order."""
+    part = workbook_part(zf)
+    rels = relationships(zf, part)
+    root = ElementTree.fromstring(zf.read(part))
+    parts = {}
+    for sheet in root.iter(f"{{{MAIN_NS}}}sheet"):
+        rel = rels.get(sheet.get(f"{{{REL_NS}}}id"))
+        if rel is None:
+            raise ArchiveError(f"Missing relationship for sheet {sheet.get('name')}.")
+        parts[sheet.get("name")] = rel["target"]
+    return parts
+
+
+def _sheet_states(zf: zipfile.ZipFile) -> Dict[str, str]:
+    """Return the visibility of every sheet keyed by sheet name."""
+    root = ElementTree.fromstring(zf.read(workbook_part(zf)))
+    return {sheet.get("name"): sheet.get("state", "visible") for sheet in root.iter(f"{{{MAIN_NS}}}sheet")}
+
+
+_DIMENSION = re.compile(rb'<(?:\w+:)?dimension\b[^>]*?\bref="([^"]*)"')
+_SHEET_DATA = re.compile(rb"<(?:\w+:)?sheetData\b")
+_PROTECTION = re.compile(rb"<(?:\w+:)?sheetProtection\b([^>]*)>")
+
+
+def scan_sheet(zf: zipfile.ZipFile, part: str, protection: bool = True) -> dict:
+    """Read the dimension and the protection of a worksheet without parsing its cells.
+
+    The dimension is read from the start of the part. The protection element
+    follows the cell data, so finding it means reading through the part, which
+    is done with a byte search over the decompressed stream.
+
+    Args:
+        zf: The open workbook archive.
+        part: The path of the worksheet part.
+        protection: Whether the protection is looked up.
+
+    Returns:
+        dict: The `dimension` reference, the number of `rows` and `columns` it
+            spans and whether the sheet is `protected` (None if not looked up).
+    """
+    info = {"dimension": None, "rows": None, "columns": None, "protected": None}
+    head = b""
+    with zf.open(part) as member:
+        while True:
+            data = member.read(1 << 16)
+            head += data
+            if _SHEET_DATA.search(head) or not data:
+                break
+        match = _DIMENSION.search(head)
+        if match:
+            ref = match.group(1).decode("utf-8")
+            info["dimension"] = ref
+            last = re.match(r"\$?([A-Z]+)\$?(\d+)$", ref.split(":")[-1])
+            if last:
+                info["columns"] = column_index_from_string(last.group(1))
+                info["rows"] = int(last.group(2))
+        if protection:
+            info["protected"] = False
+            carry = head
+            while True:
+                match = _PROTECTION.search(carry)
+                if match:
+                    info["protected"] = bool(re.search(rb'\bsheet="(1|true)"', match.group(1)))
+                    break
+                data = member.read(1 << 20)
+                if not data:
+                    break
+                carry = carry[-256:] + data
+    return info
+
+
+def inspect_workbook(zf: zipfile.ZipFile, protection: bool = True) -> list:
+    """Describe the sheets of a workbook from the archive, without loading cell data.
+
+    Args:
+        zf: The open workbook archive.
+        protection: Whether the protection of every sheet is looked up.
+
+    Returns:
+        list: One dict per sheet, in workbook order, with its `name`, `index`,
+            `state`, `dimension`, `rows`, `columns` and `protected` keys.
+    """
+    states = _sheet_states(zf)
+    sheets = []
+    for index, (name, part) in enumerate(sheet_parts(zf).items()):
+        info = {"name": name, "index": index, "state": states.get(name, "visible")}
+        info.update(scan_sheet(zf, part, protection=protection))
+        sheets.append(info)
+    return sheets
+
+
+def add_date_styles(styles: bytes) -> tuple:
+    """Make sure the stylesheet has cell formats for dates and datetimes.
+
+    Args:
+        styles: The content of the styles part.
+
+    Returns:
+        tuple: The new content of the styles part, and the index of the date and
+            of the datetime cell formats.
+    """
+    text = styles.decode("utf-8")
+    match = re.search(r"<cellXfs\b[^>]*?(/>|>(.*?)</cellXfs>)", text, re.S)
+    if match is None:
+        raise ArchiveError("Missing cell formats in styles.")
+    xfs = re.findall(r"<xf\b[^>]*?(?:/>|>.*?</xf>)", match.group(2) or "", re.S)
+    indexes = {}
+    for i, xf in enumerate(xfs):
+        num_fmt = re.search(r'numFmtId="(\d+)"', xf)
+        if num_fmt and 'applyNumberFormat="1"' in xf:
+            indexes.setdefault(int(num_fmt.group(1)), i)
+    added = []
+    for num_fmt in (_DATE_FORMAT_ID, _DATETIME_FORMAT_ID):
+        if num_fmt not in indexes:
+            indexes[num_fmt] = len(xfs) + len(added)
+            added.append(f'<xf numFmtId="{num_fmt}" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>')
+    if added:
+        body = "".join(xfs + added)
+        cell_xfs = f'<cellXfs count="{len(xfs) + len(added)}">{body}</cellXfs>'
+        text = text[:match.start()] + cell_xfs + text[match.end():]
+    return text.encode("utf-8"), indexes[_DATE_FORMAT_ID], indexes[_DATETIME_FORMAT_ID]
+
+
+def _text_cell(ref: str, value) -> str:
+    text = escape(_ILLEGAL_CHARACTERS.sub("", str(value)))
+    return f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def _serial(value) -> float:
+    """Return the Excel serial number of a date or datetime."""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.replace(tzinfo=None)
+        delta = value - datetime(1899, 12, 30)
+        return delta.days + delta.seconds / 86400 + delta.microseconds / 86400e6
+    return float((value - date(1899, 12, 30)).days)
+
+
+def _object_cell(ref: str, value, styles: tuple) -> str:
+    """Return the XML of a cell holding a value of any type."""
+    if value is None or value is pd.NA or value is pd.NaT:
+        return ""
+    if isinstance(value, (bool, np.bool_)):
+        return f'<c r="{ref}" t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, np.integer)):
+        return f'<c r="{ref}"><v>{int(value)}</v></c>'
+    if isinstance(value, (float, np.floating)):
+        if not np.isfinite(value):
+            return ""
+        return f'<c r="{ref}"><v>{float(value)!r}</v></c>'
+    if isinstance(value, datetime):
+        return f'<c r="{ref}" s="{styles[1]}"><v>{_serial(value)!r}</v></c>'
+    if isinstance(value, date):
+        return f'<c r="{ref}" s="{styles[0]}"><v>{_serial(value)!r}</v></c>'
+    if isinstance(value, time):
+        seconds = value.hour * 3600 + value.minute * 60 + value.second + value.microsecond / 1e6
+        return f'<c r="{ref}" s="{styles[1]}"><v>{seconds / 86400!r}</v></c>'
+    return _text_cell(ref, value)
+
+
+def _column_cells(series: pd.Series, letter: str, first_row: int, styles: tuple) -> list:
+    """Return the XML of the cells of a slice of a column."""
+    rows = range(first_row, first_row + len(series))
+    dtype = series.dtype
+    if pd.api.types.is_bool_dtype(dtype) and dtype != object:
+        values = series.to_numpy(dtype=object).tolist()
+        return ["" if v is None or v is pd.NA else f'<c r="{letter}{r}" t="b"><v>{int(v)}</v></c>'
+                for r, v in zip(rows, values)]
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        if isinstance(dtype, pd.DatetimeTZDtype):
+            series = series.dt.tz_localize(None)
+        values = series.astype("datetime64[ns]").to_numpy()
+        serials = ((values - EXCEL_EPOCH) / np.timedelta64(1, "D")).tolist()
+        valid = values[~np.isnat(values)]
+        has_time = bool((valid != valid.astype("datetime64[D]")).any())
+        style = styles[1] if has_time else styles[0]
+        return ["" if v != v else f'<c r="{letter}{r}" s="{style}"><v>{v!r}</v></c>'
+                for r, v in zip(rows, serials)]
+    if pd.api.types.is_integer_dtype(dtype) and not isinstance(dtype, pd.api.extensions.ExtensionDtype):
+        return [f'<c r="{letter}{r}"><v>{v}</v></c>' for r, v in zip(rows, series.to_numpy().tolist())]
+    if pd.api.types.is_float_dtype(dtype) and not isinstance(dtype, pd.api.extensions.ExtensionDtype):
+        values = series.to_numpy()
+        finite = np.isfinite(values).tolist()
+        return ["" if not ok else f'<c r="{letter}{r}"><v>{v!r}</v></c>'
+                for r, v, ok in zip(rows, values.tolist(), finite)]
+    return [_object_cell(f"{letter}{r}", v, styles) for r, v in zip(rows, series.to_numpy(dtype=object).tolist())]
+
+
+def rows_xml(
+        dataframe: pd.DataFrame, styles: tuple, first_row: int, header: bool = False,
+        chunksize: int = 10000) -> Iterator[bytes]:
+    """Generate the row elements holding a dataframe, in batches of rows.
+
+    Args:
+        dataframe: The dataframe to write.
+        styles: The index of the date and of the datetime cell formats.
+        first_row: The number of the first row written.
+        header: Whether the column names are written as the first row.
+        chunksize: The number of rows generated per batch.
+
+    Yields:
+        bytes: The XML of the next batch of rows.
+    """
+    letters = [get_column_letter(i) for i in range(1, len(dataframe.columns) + 1)]
+    row = first_row
+    if header and letters:
+        cells = "".join(_object_cell(f"{letter}{row}", name, styles) for letter, name in zip(letters, dataframe.columns))
+        yield f'<row r="{row}">{cells}</row>'.encode("utf-8")
+        row += 1
+    for start in range(0, len(dataframe), chunksize):
+        batch = dataframe.iloc[start:start + chunksize]
+        columns = [
+            _column_cells(batch.iloc[:, i], letter, row, styles) for i, letter in enumerate(letters)
+        ]
+        yield "".join(
+            f'<row r="{row + i}">{"".join(cells)}</row>' for i, cells in enumerate(zip(*columns))
+        ).encode("utf-8")
+        row += len(batch)
+
+
+def sheet_xml(dataframe: pd.DataFrame, styles: tuple, header: bool = True, chunksize: int = 10000) -> Iterator[bytes]:
+    """Generate the XML of a worksheet holding a dataframe, in batches of rows.
+
+    Cells are built column by column from the column arrays of each batch, so
+    the time per row does not depend on the size of the dataframe and memory use
+    is bounded by `chunksize`.
+
+    Args:
+        dataframe: The dataframe to write.
+        styles: The index of the date and of the datetime cell formats.
+        header: Whether the column names are written as the first row.
+        chunksize: The number of rows generated per batch.
+
+    Yields:
+        bytes: The next piece of the worksheet XML.
+    """
+    letters = [get_column_letter(i) for i in range(1, len(dataframe.columns) + 1)]
+    rows = len(dataframe) + (1 if header else 0)
+    dimension = f"A1:{letters[-1]}{rows}" if letters and rows else "A1"
+    yield (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        f'<worksheet xmlns="{MAIN_NS}" xmlns:r="{REL_NS}">'
+        f'<dimension ref="{dimension}"/><sheetViews><sheetView workbookViewId="0"/></sheetViews>'
+        '<sheetFormatPr defaultRowHeight="15"/><sheetData>'
+    ).encode("utf-8")
+    yield from rows_xml(dataframe, styles, 1, header=header, chunksize=chunksize)
+    yield b'</sheetData><pageMargins left="0.75" right="0.75" top="1" bottom="1" header="0.5" footer="0.5"/></worksheet>'
+
+
+def _copy_member(source: zipfile.ZipFile, info: zipfile.ZipInfo, target: zipfile.ZipFile) -> None:
+    """Copy a member between archives without decompressing it."""
+    source.fp.seek(info.header_offset)
+    local_header = source.fp.read(zipfile.sizeFileHeader)
+    name_length, extra_length = int.from_bytes(local_header[26:28], "little"), int.from_bytes(local_header[28:30], "little")
+    source.fp.seek(name_length + extra_length, os.SEEK_CUR)
+    copy = zipfile.ZipInfo(info.filename, info.date_time)
+    copy.compress_type = info.compress_type
+    copy.external_attr = info.external_attr
+    copy.create_system = info.create_system
+    copy.flag_bits = info.flag_bits & ~0x08
+    copy.CRC = info.CRC
+    copy.compress_size = info.compress_size
+    copy.file_size = info.file_size
+    copy.header_offset = target.fp.tell()
+    target.fp.write(copy.FileHeader(zip64=info.file_size > zipfile.ZIP64_LIMIT or info.compress_size > zipfile.ZIP64_LIMIT))
+    remaining = info.compress_size
+    while remaining:
+        data = source.fp.read(min(remaining, 1 << 20))
+        if not data:
+            raise ArchiveError(f"Truncated member {info.filename}.")
+        target.fp.write(data)
+        remaining -= len(data)
+    target.filelist.append(copy)
+    target.NameToInfo[copy.filename] = copy
+    target.start_dir = target.fp.tell()
+    target._didModify = True
+
+
+def rewrite_archive(
+        workbook: str, replace: Dict[str, Iterable[bytes]], remove: Optional[set] = None) -> None:
+    """Rewrite an xlsx archive, replacing or removing some of its members.
+
+    Members that are not replaced are copied without being decompressed. The
+    new archive is written next to the workbook, flushed to disk and then moved
+    over it, so the workbook is never left partly written.
+
+    Args:
+        workbook: The path to the Excel workbook.
+        replace: The new content of members keyed by member name, as bytes or as
+            an iterable of bytes pieces.
+        remove: The names of the members to leave out.
+    """
+    remove = remove or set()
+    with atomic_path(workbook) as temp:
+        with zipfile.ZipFile(workbook) as source, zipfile.ZipFile(temp, "w", zipfile.ZIP_DEFLATED) as target:
+            for info in source.infolist():
+                if info.filename in remove:
+                    continue
+                if info.filename in replace:
+                    content = replace[info.filename]
+                    member_info = zipfile.ZipInfo(info.filename, info.date_time)
+                    member_info.compress_type = zipfile.ZIP_DEFLATED
+                    with target.open(member_info, "w", force_zip64=True) as member:
+                        if isinstance(content, bytes):
+                            member.write(content)
+                        else:
+                            for piece in content:
+                                member.write(piece)
+                else:
+                    _copy_member(source, info, target)
+
+
+def calc_chain_parts(zf: zipfile.ZipFile) -> dict:
+    """Return the replacements and removals that drop the calculation chain.
+
+    The calculation chain lists the formula cells of every sheet; Excel rebuilds
+    it when it is missing, so it is dropped whenever a sheet is rewritten.
+    """
+    part = workbook_part(zf)
+    chain = [rel["target"] for rel in relationships(zf, part).values() if rel["type"] == CALC_CHAIN_TYPE]
+    if not chain:
+        return {"replace": {}, "remove": set()}
+    rels_path = _rels_path(part)
+    rels = zf.read(rels_path).decode("utf-8")
+    rels = re.sub(r'<Relationship\b[^>]*?Type="' + re.escape(CALC_CHAIN_TYPE) + r'"[^>]*?/>', "", rels)
+    types = zf.read("[Content_Types].xml").decode("utf-8")
+    types = re.sub(r'<Override\b[^>]*?PartName="/' + re.escape(chain[0]) + r'"[^>]*?/>', "", types)
+    return {
+        "replace": {rels_path: rels.encode("utf-8"), "[Content_Types].xml": types.encode("utf-8")},
+        "remove": {chain[0]},
+    }
+
+
+_SHEETS = re.compile(r"(<(?:\w+:)?sheets\b[^>]*>)(.*?)(</(?:\w+:)?sheets>)", re.S)
+_SHEET = re.compile(r"<(?:\w+:)?sheet\b[^>]*?/>", re.S)
+_LOCAL_SHEET_ID = re.compile(r'(<(?:\w+:)?definedName\b[^>]*?\blocalSheetId=")(\d+)("[^>]*?(?:/>|>.*?</(?:\w+:)?definedName>))', re.S)
+_ACTIVE_TAB = re.compile(r'\bactiveTab="(\d+)"')
+_FIRST_SHEET = re.compile(r'\bfirstSheet="\d+"')
+_PROTECTION_ELEMENT = re.compile(rb"<(?:\w+:)?sheetProtection\b[^>]*?(?:/>|>.*?</(?:\w+:)?sheetProtection>)", re.S)
+_SHEET_DATA_END = re.compile(rb"</(?:\w+:)?sheetData>|<(?:\w+:)?sheetData\s*/>")
+
+
+def _attribute(element: str, name: str) -> Optional[str]:
+    """Return the unescaped value of an attribute of an XML element string."""
+    match = re.search(r'(?:^|\s)' + re.escape(name) + r'="([^"]*)"', element)
+    return html.unescape(match.group(1)) if match else None
+
+
+def _reindex_workbook(text: str, order: list) -> str:
+    """Reorder or drop the sheets of the workbook part.
+
+    Args:
+        text: The content of the workbook part.
+        order: The old index of the sheet for every new position; sheets left
+            out are dropped.
+
+    Returns:
+        str: The new content of the workbook part, with the sheet scoped defined
+            names and the active tab following the sheets, and the tab bar
+            scrolled back to the first sheet.
+    """
+    match = _SHEETS.search(text)
+    if match is None:
+        raise ArchiveError("Missing sheets in workbook part.")
+    elements = _SHEET.findall(match.group(2))
+    mapping = {old: new for new, old in enumerate(order)}
+    body = "".join(elements[old] for old in order)
+    text = text[:match.start()] + match.group(1) + body + match.group(3) + text[match.end():]
+
+    def defined_name(found):
+        new = mapping.get(int(found.group(2)))
+        return "" if new is None else f"{found.group(1)}{new}{found.group(3)}"
+
+    def active_tab(found):
+        old = int(found.group(1))
+        new = mapping.get(old, min(old, len(order) - 1))
+        return f'activeTab="{max(new, 0)}"'
+
+    text = _LOCAL_SHEET_ID.sub(defined_name, text)
+    text = _FIRST_SHEET.sub('firstSheet="0"', text)
+    return _ACTIVE_TAB.sub(active_tab, text)
+
+
+def _relationship_id(text: str, element: str) -> str:
+    """Return the relationship id of a sheet element, whatever the prefix of its namespace.
+
+    Raises:
+        ArchiveError: If the element has no relationship id.
+    """
+    for prefix in re.findall(r'\bxmlns:(\w+)="' + re.escape(REL_NS) + '"', text):
+        rel_id = _attribute(element, f"{prefix}:id")
+        if rel_id is not None:
+            return rel_id
+    raise ArchiveError(f"Missing relationship id in {element}.")
+
+
+def _sheet_elements(zf: zipfile.ZipFile) -> list:
+    """Return the sheet element strings of the workbook part, in workbook order."""
+    match = _SHEETS.search(zf.read(workbook_part(zf)).decode("utf-8"))
+    if match is None:
+        raise ArchiveError("Missing sheets in workbook part.")
+    return _SHEET.findall(match.group(2))
+
+
+def move_sheet_first(workbook: str, sheet: str) -> None:
+    """Move a sheet to the first position by rewriting only the workbook part.
+
+    Args:
+        workbook: The path to the Excel workbook.
+        sheet: The name of the sheet to move.
+
+    Raises:
+        ValueError: If the sheet does not exist in the workbook.
+    """
+    with zipfile.ZipFile(workbook) as zf:
+        names = [_attribute(element, "name") for element in _sheet_elements(zf)]
+        if sheet not in names:
+            raise ValueError(f"{sheet} not present in {workbook}.")
+        index = names.index(sheet)
+        part = workbook_part(zf)
+        text = zf.read(part).decode("utf-8")
+    order = [index] + [i for i in range(len(names)) if i != index]
+    rewrite_archive(workbook, {part: _reindex_workbook(text, order).encode("utf-8")})
+
+
+def delete_sheet(workbook: str, sheet: str) -> None:
+    """Delete a sheet by rewriting the workbook part, its relationships and the content types.
+
+    The worksheet part and its relationships are removed and the calculation
+    chain is dropped. Every other member is copied unchanged.
+
+    Args:
+        workbook: The path to the Excel workbook.
+        sheet: The name of the sheet to delete.
+
+    Raises:
+        ValueError: If the sheet does not exist in the workbook, or is its last
+            visible sheet.
+        ArchiveError: If the worksheet part of the sheet cannot be resolved.
+    """
+    with zipfile.ZipFile(workbook) as zf:
+        elements = _sheet_elements(zf)
+        names = [_attribute(element, "name") for element in elements]
+        if sheet not in names:
+            raise ValueError(f"{sheet} not present in {workbook}.")
+        index = names.index(sheet)
+        if not any(_attribute(element, "state") in (None, "visible")
+                   for i, element in enumerate(elements) if i != index):
+            raise ValueError(f"{sheet} is the last visible sheet of {workbook} and cannot be deleted.")
+        part = workbook_part(zf)
+        text = zf.read(part).decode("utf-8")
+        rel_id = _relationship_id(text, elements[index])
+        rel = relationships(zf, part).get(rel_id)
+        if rel is None:
+            raise ArchiveError(f"Missing relationship {rel_id} in {part}.")
+        target = rel["target"]
+        chain = calc_chain_parts(zf)
+        rels_path = _rels_path(part)
+        rels = chain["replace"].get(rels_path) or zf.read(rels_path)
+        types = chain["replace"].get("[Content_Types].xml") or zf.read("[Content_Types].xml")
+    rels = re.sub(
+        r'<Relationship\b[^>]*?\bId="' + re.escape(rel_id) + r'"[^>]*?/>', "", rels.decode("utf-8"))
+    types = re.sub(
+        r'<Override\b[^>]*?PartName="/' + re.escape(target) + r'"[^>]*?/>', "", types.decode("utf-8"))
+    order = [i for i in range(len(names)) if i != index]
+    replace = {
+        part: _reindex_workbook(text, order).encode("utf-8"),
+        rels_path: rels.encode("utf-8"),
+        "[Content_Types].xml": types.encode("utf-8"),
+    }
+    rewrite_archive(workbook, replace, chain["remove"] | {target, _rels_path(target)})
+
+
+def _protected_sheet(workbook: str, part: str, enable: bool, password: Optional[str]) -> Iterator[bytes]:
+    """Stream a worksheet part with its protection element replaced.
+
+    The cell data is passed through in blocks; only the end of the part, after
+    the cell data, is held in memory and edited.
+    """
+    with zipfile.ZipFile(workbook) as zf, zf.open(part) as member:
+        buffer = b""
+        while True:
+            data = member.read(1 << 20)
+            buffer += data
+            match = _SHEET_DATA_END.search(buffer)
+            if match or not data:
+                break
+            yield buffer[:-64]
+            buffer = buffer[-64:]
+        if match is None:
+            raise ArchiveError(f"Missing cell data in {part}.")
+        yield buffer[:match.end()]
+        tail = buffer[match.end():] + member.read()
+    prefix = (re.match(rb"</?(\w+:)?", match.group(0)).group(1) or b"").decode("utf-8")
+    yield _protect_tail(tail, prefix, enable, password)
+
+
+def _protect_tail(tail: bytes, prefix: str, enable: bool, password: Optional[str]) -> bytes:
+    """Replace the protection element in the part of a worksheet following its cell data."""
+    existing = _PROTECTION_ELEMENT.search(tail)
+    attributes = ""
+    if existing:
+        attributes = _PROTECTION.match(existing.group(0)).group(1).decode("utf-8").rstrip("/")
+        tail = tail[:existing.start()] + tail[existing.end():]
+    if enable:
+        attributes = re.sub(r'\s*\bsheet="[^"]*"', "", attributes)
+        if password:
+            attributes = re.sub(r'\s*\b(password|algorithmName|hashValue|saltValue|spinCount)="[^"]*"', "", attributes)
+            attributes += f' password="{hash_password(password)}"'
+        attributes = f" {attributes.strip()}" if attributes.strip() else ""
+        element = f'<{prefix}sheetProtection sheet="1"{attributes}/>'.encode("utf-8")
+        calc = re.match(rb"\s*<(?:\w+:)?sheetCalcPr\b[^>]*?/>", tail)
+        at = calc.end() if calc else 0
+        tail = tail[:at] + element + tail[at:]
+    return tail
+
+
+def set_sheet_protection(workbook: str, sheet: str, enable: bool, password: Optional[str] = None) -> None:
+    """Enable or disable the protection of a sheet by rewriting only its worksheet part.
+
+    Args:
+        workbook: The path to the Excel workbook.
+        sheet: The name of the sheet.
+        enable: Whether the protection is enabled or removed.
+        password: The password of the protection; an existing password is kept when None.
+
+    Raises:
+        ValueError: If the sheet does not exist in the workbook.
+    """
+    with zipfile.ZipFile(workbook) as zf:
+        parts = sheet_parts(zf)
+    if sheet not in parts:
+        raise ValueError(f"{sheet} not present in {workbook}.")
+    rewrite_archive(workbook, {parts[sheet]: _protected_sheet(workbook, parts[sheet], enable, password)})
+
+
+_ROW_NUMBER = re.compile(rb'<(?:\w+:)?row\b[^>]*?\br="(\d+)"')
+_ROW = re.compile(rb"<(?:\w+:)?row\b")
+
+
+def _cell_position(ref: str) -> tuple:
+    """Return the column and row numbers of the last cell of a range reference."""
+    match = re.match(r"\$?([A-Z]+)\$?(\d+)$", ref.split(":")[-1])
+    if match is None:
+        raise ArchiveError(f"Invalid dimension {ref}.")
+    return column_index_from_string(match.group(1)), int(match.group(2))
+
+
+def _appended_sheet(
+        workbook: str, part: str, dataframe: pd.DataFrame, styles: tuple,
+        password: Optional[str], chunksize: int) -> Iterator[bytes]:
+    """Stream a worksheet part with rows added at the end of its cell data.
+
+    The first new row is planned from the dimension of the sheet and checked
+    against the last row element met while the cell data is passed through; the
+    rewrite is abandoned if they disagree.
+    """
+    with zipfile.ZipFile(workbook) as zf, zf.open(part) as member:
+        buffer = member.read(1 << 20)
+        while not _SHEET_DATA.search(buffer):
+            data = member.read(1 << 20)
+            if not data:
+                raise ArchiveError(f"Missing cell data in {part}.")
+            buffer += data
+        start = _SHEET_DATA.search(buffer).start()
+        if re.match(rb"<\w+:", buffer[start:start + 2 + 16]):
+            raise ArchiveError(f"Prefixed elements in {part}.")
+        dimension = _DIMENSION.search(buffer, 0, start)
+        if dimension is None:
+            raise ArchiveError(f"Missing dimension in {part}.")
+        columns, last_row = _cell_position(dimension.group(1).decode("utf-8"))
+        first_row = max(last_row, 1) + 1
+        last = first_row - 1 + len(dataframe)
+        ref = f"A1:{get_column_letter(max(columns, len(dataframe.columns), 1))}{last}".encode("utf-8")
+        buffer = buffer[:dimension.start(1)] + ref + buffer[dimension.end(1):]
+        seen = 0
+        while True:
+            match = _SHEET_DATA_END.search(buffer)
+            rows = _ROW_NUMBER.findall(buffer, 0, match.start() if match else len(buffer))
+            if rows:
+                seen = int(rows[-1])
+            elif _ROW.search(buffer, 0, match.start() if match else len(buffer)):
+                raise ArchiveError(f"Rows without numbers in {part}.")
+            if match:
+                break
+            data = member.read(1 << 20)
+            if not data:
+                raise ArchiveError(f"Missing cell data in {part}.")
+            yield buffer[:-256]
+            buffer = buffer[-256:] + data
+        if max(seen, 1) != max(last_row, 1):
+            raise ArchiveError(f"Dimension of {part} does not match its rows.")
+        tail = buffer[match.end():] + member.read()
+    if match.group(0).endswith(b"/>"):
+        yield buffer[:match.start()] + b"<sheetData>"
+    else:
+        yield buffer[:match.start()]
+    yield from rows_xml(dataframe, styles, first_row, chunksize=chunksize)
+    yield b"</sheetData>"
+    yield _protect_tail(tail, "", True, password) if password else tail
+
+
+def append_rows(
+        workbook: str, sheet: str, dataframe: pd.DataFrame, password: Optional[str] = None,
+        chunksize: int = 10000) -> None:
+    """Append a dataframe to a worksheet by streaming only the new rows into its part.
+
+    The existing cell data is passed through without being parsed, the new rows
+    are generated from the column arrays of the dataframe, and the protection of
+    the sheet is set in the same pass when a password is given.
+
+    Args:
+        workbook: The path to the Excel workbook.
+        sheet: The name of an existing sheet.
+        dataframe: The rows to append, without header.
+        password: The password protecting the sheet once the rows are appended.
+        chunksize: The number of rows generated per batch.
+
+    Raises:
+        ValueError: If the sheet does not exist in the workbook.
+    """
+    with zipfile.ZipFile(workbook) as zf:
+        parts = sheet_parts(zf)
+        if sheet not in parts:
+            raise ValueError(f"{sheet} not present in {workbook}.")
+        styles_part, styles, date_style, datetime_style = _date_styles(zf)
+    replace = {
+        styles_part: styles,
+        parts[sheet]: _appended_sheet(
+            workbook, parts[sheet], dataframe, (date_style, datetime_style), password, chunksize),
+    }
+    rewrite_archive(workbook, replace)
+
+
+def _date_styles(zf: zipfile.ZipFile) -> tuple:
+    """Return the styles part, its content with date formats added, and their indexes."""
+    styles_part = [
+        rel["target"] for rel in relationships(zf, workbook_part(zf)).values()
+        if rel["type"].endswith("/styles")
+    ]
+    if not styles_part:
+        raise ArchiveError("Missing styles part.")
+    return (styles_part[0],) + add_date_styles(zf.read(styles_part[0]))
+
+
+def write_sheet(workbook: str, sheet: str, dataframe: pd.DataFrame, chunksize: int = 10000) -> None:
+    """Replace the content of a worksheet with a dataframe, streaming its XML.
+
+    Args:
+        workbook: The path to the Excel workbook.
+        sheet: The name of an existing sheet.
+        dataframe: The new content of the sheet.
+        chunksize: The number of rows generated per batch.
+
+    Raises:
+        ValueError: If the sheet does not exist in the workbook.
+    """
+    with zipfile.ZipFile(workbook) as zf:
+        parts = sheet_parts(zf)
+        if sheet not in parts:
+            raise ValueError(f"{sheet} not present in {workbook}.")
+        styles_part, styles, date_style, datetime_style = _date_styles(zf)
+        chain = calc_chain_parts(zf)
+    replace = dict(chain["replace"])
+    replace[styles_part] = styles
+    replace[parts[sheet]] = sheet_xml(dataframe, (date_style, datetime_style), chunksize=chunksize)
+    rewrite_archive(workbook, replace, chain["remove"])
@@ -10,6 +10,40 @@ Examples:
     >>> sheet = "Sheet1"
     >>> dataframe = excel_manager.get_dataframe(workbook, sheet)
 
+    >>> # read only two columns of the first 1000 rows, keeping positive amounts.
+    >>> dataframe = excel_manager.get_dataframe(
+    ...     workbook, sheet, columns=["date", "amount"], row_range=(0, 1000),
+    ...     dtypes={"amount": "float64"}, predicate=lambda df: df["amount"] > 0)
+
+    >>> # read the values only, skipping styles, on heavily formatted workbooks.
+    >>> dataframe = excel_manager.get_dataframe(workbook, sheet, engine="values")
+
+    >>> # keep up to 256 MB of dataframes for repeated reads.
+    >>> excel_manager = ExcelManager(log_file='abc.log', cache_size=256 * 1024 ** 2)
+    >>> dataframe = excel_manager.get_dataframe(workbook, sheet)
+    >>> excel_manager.cache_info()
+
+    >>> # share parsed sheets between processes through a cache directory.
+    >>> excel_manager = ExcelManager(log_file='abc.log', cache_dir='.excel_cache')
+
+    >>> workbook = "test.xlsx"
+    >>> sheet = "Sheet1"
+    >>> for chunk in excel_manager.iter_dataframes(workbook, sheet, chunksize=50000):
+    ...     print(chunk.shape)
+
+    >>> workbook = "test.xlsx"
+    >>> dataframes = excel_manager.get_dataframes(workbook, ["Sheet1", "Sheet2"])
+
+    >>> for sheet_info in excel_manager.inspect_workbook("test.xlsx"):
+    ...     print(sheet_info["name"], sheet_info["rows"], sheet_info["protected"])
+
+    >>> paths = ["january.xlsx", "february.xlsx"]
+    >>> dataframe = excel_manager.read_many(paths, "Sheet1", max_workers=4, concat=True)
+
+    >>> # stream a sheet into a Parquet file, 50000 rows per row group.
+    >>> rows = excel_manager.export_sheet("test.xlsx", "Sheet1", "sheet1.parquet", chunksize=50000)
+    >>> exported = excel_manager.export_directory("reports", "exports", format="csv", max_workers=4)
+
     >>> workbook = "test.xlsx"
     >>> sheet = "Sheet1"
     >>> excel_manager.delete_sheet(workbook, sheet)
@@ -24,6 +58,15 @@ Examples:
     >>> dataframe = pd.DataFrame({"a": [1, 2, 3], "b": [4, 5, 6]})
     >>> excel_manager.overwrite_sheet(workbook, sheet, dataframe)
 
+    >>> # stream the rows of a large dataframe straight into the sheet.
+    >>> excel_manager.overwrite_sheet(workbook, sheet, dataframe, streaming=True)
+
+    >>> # skip overwrites with the data already in the sheet.
+    >>> excel_manager = ExcelManager(log_file='abc.log', track_fingerprints=True)
+    >>> excel_manager.overwrite_sheet(workbook, sheet, dataframe)
+    >>> excel_manager.sheet_changed(workbook, sheet, dataframe)
+    False
+
     >>> workbook = "test.xlsx"
     >>> sheet = "Sheet1"
     >>> excel_manager.reposition_sheet(workbook, sheet)
@@ -34,6 +77,13 @@ Examples:
     >>> dataframe = pd.DataFrame({"a": [1, 2, 3], "b": [4, 5, 6]})
     >>> excel_manager.append_dataframe(workbook, sheet, dataframe)
 
+    >>> # write only the rows whose values changed, matched on column "a".
+    >>> counts = excel_manager.upsert_dataframe(workbook, sheet, dataframe, key_columns=["a"])
+
+    >>> # appends from many threads, written with one load and one save.
+    >>> futures = [excel_manager.queue_append(workbook, sheet, dataframe) for _ in range(10)]
+    >>> excel_manager.flush(workbook)
+
     >>> # to set the protection, 'abc' is password.
     >>> workbook = "test.xlsx"
     >>> sheet = "Sheet1"
@@ -44,43 +94,619 @@ Examples:
     >>> sheet = "Sheet1"
     >>> excel_manager.modify_sheet_protection(workbook, sheet, False)
 
+    >>> # build a report in memory, without writing it to disk.
+    >>> import io
+    >>> report = io.BytesIO()
+    >>> excel_manager.overwrite_sheet(report, "Sheet1", dataframe)
+    >>> dataframe = excel_manager.get_dataframe(report.getvalue(), "Sheet1")
+
+    >>> # several operations with a single load and a single save.
+    >>> with excel_manager.session("test.xlsx"):
+    ...     excel_manager.overwrite_sheet("test.xlsx", "Sheet1", dataframe)
+    ...     excel_manager.reposition_sheet("test.xlsx", "Sheet1")
+    ...     excel_manager.modify_sheet_protection("test.xlsx", "Sheet1", True, 'abc')
+
+    >>> # load and save times, bytes and rows are recorded in the metrics registry.
+    >>> from log_manager.metrics import registry
+    >>> registry.snapshot()["histograms"]['excel_load_seconds{operation="session"}']["p95"]
+
 The module contains the following functions:
 
-- `__init__(log_file)` - creates the instance of the class.
-- `get_dataframe(workbook, sheet)` - returns the dataframe from excel workbook.
+- `__init__(log_file, cache_size, cache_dir, cache_dir_size, track_fingerprints, date_type)` - creates the instance of the class.
+- `cache_info()` - returns the counters of the read cache.
+- `get_dataframe(workbook, sheet, columns, row_range, dtypes, predicate, engine)` - returns the dataframe from excel workbook.
+- `iter_dataframes(workbook, sheet, chunksize, columns, row_range, dtypes, predicate, engine)` - yields the sheet as dataframes of fixed size.
+- `get_dataframes(workbook, sheets, max_workers)` - returns several sheets from one open of the workbook.
+- `iter_many(paths, sheet, max_workers, ordered)` - yields the sheet of many workbooks read in parallel.
+- `read_many(paths, sheet, max_workers, concat)` - returns the sheet of many workbooks read in parallel.
+- `inspect_workbook(workbook, protection)` - returns the sheets of the workbook without loading their cells.
+- `export_sheet(workbook, sheet, target, format, chunksize)` - streams the sheet into a CSV, Parquet or Feather file.
+- `export_directory(directory, target_directory, format, max_workers)` - exports every sheet of many workbooks in parallel.
 - `delete_sheet(workbook, sheet)` - deletes the sheet from excel workbook.
 - `create_sheet(workbook, sheet)` - creates a new sheet in excel workbook.
-- `overwrite_sheet(workbook, sheet, dataframe)` - overwrites the content of the sheet.
+- `overwrite_sheet(workbook, sheet, dataframe, streaming)` - overwrites the content of the sheet.
+- `sheet_changed(workbook, sheet, dataframe)` - tells whether the dataframe differs from the sheet, without reading it.
 - `reposition_sheet(workbook, sheet)` - reposition the sheet in excel workbook.
 - `append_dataframe(workbook, sheet, dataframe)` - append the dataframe to the content in excel sheet.
+- `upsert_dataframe(workbook, sheet, dataframe, key_columns, delete_missing)` - updates, appends and deletes the rows that changed.
+- `queue_append(workbook, sheet, dataframe)` - queues an append, merged with the other pending appends.
+- `flush(workbook)` - waits until the queued appends are written.
 - `modify_sheet_protection(workbook, sheet, True, 'abc')` - adds or removes the protection from sheet in excel workbook.
+- `session(workbook)` - keeps the workbook loaded for several operations and saves it once.
 
 """
 
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
 from pathlib import Path
+from typing import BinaryIO, Callable, Iterable, Iterator, Optional, Union
+import datetime
+import io
+import math
+import numbers
+import numpy as np
+import os
+import threading
+import zipfile
 import pandas as pd
 import openpyxl
 from date_manager import DateManager
-from log_manager import LogManager
-import inspect
+from log_manager import LogManager, traced
+from log_manager.metrics import registry
+from excel_manager import _export, _fingerprint, _reader, _xlsx
+from excel_manager._cache import ReadCache, SidecarCache
+from excel_manager._locking import atomic_path, workbook_lock
+from excel_manager._writer import WriterQueue
+
+
+Workbook = Union[str, os.PathLike, bytes, BinaryIO]
+
+
+def _in_memory(workbook: Workbook) -> bool:
+    """Tell whether a workbook is given as bytes or a file-like object rather than a path."""
+    return not isinstance(workbook, (str, os.PathLike))
+
+
+def _exists(workbook: Workbook) -> bool:
+    """Tell whether a path is a file, or a buffer is not empty."""
+    if not _in_memory(workbook):
+        return Path(workbook).is_file()
+    if isinstance(workbook, (bytes, bytearray, memoryview)):
+        return len(workbook) > 0
+    return workbook.seek(0, io.SEEK_END) > 0
+
+
+def _size(workbook: Workbook) -> int:
+    """Return the size in bytes of a workbook file or buffer, 0 if it does not exist."""
+    if isinstance(workbook, (bytes, bytearray, memoryview)):
+        return len(workbook)
+    if _in_memory(workbook):
+        return workbook.seek(0, io.SEEK_END)
+    try:
+        return os.path.getsize(workbook)
+    except OSError:
+        return 0
+
+
+def _source(workbook: Workbook):
+    """Return the workbook in a form openpyxl, zipfile and pandas read, buffers rewound."""
+    if isinstance(workbook, (bytes, bytearray, memoryview)):
+        return io.BytesIO(workbook)
+    if _in_memory(workbook):
+        workbook.seek(0)
+    return workbook
+
+
+@contextmanager
+def _lock(workbook: Workbook) -> Iterator[None]:
+    """Hold the lock of a workbook file, buffers are not locked."""
+    if _in_memory(workbook):
+        yield
+    else:
+        with workbook_lock(workbook):
+            yield
+
+
+def _excel_value(value):
+    """Return the value to store in a cell, empty for missing values."""
+    if value is None or value is pd.NA or value is pd.NaT:
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def _comparable(value) -> str:
+    """Return a value as the text compared by `upsert_dataframe`.
+
+    Numbers, dates and missing values are written to and read back from cells
+    with other types than they had in the dataframe (an int read back as a
+    float, a date as a datetime), so they are reduced to one spelling per value.
+    """
+    value = _excel_value(value)
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return f"b:{value}"
+    if isinstance(value, numbers.Number):
+        return f"n:{float(value)!r}"
+    if isinstance(value, (datetime.date, datetime.time)):
+        return f"d:{value.isoformat() if isinstance(value, datetime.time) else pd.Timestamp(value).isoformat()}"
+    return f"s:{value}"
+
+
+def _normalized(column: pd.Series) -> np.ndarray:
+    """Return a column as one array type per kind of value, compared by `upsert_dataframe`.
+
+    Numbers become float64 and dates int64 nanoseconds, as cells give them back
+    with other types than they had in the dataframe (an int read back as a
+    float, a date as a datetime). Booleans and text become strings, with missing
+    values empty. Only columns mixing kinds of values fall back to `_comparable`
+    per cell.
+    """
+    kind = pd.api.types.infer_dtype(column, skipna=True)
+    missing = column.isna().to_numpy()
+    if kind in ("integer", "floating", "mixed-integer-float", "decimal"):
+        return pd.to_numeric(column, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    if kind in ("datetime", "datetime64", "date"):
+        values = pd.to_datetime(column)
+        if isinstance(values.dtype, pd.DatetimeTZDtype):
+            values = values.dt.tz_localize(None)
+        return values.astype("datetime64[ns]").to_numpy().view("int64")
+    if kind == "empty":
+        return np.full(len(column), "", dtype=object)
+    if kind.startswith("mixed"):
+        return column.astype(object).map(_comparable).to_numpy()
+    values = column.to_numpy(dtype=object)
+    if kind != "string":
+        text = column.astype(object).where(~missing, "").astype(str).to_numpy(dtype=object)
+        values = "b:" + text if kind == "boolean" else text
+    return np.where(missing, "", values) if missing.any() else values
+
+
+def _row_hashes(dataframe: pd.DataFrame) -> pd.Series:
+    """Hash the rows of a dataframe on their values, ignoring the index."""
+    if dataframe.empty:
+        return pd.Series([], dtype="uint64")
+    normalized = pd.DataFrame(
+        {position: _normalized(column) for position, (_, column) in enumerate(dataframe.items())})
+    return pd.util.hash_pandas_object(normalized, index=False).reset_index(drop=True)
+
+
+def _header(row: tuple) -> list:
+    """Return the column names for a header row, named like `pd.read_excel` does."""
+    header = []
+    seen = {}
+    for i, value in enumerate(row):
+        name = f"Unnamed: {i}" if value is None else value
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        header.append(name)
+    return header
+
+
+def _chunk_rows(rows: Iterable[tuple], width: int, chunksize: int) -> Iterator[list]:
+    """Group rows into lists of `chunksize` rows padded to `width` values.
+
+    Empty rows are only counted until a non-empty row follows them, so trailing
+    empty rows of the sheet are dropped like `pd.read_excel` does, and a sheet
+    formatted far below its data is read in bounded memory.
+    """
+    empty = (None,) * width
+    chunk = []
+    pending = 0
+    for row in rows:
+        row = tuple(row[:width]) + (None,) * (width - len(row))
+        if row == empty:
+            pending += 1
+            continue
+        while pending:
+            taken = min(pending, chunksize - len(chunk)) if chunksize else pending
+            chunk.extend([empty] * taken)
+            pending -= taken
+            if len(chunk) == chunksize:
+                yield chunk
+                chunk = []
+        chunk.append(row)
+        if len(chunk) == chunksize:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _iter_worksheet(
+        worksheet, chunksize: int, columns: list = None, row_range: tuple = None) -> Iterator[pd.DataFrame]:
+    """Yield the rows of a read-only worksheet as dataframes of `chunksize` rows.
+
+    Only the block of cells spanning the requested columns and rows is read from
+    the worksheet, and only the requested columns are kept. A sheet without data
+    rows yields a single empty dataframe with its header.
+
+    Args:
+        worksheet: The openpyxl read-only worksheet.
+        chunksize: The number of rows of each dataframe, all the rows if 0.
+        columns: The names of the columns to keep, all the columns if None.
+        row_range: The first and the last (excluded) data rows to read, counted
+            from 0 after the header row. Either may be None.
+
+    Raises:
+        ValueError: If a requested column is not in the header of the sheet.
+    """
+    header = _header(next(worksheet.iter_rows(min_row=1, max_row=1, values_only=True), ()))
+    if columns is None:
+        positions = list(range(len(header)))
+    else:
+        missing = [column for column in columns if column not in header]
+        if missing:
+            raise ValueError(f"Columns {missing} not present in the sheet.")
+        positions = [header.index(column) for column in columns]
+    start, stop = row_range or (None, None)
+    min_col = min(positions) + 1 if positions else 1
+    max_col = max(positions) + 1 if positions else 1
+    rows = worksheet.iter_rows(
+        min_row=2 + (start or 0), max_row=None if stop is None else stop + 1,
+        min_col=min_col, max_col=max_col, values_only=True,
+    )
+    names = [header[position] for position in positions]
+    offsets = [position + 1 - min_col for position in positions]
+    if columns is not None:
+        rows = (tuple(row[offset] if offset < len(row) else None for offset in offsets) for row in rows)
+    empty = True
+    for chunk in _chunk_rows(rows, len(names), chunksize):
+        empty = False
+        yield pd.DataFrame(chunk, columns=names)
+    if empty:
+        yield pd.DataFrame(columns=names)
+
+
+ENGINES = ("openpyxl", "values")
+
+
+def _read_options(
+        columns: list = None, row_range: tuple = None, dtypes: dict = None, engine: str = "openpyxl") -> tuple:
+    """Return the read options as a hashable tuple, empty when none is set.
+
+    Raises:
+        ValueError: If the engine is not supported.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Read engine '{engine}' not supported, use one of {list(ENGINES)}.")
+    if columns is None and row_range is None and dtypes is None and engine == "openpyxl":
+        return ()
+    dtypes = tuple(sorted((str(column), str(dtype)) for column, dtype in (dtypes or {}).items()))
+    return tuple(columns) if columns is not None else None, tuple(row_range) if row_range else None, dtypes, engine
+
+
+def _open_workbook(workbook: Workbook, engine: str = "openpyxl"):
+    """Open a workbook for streaming its rows with the given read engine."""
+    if engine == "values":
+        return _reader.ValuesWorkbook(_source(workbook))
+    return openpyxl.load_workbook(_source(workbook), read_only=True, data_only=True)
+
+
+def _read_sheets(workbook: Workbook, sheets: list) -> dict:
+    """Read whole sheets from one read-only open of a workbook.
+
+    The shared strings and styles are parsed once, when the workbook is opened,
+    and reused for every sheet. Being a module function, it can run in worker
+    processes.
+    """
+    wb = openpyxl.load_workbook(_source(workbook), read_only=True, data_only=True)
+    try:
+        return {sheet: next(_iter_worksheet(wb[sheet], chunksize=0)) for sheet in sheets}
+    finally:
+        wb.close()
+
+
+_worker_dates = None
+
+
+def _init_worker(log_file: str, date_type: str = "object") -> None:
+    """Create the DateManager used by a worker process of `read_many`."""
+    global _worker_dates
+    _worker_dates = DateManager(log_file=log_file, date_type=date_type)
+
+
+def _read_workbook(workbook: str, sheet: str) -> pd.DataFrame:
+    """Read a sheet in a worker process, converting its datetime columns to dates."""
+    if not Path(workbook).is_file():
+        raise FileNotFoundError(f"File '{workbook}' not found")
+    dataframe = pd.read_excel(workbook, sheet_name=sheet)
+    return _worker_dates.timestamp_to_date(dataframe)
+
+
+def _export_workbook(workbook: str, directory: str, format: str, chunksize: int) -> dict:
+    """Export every sheet of a workbook in a worker process, from one read-only open.
+
+    Each sheet is written to `<workbook stem>.<sheet><suffix>` in `directory`.
+
+    Returns:
+        dict: The number of rows written, keyed by sheet name.
+    """
+    if not Path(workbook).is_file():
+        raise FileNotFoundError(f"File '{workbook}' not found")
+    wb = openpyxl.load_workbook(workbook, read_only=True, data_only=True)
+    try:
+        rows = {}
+        for sheet in wb.sheetnames:
+            target = Path(directory) / f"{Path(workbook).stem}.{sheet}{_export.FORMATS[format]}"
+            chunks = (_worker_dates.timestamp_to_date(df) for df in _iter_worksheet(wb[sheet], chunksize))
+            rows[sheet] = _export.write_chunks(chunks, str(target), format)
+        return rows
+    finally:
+        wb.close()
+
+
+def _write_dataframe(worksheet, dataframe: pd.DataFrame, startrow: int, header: bool) -> None:
+    """Write a dataframe into an openpyxl worksheet like `DataFrame.to_excel(index=False)`.
+
+    Args:
+        worksheet: The openpyxl worksheet to write to.
+        dataframe: The dataframe to write.
+        startrow: Zero based row of the worksheet where writing starts.
+        header: Whether the column names are written as the first row.
+    """
+    row = startrow + 1
+    if header:
+        for col, name in enumerate(dataframe.columns, start=1):
+            worksheet.cell(row=row, column=col, value=name)
+        row += 1
+    for values in dataframe.itertuples(index=False, name=None):
+        for col, value in enumerate(values, start=1):
+            worksheet.cell(row=row, column=col, value=_excel_value(value))
+        row += 1
 
 
 class ExcelManager:
-    def __init__(self, log_file: str = './Custom-Python_Tools.log') -> None:
+    def __init__(
+            self, log_file: str = './Custom-Python_Tools.log', cache_size: int = 0,
+            cache_dir: str = None, cache_dir_size: int = 1024 ** 3, track_fingerprints: bool = False,
+            date_type: str = "object") -> None:
         """
         Args:
             log_file: The path to the log file.
+            cache_size: The memory, in bytes, of the dataframes kept by `get_dataframe`
+                for later reads of the same workbook. No dataframe is kept with 0.
+            cache_dir: The directory where `get_dataframe` stores parsed sheets for
+                later reads, including from other processes, in Feather format.
+                pyarrow is needed, installed with the `cache` extra. Disabled when
+                None.
+            cache_dir_size: The maximum size, in bytes, of the files in `cache_dir`.
+            track_fingerprints: Whether `overwrite_sheet` stores a fingerprint of the
+                written dataframe next to the workbook and skips overwrites with the
+                same content.
+            date_type: The type the datetime columns of the read sheets are converted
+                to: `object` for Python dates, `datetime64` for datetimes at
+                midnight, or `date32` for Arrow dates, which need the `dates` extra.
+
+        Raises:
+            ImportError: If `cache_dir` is given and pyarrow is not installed.
         """
         self.log = LogManager(log_name='ExcelManager', log_file=log_file)
-        self.obj_date = DateManager(log_file=log_file)
+        self.obj_date = DateManager(log_file=log_file, date_type=date_type)
+        self._local = threading.local()
+        self._queues = {}
+        self._queues_lock = threading.Lock()
+        self.cache = ReadCache(cache_size) if cache_size else None
+        self.sidecar = SidecarCache(cache_dir, cache_dir_size) if cache_dir else None
+        self.track_fingerprints = track_fingerprints
         self.log.info("ExcelManager Initialized.")
 
-    def get_dataframe(self, workbook: str, sheet: str) -> pd.DataFrame:
+    def cache_info(self) -> dict:
+        """Return the hit, miss and eviction counters of the read cache.
+
+        Returns:
+            dict: The counters of the read cache, empty if the cache is disabled.
+        """
+        return self.cache.info() if self.cache else {}
+
+    def _invalidate(self, workbook: Workbook) -> None:
+        """Drop the cached reads of a workbook after it has been written."""
+        if _in_memory(workbook):
+            return
+        if self.cache:
+            self.cache.invalidate(workbook)
+        if self.track_fingerprints:
+            _fingerprint.discard(workbook)
+
+    @property
+    def _sessions(self) -> dict:
+        """Return the sessions opened by the current thread, keyed by workbook."""
+        return self._local.__dict__.setdefault("sessions", {})
+
+    @staticmethod
+    def _session_key(workbook: Workbook) -> str:
+        """Return the key identifying a workbook across sessions."""
+        if _in_memory(workbook):
+            return f"<buffer {id(workbook)}>"
+        return str(Path(workbook).resolve())
+
+    @contextmanager
+    def session(self, workbook: Workbook) -> Iterator[openpyxl.Workbook]:
+        """Keep a workbook loaded while several operations run against it.
+
+        Every write method called with the same workbook inside the block works on
+        the in-memory workbook, and the file is saved once when the block exits.
+        If the block raises or any of the operations fails, nothing is saved and
+        the file keeps its previous content.
+
+        The workbook is locked from the load to the save with an advisory lock
+        shared by every ExcelManager writer, in any thread or process, and the
+        file is replaced atomically. Sessions belong to the thread opening them.
+
+        A workbook given as a writable buffer, such as `io.BytesIO`, is loaded
+        from it and saved back into it, replacing its content; an empty buffer
+        starts a new workbook without sheets. Buffers are not locked.
+
+        Args:
+            workbook: The path to the Excel workbook, or a buffer holding it.
+
+        Yields:
+            openpyxl.Workbook: The loaded workbook.
+
+        Raises:
+            FileNotFoundError: If the specified workbook cannot be found.
+            TypeError: If the workbook is given as bytes, which cannot be written back.
+        """
+        key = self._session_key(workbook)
+        if key in self._sessions:
+            yield self._sessions[key]["workbook"]
+            return
+        if isinstance(workbook, (bytes, bytearray, memoryview)):
+            raise TypeError("Workbooks given as bytes cannot be written, pass an io.BytesIO instead.")
+        if not _in_memory(workbook) and not _exists(workbook):
+            raise FileNotFoundError(f"File '{workbook}' not found.")
+        with _lock(workbook):
+            if _exists(workbook):
+                registry.increment("excel_bytes_read_total", _size(workbook))
+                with registry.timer("excel_load_seconds", operation="session"):
+                    wb = openpyxl.load_workbook(_source(workbook))
+            else:
+                wb = openpyxl.Workbook()
+                wb.remove(wb.active)
+            self._sessions[key] = {"workbook": wb, "failed": False}
+            self.log.info("Session opened for %s.", workbook)
+            try:
+                yield wb
+                if self._sessions[key]["failed"]:
+                    self.log.error(f"Session for {workbook} rolled back, an operation failed.")
+                elif _in_memory(workbook):
+                    with registry.timer("excel_save_seconds", operation="session"):
+                        workbook.seek(0)
+                        workbook.truncate()
+                        wb.save(workbook)
+                    registry.increment("excel_bytes_written_total", _size(workbook))
+                else:
+                    with registry.timer("excel_save_seconds", operation="session"):
+                        with atomic_path(workbook) as temp:
+                            wb.save(temp)
+                    registry.increment("excel_bytes_written_total", _size(workbook))
+                    self._invalidate(workbook)
+                    self.log.info("Session for %s saved.", workbook)
+            except Exception:
+                self.log.error(f"Session for {workbook} rolled back.")
+                raise
+            finally:
+                del self._sessions[key]
+                wb.close()
+
+    def _check_sheet(self, workbook: Workbook, sheet: str) -> None:
+        """Fail fast when a sheet is missing, reading only the workbook part of the archive.
+
+        Inside a session the in-memory workbook is checked by the caller instead.
+
+        Raises:
+            FileNotFoundError: If the specified workbook cannot be found.
+            ValueError: If the specified sheet does not exist in the workbook.
+        """
+        if self._session_key(workbook) in self._sessions:
+            return
+        if not _exists(workbook):
+            raise FileNotFoundError(f"File '{workbook}' not found.")
+        with zipfile.ZipFile(_source(workbook)) as zf:
+            if sheet not in _xlsx.sheet_parts(zf):
+                raise ValueError(f"{sheet} not present in {workbook}.")
+
+    @traced("workbook")
+    def inspect_workbook(self, workbook: Workbook, protection: bool = True) -> list:
+        """Describe the sheets of an Excel workbook without loading their cells.
+
+        Only the workbook part and the start of every sheet part are read, so the
+        time does not depend on the amount of data. Looking up the protection
+        reads through the sheet parts with a byte search and can be skipped.
+
+        Args:
+            workbook: The path to the Excel workbook, or a buffer holding it.
+            protection: Whether the protection of every sheet is looked up.
+
+        Returns:
+            list: One dict per sheet, in workbook order, with its `name`, `index`,
+                `state`, `dimension`, `rows`, `columns` and `protected` keys.
+
+        Raises:
+            FileNotFoundError: If the specified workbook cannot be found.
+            Exception: If an unexpected error occurs.
+        """
+        try:
+            if not _exists(workbook):
+                raise FileNotFoundError
+            with zipfile.ZipFile(_source(workbook)) as zf:
+                sheets = _xlsx.inspect_workbook(zf, protection=protection)
+            self.log.info("%s sheets found in %s.", len(sheets), workbook)
+            return sheets
+        except FileNotFoundError:
+            self.log.error(f"File '{workbook}' not found")
+            return []
+        except Exception as e:
+            self.log.error(f"Undefined Error: {e}.")
+            return []
+
+    def _rewrite(self, workbook: Workbook, operation: Callable, *args) -> bool:
+        """Run an archive-level operation unless the workbook is in a session.
+
+        The operation rewrites only the XML parts it changes and copies every
+        other member of the archive unchanged, which also keeps the features
+        openpyxl does not support, such as charts and pivot caches.
+
+        Returns:
+            bool: Whether the operation ran; False means the workbook must be
+                loaded in a session instead, as for workbooks held in buffers.
+        """
+        if _in_memory(workbook) or self._session_key(workbook) in self._sessions:
+            return False
+        try:
+            with workbook_lock(workbook), registry.timer("excel_save_seconds", operation=operation.__name__):
+                operation(workbook, *args)
+        except _xlsx.ArchiveError as e:
+            self.log.warning(f"Archive of {workbook} not rewritten ({e}), loading the workbook.")
+            return False
+        registry.increment("excel_bytes_written_total", _size(workbook))
+        self._invalidate(workbook)
+        return True
+
+    def _fail(self, workbook: Workbook, message) -> None:
+        """Log an error and mark the active session of the workbook as failed."""
+        self.log.error(message)
+        session = self._sessions.get(self._session_key(workbook))
+        if session is not None:
+            session["failed"] = True
+
+    @traced("workbook", "sheet", "columns", "row_range", "engine")
+    def get_dataframe(
+            self, workbook: Workbook, sheet: str, columns: list = None, row_range: tuple = None,
+            dtypes: dict = None, predicate: Callable = None, engine: str = "openpyxl") -> pd.DataFrame:
         """Retrieve a pandas dataframe from an Excel workbook.
 
+        When the read cache is enabled, a copy of a previously read dataframe is
+        returned as long as the workbook file has not changed. When a cache
+        directory is set, the parsed sheet is loaded from there instead of being
+        parsed again.
+
+        When `columns`, `row_range`, `dtypes` or `predicate` is set, the sheet is
+        streamed and only the requested block of cells is read, so a narrow slice
+        of a wide sheet costs about the slice. Reads with a predicate are not cached.
+
+        The `values` engine streams the worksheet XML and keeps only the cell
+        values. Styles are not loaded, number formats are read only to find the
+        date cells, and formulas give their cached value. On heavily formatted
+        workbooks, most of the time openpyxl spends goes to the styles, so this
+        engine is much faster there. Error cells are read as missing values.
+
         Args:
-            workbook: The path to the Excel workbook.
+            workbook: The path to the Excel workbook, or a buffer holding it.
             sheet: The name of the sheet containing the data.
+            columns: The names of the columns to read, all the columns if None.
+            row_range: The first and the last (excluded) data rows to read, counted
+                from 0 after the header row. Either may be None.
+            dtypes: The data types of some columns, applied as the rows are read.
+            predicate: A function receiving each block of rows as a dataframe and
+                returning a boolean mask of the rows to keep. Datetime columns are
+                not yet converted to dates when it is called.
+            engine: The read engine, `openpyxl` or `values`.
 
         Returns:
             pd.DataFrame: The contents of the specified sheet as a pandas dataframe.
@@ -90,13 +716,47 @@ class ExcelManager:
             Exception: If an unexpected error occurs.
         """
         try:
-            self.log.info(f"{inspect.stack()[0][3]}:\nworkbook={workbook}, sheet={sheet}.")
-            workbook_path = Path(workbook)
-            if not workbook_path.is_file():
+            if not _exists(workbook):
                 raise FileNotFoundError
-            dataframe = pd.read_excel(workbook_path, sheet_name=sheet)
-            dataframe = self.obj_date.timestamp_to_date(dataframe)
+            options = _read_options(columns, row_range, dtypes, engine)
+            cached = (self.cache or self.sidecar) and predicate is None
+            date_type = self.obj_date.date_type
+            key_options = options if date_type == "object" else options + (date_type,)
+            key = ReadCache.key(workbook, sheet, key_options) if cached else None
+            if self.cache:
+                dataframe = self.cache.get(key)
+                if dataframe is not None:
+                    registry.increment("excel_cache_hits_total", cache="memory")
+                    self.log.info("Dataframe served from the read cache.")
+                    return dataframe
+            if self.sidecar:
+                dataframe = self.sidecar.get(key)
+                if dataframe is not None:
+                    registry.increment("excel_cache_hits_total", cache="directory")
+                    self.log.info("Dataframe loaded from the cache directory.")
+                    if self.cache:
+                        self.cache.put(key, dataframe)
+                    return dataframe
+            with registry.timer("excel_load_seconds", operation="get_dataframe"):
+                if options or predicate:
+                    dataframe = pd.concat(
+                        self._read_chunks(workbook, sheet, 100000, columns, row_range, dtypes, predicate, engine),
+                        ignore_index=True,
+                    )
+                else:
+                    registry.increment("excel_bytes_read_total", _size(workbook))
+                    dataframe = pd.read_excel(_source(workbook), sheet_name=sheet)
+                    registry.increment("excel_rows_read_total", len(dataframe))
+                    dataframe = self.obj_date.timestamp_to_date(dataframe)
             self.log.info("Dataframe created and timestamp columns modified.")
+            if self.cache:
+                self.cache.put(key, dataframe)
+            if self.sidecar:
+                try:
+                    if not self.sidecar.put(key, dataframe):
+                        self.log.info("Dataframe not stored in the cache directory: Feather cannot store it.")
+                except OSError as e:
+                    self.log.warning(f"Dataframe not stored in the cache directory: {e}.")
             return dataframe
         except FileNotFoundError:
             self.log.error(f"File '{workbook}' not found")
@@ -107,11 +767,275 @@ class ExcelManager:
             self.log.warning("Initializing empty dataframe.")
             return pd.DataFrame()
 
-    def delete_sheet(self, workbook: str, sheet: str) -> None:
+    def _read_chunks(
+            self, workbook: Workbook, sheet: str, chunksize: int, columns: list = None,
+            row_range: tuple = None, dtypes: dict = None, predicate: Callable = None,
+            engine: str = "openpyxl") -> Iterator[pd.DataFrame]:
+        """Stream a sheet as dataframes with the read options applied to every chunk."""
+        registry.increment("excel_bytes_read_total", _size(workbook))
+        wb = _open_workbook(workbook, engine)
+        try:
+            for dataframe in _iter_worksheet(wb[sheet], chunksize, columns, row_range):
+                registry.increment("excel_rows_read_total", len(dataframe))
+                if dtypes:
+                    dataframe = dataframe.astype({k: v for k, v in dtypes.items() if k in dataframe.columns})
+                if predicate is not None:
+                    dataframe = dataframe[predicate(dataframe)].reset_index(drop=True)
+                yield self.obj_date.timestamp_to_date(dataframe)
+        finally:
+            wb.close()
+
+    @traced("workbook", "sheet", "chunksize", "columns", "row_range", "engine")
+    def iter_dataframes(
+            self, workbook: Workbook, sheet: str, chunksize: int = 100000, columns: list = None,
+            row_range: tuple = None, dtypes: dict = None, predicate: Callable = None,
+            engine: str = "openpyxl") -> Iterator[pd.DataFrame]:
+        """Read an Excel sheet as a sequence of dataframes of fixed size.
+
+        The sheet is streamed in read-only mode, so memory use depends on
+        `chunksize` rather than on the size of the sheet. The first row is used
+        as header and datetime columns of every chunk are converted to dates. A
+        sheet without data rows yields one empty dataframe with its header.
+
+        Args:
+            workbook: The path to the Excel workbook, or a buffer holding it.
+            sheet: The name of the sheet containing the data.
+            chunksize: The number of rows of each dataframe.
+            columns: The names of the columns to read, all the columns if None.
+            row_range: The first and the last (excluded) data rows to read, counted
+                from 0 after the header row. Either may be None.
+            dtypes: The data types of some columns, applied to every chunk.
+            predicate: A function receiving each chunk and returning a boolean mask
+                of the rows to keep. Datetime columns are not yet converted to dates
+                when it is called.
+            engine: The read engine, `openpyxl` or `values`, see `get_dataframe`.
+
+        Yields:
+            pd.DataFrame: The next `chunksize` rows of the sheet.
+
+        Raises:
+            FileNotFoundError: If the specified workbook cannot be found.
+            Exception: If an unexpected error occurs.
+        """
+        try:
+            if not _exists(workbook):
+                raise FileNotFoundError
+            _read_options(engine=engine)
+            chunks = 0
+            for dataframe in self._read_chunks(workbook, sheet, chunksize, columns, row_range, dtypes, predicate, engine):
+                chunks += 1
+                yield dataframe
+            self.log.info("%s chunks read from %s in %s.", chunks, sheet, workbook)
+        except FileNotFoundError:
+            self.log.error(f"File '{workbook}' not found")
+        except Exception as e:
+            self.log.error(f"Undefined Error: {e}.")
+
+    @traced("workbook", "sheets", "max_workers")
+    def get_dataframes(self, workbook: Workbook, sheets: list = None, max_workers: int = None) -> dict:
+        """Retrieve several sheets of an Excel workbook with a single open of the archive.
+
+        The shared strings and styles of the workbook are parsed once for all the
+        sheets. With `max_workers`, the sheets are split between worker processes
+        that decode them in parallel, each opening the workbook once.
+
+        Args:
+            workbook: The path to the Excel workbook, or a buffer holding it.
+            sheets: The names of the sheets to read, all the sheets if None.
+            max_workers: The number of worker processes decoding sheets in parallel.
+
+        Returns:
+            dict: The contents of the sheets as pandas dataframes, keyed by sheet name.
+
+        Raises:
+            FileNotFoundError: If the specified workbook cannot be found.
+            Exception: If an unexpected error occurs.
+        """
+        try:
+            if not _exists(workbook):
+                raise FileNotFoundError
+            if sheets is None:
+                with zipfile.ZipFile(_source(workbook)) as zf:
+                    sheets = list(_xlsx.sheet_parts(zf))
+            if max_workers and max_workers > 1 and len(sheets) > 1:
+                groups = [sheets[i::max_workers] for i in range(min(max_workers, len(sheets)))]
+                with ProcessPoolExecutor(max_workers=len(groups)) as executor:
+                    parts = executor.map(_read_sheets, [workbook] * len(groups), groups)
+                    read = {sheet: df for part in parts for sheet, df in part.items()}
+            else:
+                read = _read_sheets(workbook, sheets)
+            dataframes = {sheet: self.obj_date.timestamp_to_date(read[sheet]) for sheet in sheets}
+            self.log.info("%s dataframes created from %s.", len(dataframes), workbook)
+            return dataframes
+        except FileNotFoundError:
+            self.log.error(f"File '{workbook}' not found")
+            self.log.warning("Initializing empty dictionary.")
+            return {}
+        except Exception as e:
+            self.log.error(f"Undefined Error: {e}.")
+            self.log.warning("Initializing empty dictionary.")
+            return {}
+
+    @traced("paths", "sheet", "max_workers")
+    def iter_many(
+            self, paths: Iterable[str], sheet: str, max_workers: int = None,
+            ordered: bool = True) -> Iterator[tuple]:
+        """Read the same sheet from many workbooks with a pool of worker processes.
+
+        Args:
+            paths: The paths to the Excel workbooks.
+            sheet: The name of the sheet to read from every workbook.
+            max_workers: The number of worker processes, the number of CPUs if None.
+            ordered: Whether results follow the order of `paths` rather than the
+                order in which the workbooks are read.
+
+        Yields:
+            tuple: The path of the workbook, its dataframe and None, or the path, an
+                empty dataframe and the error message if the workbook could not be read.
+        """
+        paths = list(paths)
+        with ProcessPoolExecutor(
+                max_workers=max_workers, initializer=_init_worker, initargs=(self.log.log_file, self.obj_date.date_type)) as executor:
+            futures = {executor.submit(_read_workbook, path, sheet): path for path in paths}
+            for future in (futures if ordered else as_completed(futures)):
+                path = futures[future]
+                try:
+                    yield path, future.result(), None
+                except Exception as e:
+                    self.log.error(f"Error while reading '{path}': {e}.")
+                    yield path, pd.DataFrame(), str(e) or type(e).__name__
+
+    def read_many(
+            self, paths: Iterable[str], sheet: str, max_workers: int = None,
+            concat: bool = False, source_column: str = "source_file"):
+        """Read the same sheet from many workbooks in parallel.
+
+        A workbook that cannot be read is logged and gives an empty dataframe,
+        the other workbooks of the batch are still read.
+
+        Args:
+            paths: The paths to the Excel workbooks.
+            sheet: The name of the sheet to read from every workbook.
+            max_workers: The number of worker processes, the number of CPUs if None.
+            concat: Whether the dataframes are concatenated into one dataframe.
+            source_column: The column holding the path of the workbook of each row
+                when the dataframes are concatenated.
+
+        Returns:
+            Union[list, pd.DataFrame]: The dataframes in the order of `paths`, or
+                their concatenation.
+        """
+        results = list(self.iter_many(paths, sheet, max_workers=max_workers))
+        failed = sum(1 for _, _, error in results if error)
+        self.log.info("%s workbooks read, %s failed.", len(results) - failed, failed)
+        if not concat:
+            return [dataframe for _, dataframe, _ in results]
+        frames = [
+            dataframe.assign(**{source_column: str(path)})
+            for path, dataframe, error in results if not error
+        ]
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+    @traced("workbook", "sheet", "target", "format")
+    def export_sheet(
+            self, workbook: Workbook, sheet: str, target: str, format: str = None, chunksize: int = 100000) -> Optional[int]:
+        """Export an Excel sheet to a CSV, Parquet or Feather file without loading it whole.
+
+        The sheet is streamed in chunks of `chunksize` rows, converted to dates
+        chunk by chunk and written as it is read: CSV rows are appended, Parquet
+        chunks become row groups and Feather chunks record batches. Memory use
+        depends on `chunksize` rather than on the size of the sheet. Parquet and
+        Feather need pyarrow, installed with the `export` extra.
+
+        Args:
+            workbook: The path to the Excel workbook, or a buffer holding it.
+            sheet: The name of the sheet to export.
+            target: The path of the file to write.
+            format: One of `csv`, `parquet` or `feather`, taken from the suffix
+                of `target` if None.
+            chunksize: The number of rows read and written at a time.
+
+        Returns:
+            int: The number of rows exported, None if the sheet could not be exported.
+
+        Raises:
+            FileNotFoundError: If the specified workbook cannot be found.
+            ValueError: If the format is not supported.
+            ImportError: If pyarrow is needed but not installed.
+            Exception: If an unexpected error occurs.
+        """
+        try:
+            if not _exists(workbook):
+                raise FileNotFoundError
+            format = _export.export_format(target, format)
+            Path(target).parent.mkdir(parents=True, exist_ok=True)
+            rows = _export.write_chunks(self._read_chunks(workbook, sheet, chunksize), target, format)
+            self.log.info("%s rows of %s in %s exported to %s.", rows, sheet, workbook, target)
+            return rows
+        except FileNotFoundError:
+            self.log.error(f"File '{workbook}' not found")
+        except (ValueError, ImportError) as e:
+            self.log.error(e)
+        except Exception as e:
+            self.log.error(f"Undefined Error: {e}.")
+        return None
+
+    @traced("directory", "target_directory", "format", "max_workers")
+    def export_directory(
+            self, directory: str, target_directory: str, format: str = "parquet",
+            max_workers: int = None, chunksize: int = 100000, pattern: str = "*.xlsx") -> dict:
+        """Export every sheet of the workbooks of a directory, one worker process per workbook.
+
+        Every sheet is streamed like `export_sheet` does and written to
+        `<workbook stem>.<sheet>.<format>` in `target_directory`. A workbook that
+        cannot be exported is logged and the others are still exported.
+
+        Args:
+            directory: The directory holding the Excel workbooks.
+            target_directory: The directory where the files are written.
+            format: One of `csv`, `parquet` or `feather`.
+            max_workers: The number of worker processes, the number of CPUs if None.
+            chunksize: The number of rows read and written at a time.
+            pattern: The glob pattern selecting the workbooks in `directory`.
+
+        Returns:
+            dict: The number of rows exported per sheet, keyed by workbook path,
+                with an empty dict for the workbooks that could not be exported.
+        """
+        try:
+            format = _export.export_format(target_directory, format)
+            paths = sorted(str(path) for path in Path(directory).glob(pattern) if not path.name.startswith("~$"))
+            Path(target_directory).mkdir(parents=True, exist_ok=True)
+        except (ValueError, OSError) as e:
+            self.log.error(e)
+            return {}
+        results = {}
+        with ProcessPoolExecutor(
+                max_workers=max_workers, initializer=_init_worker, initargs=(self.log.log_file, self.obj_date.date_type)) as executor:
+            futures = {
+                executor.submit(_export_workbook, path, target_directory, format, chunksize): path
+                for path in paths
+            }
+            for future in as_completed(futures):
+                path = futures[future]
+                try:
+                    results[path] = future.result()
+                except Exception as e:
+                    self.log.error(f"Error while exporting '{path}': {e}.")
+                    results[path] = {}
+        failed = sum(1 for rows in results.values() if not rows)
+        self.log.info("%s workbooks exported from %s, %s failed.", len(results) - failed, directory, failed)
+        return {path: results[path] for path in paths}
+
+    @traced("workbook", "sheet")
+    def delete_sheet(self, workbook: Workbook, sheet: str) -> None:
         """Delete a sheet from an Excel workbook.
 
+        Outside a session, only the workbook part, its relationships and the
+        content types are rewritten; the other members are copied unchanged.
+
         Args:
-            workbook: The path to the Excel workbook.
+            workbook: The path to the Excel workbook, or a buffer holding it.
             sheet: The name of the sheet to be deleted.
 
         Returns:
@@ -119,32 +1043,33 @@ class ExcelManager:
 
         Raises:
             FileNotFoundError: If the specified workbook cannot be found.
-            ValueError: If the specified sheet does not exist in the workbook.
+            ValueError: If the specified sheet does not exist in the workbook, or
+                is its last visible sheet.
             Exception: If an unexpected error occurs.
         """
-        self.log.info(f"{inspect.stack()[0][3]}:\nworkbook={workbook}, sheet={sheet}.")
         try:
-            if not Path(workbook).is_file():
-                raise FileNotFoundError(f"File '{workbook}' not found.")
-            wb = openpyxl.load_workbook(Path(workbook))
-            sheet_names_list = wb.sheetnames
-            self.log.info(f"{workbook} loaded and sheet names: {sheet_names_list}.")
-            if sheet not in sheet_names_list:
-                raise ValueError(f"{sheet} not present in {workbook}.")
-            sheetno = sheet_names_list.index(sheet)
-            del wb[sheet_names_list[sheetno]]
-            wb.save(workbook)
-            self.log.info(f"{sheet} deleted from {workbook}.")
+            self._check_sheet(workbook, sheet)
+            if not self._rewrite(workbook, _xlsx.delete_sheet, sheet):
+                with self.session(workbook) as wb:
+                    sheet_names_list = wb.sheetnames
+                    self.log.info("%s loaded and sheet names: %s.", workbook, sheet_names_list)
+                    if sheet not in sheet_names_list:
+                        raise ValueError(f"{sheet} not present in {workbook}.")
+                    if not any(ws.sheet_state == "visible" for ws in wb.worksheets if ws.title != sheet):
+                        raise ValueError(f"{sheet} is the last visible sheet of {workbook} and cannot be deleted.")
+                    del wb[sheet]
+            self.log.info("%s deleted from %s.", sheet, workbook)
         except (FileNotFoundError, ValueError) as e:
-            self.log.error(e)
+            self._fail(workbook, e)
         except Exception as e:
-            self.log.error(f"Undefined Error: {e}.")
+            self._fail(workbook, f"Undefined Error: {e}.")
 
-    def create_sheet(self, workbook: str, sheet: str) -> None:
+    @traced("workbook", "sheet")
+    def create_sheet(self, workbook: Workbook, sheet: str) -> None:
         """Create a new sheet in an Excel workbook.
 
         Args:
-            workbook: The path to the Excel workbook.
+            workbook: The path to the Excel workbook, or a buffer holding it.
             sheet: The name of the sheet to be created.
 
         Raises:
@@ -155,28 +1080,39 @@ class ExcelManager:
         Returns:
             None: Returns nothing.
         """
-        self.log.info(f"{inspect.stack()[0][3]}:\nworkbook={workbook}, sheet={sheet}.")
         try:
-            if not Path(workbook).is_file():
-                raise FileNotFoundError
-            wb = openpyxl.load_workbook(workbook)
-            wb.create_sheet(title=sheet)
-            wb.save(workbook)
-            self.log.info(f"{sheet} created in {workbook}.")
+            with self.session(workbook) as wb:
+                wb.create_sheet(title=sheet)
+            self.log.info("%s created in %s.", sheet, workbook)
         except FileNotFoundError:
-            self.log.error(f"File {workbook} not found.")
+            self._fail(workbook, f"File {workbook} not found.")
         except PermissionError:
-            self.log.error(f"Permission error while creating sheet in {workbook}.")
+            self._fail(workbook, f"Permission error while creating sheet in {workbook}.")
         except Exception as e:
-            self.log.error(f"Undefined Error: {e}.")
+            self._fail(workbook, f"Undefined Error: {e}.")
 
-    def overwrite_sheet(self, workbook: str, sheet: str, dataframe: pd.DataFrame) -> None:
+    @traced("workbook", "sheet", "dataframe", "streaming")
+    def overwrite_sheet(
+            self, workbook: Workbook, sheet: str, dataframe: pd.DataFrame,
+            streaming: bool = False, chunksize: int = 10000) -> None:
         """Overwrite the contents of an Excel sheet with a new dataframe.
 
+        With `streaming`, the sheet XML is generated from the column arrays of the
+        dataframe in batches of `chunksize` rows and written straight into the
+        archive, so memory use stays bounded whatever the size of the dataframe.
+        The other sheets are copied unchanged. Inside a session the in-memory
+        workbook is used instead, where the sheet is replaced by a new one. In
+        both cases the sheet keeps its position and visibility.
+
+        With `track_fingerprints`, an overwrite with the same dataframe as the
+        last one written to the sheet does nothing, see `sheet_changed`.
+
         Args:
-            workbook: The path to the Excel workbook.
+            workbook: The path to the Excel workbook, or a buffer holding it.
             sheet: The name of the sheet to be overwritten.
             dataframe: The new contents of the sheet as a pandas dataframe.
+            streaming: Whether the rows are streamed into the sheet.
+            chunksize: The number of rows written per batch when streaming.
 
         Returns:
             None: Returns nothing.
@@ -187,31 +1123,94 @@ class ExcelManager:
             ValueError: If the specified sheet does not exist in the workbook.
             Exception: If an unexpected error occurs.
         """
-        self.log.info(f"{inspect.stack()[0][3]}:\nworkbook={workbook}, sheet={sheet}, dataframe_size={dataframe.shape}.")
         try:
-            header = dataframe.columns
-            self.delete_sheet(workbook=workbook, sheet=sheet)
-            self.create_sheet(workbook=workbook, sheet=sheet)
-
-            with pd.ExcelWriter(
-                Path(workbook), mode="a", engine="openpyxl", if_sheet_exists="overlay"
-            ) as writer:
-                dataframe.to_excel(
-                    writer, sheet_name=sheet, header=header, startrow=0, index=False
-                )
-            self.log.info(f"{sheet} overwritten in {workbook}.")
+            if self.track_fingerprints and not _in_memory(workbook) and self._session_key(workbook) not in self._sessions:
+                if not Path(workbook).is_file():
+                    raise FileNotFoundError(f"File '{workbook}' not found.")
+                digest = _fingerprint.fingerprint(dataframe)
+                with workbook_lock(workbook):
+                    fingerprints = _fingerprint.load(workbook)
+                    if fingerprints.get(sheet) == digest:
+                        self.log.info("%s in %s already holds the dataframe, not overwritten.", sheet, workbook)
+                        return
+                    before = _fingerprint.stamp(workbook)
+                    self._overwrite(workbook, sheet, dataframe, streaming, chunksize)
+                    if _fingerprint.stamp(workbook) != before:
+                        _fingerprint.store(workbook, {**fingerprints, sheet: digest})
+            else:
+                self._overwrite(workbook, sheet, dataframe, streaming, chunksize)
+            registry.increment("excel_rows_written_total", len(dataframe), operation="overwrite_sheet")
+            self.log.info("%s overwritten in %s.", sheet, workbook)
         except (FileNotFoundError, ValueError) as e:
-            self.log.error(e)
+            self._fail(workbook, e)
         except PermissionError:
-            self.log.error(f"Permission error while updating {workbook}.")
+            self._fail(workbook, f"Permission error while updating {workbook}.")
+        except Exception as e:
+            self._fail(workbook, f"Undefined Error: {e}.")
+
+    def _overwrite(self, workbook: Workbook, sheet: str, dataframe: pd.DataFrame, streaming: bool, chunksize: int) -> None:
+        """Write the dataframe over the sheet, streamed into the archive or in a session."""
+        if streaming and not _in_memory(workbook) and self._session_key(workbook) not in self._sessions:
+            if not Path(workbook).is_file():
+                raise FileNotFoundError(f"File '{workbook}' not found.")
+            with workbook_lock(workbook):
+                with zipfile.ZipFile(workbook) as zf:
+                    exists = sheet in _xlsx.sheet_parts(zf)
+                if not exists:
+                    self.create_sheet(workbook=workbook, sheet=sheet)
+                with registry.timer("excel_save_seconds", operation="write_sheet"):
+                    _xlsx.write_sheet(workbook, sheet, dataframe, chunksize=chunksize)
+            registry.increment("excel_bytes_written_total", _size(workbook))
+            self._invalidate(workbook)
+        else:
+            with self.session(workbook) as wb:
+                if sheet in wb.sheetnames:
+                    old = wb[sheet]
+                    worksheet = wb.create_sheet(title=sheet, index=wb.sheetnames.index(sheet))
+                    worksheet.sheet_state = old.sheet_state
+                    wb.remove(old)
+                    worksheet.title = sheet
+                else:
+                    worksheet = wb.create_sheet(title=sheet)
+                _write_dataframe(worksheet, dataframe, startrow=0, header=True)
+
+    @traced("workbook", "sheet", "dataframe")
+    def sheet_changed(self, workbook: Workbook, sheet: str, dataframe: pd.DataFrame) -> bool:
+        """Tell whether a dataframe differs from the last one written to a sheet.
+
+        The answer comes from the fingerprints stored by `overwrite_sheet` when
+        `track_fingerprints` is set, without opening the workbook. Fingerprints
+        are only trusted while the workbook file is the one they were stored for,
+        so a sheet is reported as changed after any other write to the workbook.
+        Workbooks held in buffers have no fingerprints and are always reported
+        as changed.
+
+        Args:
+            workbook: The path to the Excel workbook, or a buffer holding it.
+            sheet: The name of the sheet.
+            dataframe: The dataframe to compare with the sheet.
+
+        Returns:
+            bool: False if the sheet is known to hold the dataframe, True otherwise.
+        """
+        if _in_memory(workbook):
+            return True
+        try:
+            stored = _fingerprint.load(workbook).get(sheet)
+            return stored is None or stored != _fingerprint.fingerprint(dataframe)
         except Exception as e:
             self.log.error(f"Undefined Error: {e}.")
+            return True
 
-    def reposition_sheet(self, workbook: str, sheet: str) -> None:
+    @traced("workbook", "sheet")
+    def reposition_sheet(self, workbook: Workbook, sheet: str) -> None:
         """Moves a sheet at the start in the workbook and saves the changes.
 
+        Outside a session, only the workbook part is rewritten; the other members
+        are copied unchanged.
+
         Args:
-            workbook: The path to the Excel workbook.
+            workbook: The path to the Excel workbook, or a buffer holding it.
             sheet: The name of the sheet to be moved.
 
         Raises:
@@ -223,29 +1222,35 @@ class ExcelManager:
         Returns:
             None: Returns nothing.
         """
-        self.log.info(f"{inspect.stack()[0][3]}:\nworkbook={workbook}, sheet={sheet}.")
         try:
-            wb = openpyxl.load_workbook(workbook)
-            if sheet not in wb.sheetnames:
-                raise ValueError
-            wb.move_sheet(sheet, -(len(wb.sheetnames) - 1))
-            wb.save(workbook)
-            wb.close()
-            self.log.info(f"{sheet} moved to the start of {workbook}.")
+            self._check_sheet(workbook, sheet)
+            if not self._rewrite(workbook, _xlsx.move_sheet_first, sheet):
+                with self.session(workbook) as wb:
+                    if sheet not in wb.sheetnames:
+                        raise ValueError
+                    wb.move_sheet(sheet, -wb.sheetnames.index(sheet))
+            self.log.info("%s moved to the start of %s.", sheet, workbook)
         except FileNotFoundError:
-            self.log.error(f"File '{workbook}' not found.")
+            self._fail(workbook, f"File '{workbook}' not found.")
         except PermissionError:
-            self.log.error(f"Permission error while accessing '{workbook}'.")
+            self._fail(workbook, f"Permission error while accessing '{workbook}'.")
         except ValueError:
-            self.log.error(f"Sheet '{sheet}' not found in workbook '{workbook}'.")
+            self._fail(workbook, f"Sheet '{sheet}' not found in workbook '{workbook}'.")
         except Exception as e:
-            self.log.error(f"Undefined Error: {e}.")
+            self._fail(workbook, f"Undefined Error: {e}.")
 
-    def append_dataframe(self, workbook: str, sheet: str, dataframe: pd.DataFrame, password: str = None) -> None:
+    @traced("workbook", "sheet", "dataframe")
+    def append_dataframe(self, workbook: Workbook, sheet: str, dataframe: pd.DataFrame, password: str = None) -> None:
         """Appends a pandas dataframe to an Excel sheet.
 
+        Outside a session, when the sheet exists, the new rows are streamed into
+        the worksheet part after its existing cell data, which is passed through
+        without being parsed. The first new row comes from the dimension of the
+        sheet and the protection is set in the same pass, so the cost depends on
+        the rows appended rather than on the rows already in the sheet.
+
         Args:
-            workbook: The path to the Excel workbook.
+            workbook: The path to the Excel workbook, or a buffer holding it.
             sheet: The name of the sheet to which the dataframe will be appended.
             dataframe: The pandas dataframe to be appended to the sheet.
             password: The password for the Excel workbook, if it is protected.
@@ -258,35 +1263,222 @@ class ExcelManager:
         Returns:
             None: Returns nothing.
         """
-        self.log.info(f"{inspect.stack()[0][3]}:\nworkbook={workbook}, sheet={sheet}, dataframe={dataframe.shape}.")
         try:
-            if password:
-                self.modify_sheet_protection(filepath=workbook, sheetname=sheet, enable_protection=False, password=password)
-            with pd.ExcelWriter(
-                Path(workbook), mode="a", engine="openpyxl", if_sheet_exists="overlay"
-            ) as writer:
-                dataframe.to_excel(
-                    writer,
-                    sheet_name=sheet,
-                    header=None,
-                    startrow=writer.sheets[sheet].max_row if sheet in writer.sheets else 0,
-                    index=False,
+            exists = False
+            if not _in_memory(workbook) and _exists(workbook) and self._session_key(workbook) not in self._sessions:
+                with zipfile.ZipFile(workbook) as zf:
+                    exists = sheet in _xlsx.sheet_parts(zf)
+            if exists and self._rewrite(workbook, _xlsx.append_rows, sheet, dataframe, password):
+                registry.increment("excel_rows_written_total", len(dataframe), operation="append_dataframe")
+                self.log.info("Dataframe appended to %s in %s.", sheet, workbook)
+                return
+            with self.session(workbook) as wb:
+                if password:
+                    self.modify_sheet_protection(filepath=workbook, sheetname=sheet, enable_protection=False, password=password)
+                if sheet in wb.sheetnames:
+                    worksheet = wb[sheet]
+                    startrow = worksheet.max_row
+                else:
+                    worksheet = wb.create_sheet(title=sheet)
+                    startrow = 0
+                _write_dataframe(worksheet, dataframe, startrow=startrow, header=False)
+                registry.increment("excel_rows_written_total", len(dataframe), operation="append_dataframe")
+                self.log.info("Dataframe appended to %s in %s.", sheet, workbook)
+                if password:
+                    self.modify_sheet_protection(filepath=workbook, sheetname=sheet, enable_protection=True, password=password)
+        except FileNotFoundError:
+            self._fail(workbook, f"File '{workbook}' not found.")
+        except PermissionError:
+            self._fail(workbook, f"Permission error while accessing '{workbook}'.")
+        except Exception as e:
+            self._fail(workbook, f"Undefined Error: {e}.")
+
+    def _existing_rows(self, workbook: Workbook, sheet: str, columns: list):
+        """Read the columns of a sheet compared by `upsert_dataframe`, None if the sheet is missing."""
+        session = self._sessions.get(self._session_key(workbook))
+        if session is not None:
+            wb = session["workbook"]
+            if sheet not in wb.sheetnames:
+                return None
+            return next(_iter_worksheet(wb[sheet], chunksize=0, columns=columns))
+        if not _exists(workbook):
+            return None
+        with zipfile.ZipFile(_source(workbook)) as zf:
+            if sheet not in _xlsx.sheet_parts(zf):
+                return None
+        wb = openpyxl.load_workbook(_source(workbook), read_only=True, data_only=True)
+        try:
+            return next(_iter_worksheet(wb[sheet], chunksize=0, columns=columns))
+        finally:
+            wb.close()
+
+    @traced("workbook", "sheet", "dataframe", "key_columns")
+    def upsert_dataframe(
+            self, workbook: Workbook, sheet: str, dataframe: pd.DataFrame, key_columns: list,
+            delete_missing: bool = False, password: str = None) -> dict:
+        """Update the rows of an Excel sheet from a dataframe, matching them on key columns.
+
+        The rows of the sheet and of the dataframe are hashed on their key columns
+        and on all their columns with `pd.util.hash_pandas_object`, so only rows
+        whose values changed are written. Changed rows are updated in place, rows
+        with a new key are appended and, with `delete_missing`, rows whose key is
+        not in the dataframe are deleted. Columns of the sheet missing from the
+        dataframe are left unchanged. When nothing changed, the workbook is not
+        written at all. A missing sheet is created with the whole dataframe.
+
+        Args:
+            workbook: The path to the Excel workbook, or a buffer holding it.
+            sheet: The name of the sheet to update.
+            dataframe: The new contents of the rows, with a header matching the sheet.
+            key_columns: The columns identifying a row.
+            delete_missing: Whether the rows whose key is not in the dataframe are deleted.
+            password: The password for the Excel workbook, if it is protected.
+
+        Returns:
+            dict: The number of `inserted`, `updated`, `unchanged` and `deleted`
+                rows, empty if the sheet could not be updated.
+
+        Raises:
+            FileNotFoundError: If the specified workbook cannot be found.
+            PermissionError: If the user does not have permission to write to the specified workbook.
+            ValueError: If a key column is missing or the keys are not unique.
+            Exception: If an unexpected error occurs.
+        """
+        try:
+            if not _in_memory(workbook) and not _exists(workbook):
+                raise FileNotFoundError
+            key_columns = list(key_columns)
+            missing = [column for column in key_columns if column not in dataframe.columns]
+            if not key_columns or missing:
+                raise ValueError(f"Key columns {missing or key_columns} not present in the dataframe.")
+            if dataframe.duplicated(subset=key_columns).any():
+                raise ValueError(f"Key columns {key_columns} do not identify the rows of the dataframe.")
+            columns = list(dataframe.columns)
+            with _lock(workbook):
+                existing = self._existing_rows(workbook, sheet, columns)
+                if existing is None:
+                    self._overwrite(workbook, sheet, dataframe, streaming=False, chunksize=0)
+                    registry.increment("excel_rows_written_total", len(dataframe), operation="upsert_dataframe")
+                    counts = {"inserted": len(dataframe), "updated": 0, "unchanged": 0, "deleted": 0}
+                    self.log.info("Upsert into %s in %s: %s.", sheet, workbook, counts)
+                    return counts
+                if existing.duplicated(subset=key_columns).any():
+                    raise ValueError(f"Key columns {key_columns} do not identify the rows of {sheet}.")
+                incoming = dataframe.reset_index(drop=True)
+                existing_keys = pd.Index(_row_hashes(existing[key_columns]))
+                position = existing_keys.get_indexer(_row_hashes(incoming[key_columns]))
+                matched = position >= 0
+                changed = matched.copy()
+                changed[matched] = (
+                    _row_hashes(existing).to_numpy()[position[matched]]
+                    != _row_hashes(incoming).to_numpy()[matched]
                 )
-            self.log.info(f"Dataframe appended to {sheet} in {workbook}.")
-            if password:
-                self.modify_sheet_protection(filepath=workbook, sheetname=sheet, enable_protection=True, password=password)
+                deleted = []
+                if delete_missing:
+                    kept = pd.Series(False, index=existing.index)
+                    kept.iloc[position[matched]] = True
+                    deleted = list(existing.index[~kept.to_numpy()])
+                counts = {
+                    "inserted": int((~matched).sum()),
+                    "updated": int(changed.sum()),
+                    "unchanged": int((matched & ~changed).sum()),
+                    "deleted": len(deleted),
+                }
+                if counts["inserted"] or counts["updated"] or counts["deleted"]:
+                    with self.session(workbook) as wb:
+                        if password:
+                            self.modify_sheet_protection(filepath=workbook, sheetname=sheet, enable_protection=False, password=password)
+                        worksheet = wb[sheet]
+                        header = _header(next(worksheet.iter_rows(min_row=1, max_row=1, values_only=True), ()))
+                        targets = [header.index(column) + 1 for column in columns]
+                        rows = [(position[i] + 2, i) for i in changed.nonzero()[0]]
+                        rows += [(len(existing) + 2 + n, i) for n, i in enumerate((~matched).nonzero()[0])]
+                        for row, i in rows:
+                            for col, value in zip(targets, incoming.iloc[i]):
+                                worksheet.cell(row=row, column=col, value=_excel_value(value))
+                        runs = []
+                        for row in sorted(deleted):
+                            if runs and sum(runs[-1]) == row:
+                                runs[-1][1] += 1
+                            else:
+                                runs.append([row, 1])
+                        for row, amount in reversed(runs):
+                            worksheet.delete_rows(row + 2, amount)
+                        if password:
+                            self.modify_sheet_protection(filepath=workbook, sheetname=sheet, enable_protection=True, password=password)
+            registry.increment(
+                "excel_rows_written_total", counts["inserted"] + counts["updated"], operation="upsert_dataframe")
+            self.log.info("Upsert into %s in %s: %s.", sheet, workbook, counts)
+            return counts
         except FileNotFoundError:
-            self.log.error(f"File '{workbook}' not found.")
+            self._fail(workbook, f"File '{workbook}' not found.")
         except PermissionError:
-            self.log.error(f"Permission error while accessing '{workbook}'.")
+            self._fail(workbook, f"Permission error while accessing '{workbook}'.")
+        except ValueError as e:
+            self._fail(workbook, e)
         except Exception as e:
-            self.log.error(f"Undefined Error: {e}.")
+            self._fail(workbook, f"Undefined Error: {e}.")
+        return {}
+
+    def _append_batch(self, workbook: Workbook, items: list) -> bool:
+        """Write queued appends in one session and return whether it was saved."""
+        key = self._session_key(workbook)
+        with self.session(workbook):
+            for sheet, dataframe, password in items:
+                self.append_dataframe(workbook, sheet, dataframe, password=password)
+            failed = self._sessions[key]["failed"]
+        return not failed
 
-    def modify_sheet_protection(self, filepath: str, sheetname: str, enable_protection: bool, password: str = None) -> None:
+    @traced("workbook", "sheet", "dataframe")
+    def queue_append(self, workbook: Workbook, sheet: str, dataframe: pd.DataFrame, password: str = None) -> Future:
+        """Queue an append to an Excel sheet, merged with the other pending appends.
+
+        A single writer thread per workbook takes every pending append at once
+        and writes them with one load and one save, so producers appending to the
+        same workbook from many threads do not each pay a full save. Writers in
+        other processes are kept out by the workbook lock.
+
+        Args:
+            workbook: The path to the Excel workbook, or a buffer holding it.
+            sheet: The name of the sheet to which the dataframe will be appended.
+            dataframe: The pandas dataframe to be appended to the sheet.
+            password: The password for the Excel workbook, if it is protected.
+
+        Returns:
+            Future: Resolved with True once the append is saved, or with False if
+                the batch it belongs to was rolled back.
+        """
+        key = self._session_key(workbook)
+        with self._queues_lock:
+            queue = self._queues.get(key)
+            if queue is None:
+                queue = self._queues[key] = WriterQueue(self, workbook)
+        return queue.put(sheet, dataframe, password)
+
+    def flush(self, workbook: Workbook = None) -> None:
+        """Wait until the queued appends of a workbook, or of every workbook, are written.
+
+        Args:
+            workbook: The path to the Excel workbook, every workbook if None.
+        """
+        with self._queues_lock:
+            if workbook is None:
+                queues = list(self._queues.values())
+            else:
+                queues = [self._queues[key] for key in [self._session_key(workbook)] if key in self._queues]
+        for queue in queues:
+            queue.join()
+
+    @traced("filepath", "sheetname", "enable_protection")
+    def modify_sheet_protection(self, filepath: Workbook, sheetname: str, enable_protection: bool, password: str = None) -> None:
         """Modifies the protection of an Excel sheet.
 
+        Outside a session, only the protection element of the worksheet part is
+        rewritten; the cell data is streamed through and the other members are
+        copied unchanged.
+
         Args:
-            filepath: The path to the Excel workbook.
+            filepath: The path to the Excel workbook, or a buffer holding it.
             sheetname: The name of the sheet to be protected.
             enable_protection: A boolean value indicating whether to enable or disable protection.
             password: The password for the Excel workbook, if it is protected.
@@ -298,20 +1490,21 @@ class ExcelManager:
         Returns:
             None: Returns nothing.
         """
-        self.log.info(f"{inspect.stack()[0][3]}:\nworkbook={filepath}, sheet={sheetname}, enable_protection={enable_protection}.")
         try:
-            wb = openpyxl.load_workbook(filepath)
-            ws = wb[sheetname]
-            ws.protection.sheet = enable_protection
+            self._check_sheet(filepath, sheetname)
             protect = 'enabled' if enable_protection else 'disabled'
-            if enable_protection and password:
-                ws.protection.password = password
-            wb.save(filepath)
-            wb.close()
-            self.log.info(f"Protection {protect} for {sheetname} in {filepath}.")
+            if not self._rewrite(filepath, _xlsx.set_sheet_protection, sheetname, enable_protection, password):
+                with self.session(filepath) as wb:
+                    ws = wb[sheetname]
+                    ws.protection.sheet = enable_protection
+                    if enable_protection and password:
+                        ws.protection.password = password
+            self.log.info("Protection %s for %s in %s.", protect, sheetname, filepath)
         except FileNotFoundError:
-            self.log.error(f"File '{filepath}' not found.")
+            self._fail(filepath, f"File '{filepath}' not found.")
         except PermissionError:
-            self.log.error(f"Permission error while accessing '{filepath}'.")
+            self._fail(filepath, f"Permission error while accessing '{filepath}'.")
+        except ValueError as e:
+            self._fail(filepath, e)
         except Exception as e:
-            self.log.error(f"Undefined Error: {e}.")
+            self._fail(filepath, f"Undefined Error: {e}.")
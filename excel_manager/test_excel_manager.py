@@ -1,8 +1,19 @@
+from concurrent.futures import ThreadPoolExecutor
+import io
+import os
+import tempfile
+import tracemalloc
 import unittest
+import zipfile
 import openpyxl
 import pandas as pd
 from pathlib import Path
 from excel_manager import ExcelManager
+from excel_manager import _cache
+from excel_manager import _export
+from excel_manager import _fingerprint
+from excel_manager import excel_manager
+from log_manager.metrics import registry
 
 
 class TestExcelManager(unittest.TestCase):
@@ -22,12 +33,200 @@ class TestExcelManager(unittest.TestCase):
         dataframe = self.obj.get_dataframe(workbook, sheet)
         self.assertIsInstance(dataframe, pd.DataFrame)
 
+    def test_get_dataframe_projection(self):
+        workbook = "test.xlsx"
+        sheet = "Sheet1"
+        dataframe = pd.DataFrame({"a": range(10), "b": range(10, 20), "c": range(20, 30)})
+        self.obj.overwrite_sheet(workbook, sheet, dataframe)
+        dataframe_test = self.obj.get_dataframe(
+            workbook, sheet, columns=["c", "a"], row_range=(2, 8),
+            dtypes={"a": "float64"}, predicate=lambda df: df["c"] % 2 == 0,
+        )
+        expected = dataframe.loc[[2, 4, 6], ["c", "a"]].astype({"a": "float64"}).reset_index(drop=True)
+        pd.testing.assert_frame_equal(expected, dataframe_test)
+
+    def test_get_dataframe_values_engine(self):
+        workbook = "test.xlsx"
+        sheet = "Sheet1"
+        dataframe = pd.DataFrame({
+            "a": [1, 2, 3], "b": ["x", "y", None], "c": [0.5, None, 2.5],
+            "d": pd.to_datetime(["2024-01-01", "2024-02-01", "2024-03-01"]),
+        })
+        self.obj.overwrite_sheet(workbook, sheet, dataframe)
+        expected = self.obj.get_dataframe(workbook, sheet, columns=list(dataframe.columns))
+        dataframe_test = self.obj.get_dataframe(workbook, sheet, engine="values")
+        self.assertTrue(expected.equals(dataframe_test))
+        dataframe_test = self.obj.get_dataframe(workbook, sheet, columns=["c", "a"], row_range=(1, 3), engine="values")
+        self.assertEqual(dataframe_test["a"].tolist(), [2, 3])
+
+    def test_get_dataframe_formulas(self):
+        workbook = "test.xlsx"
+        sheet = "Sheet1"
+        wb = openpyxl.Workbook()
+        wb.active.title = sheet
+        wb.active.append(["a", "b"])
+        for value in (1, 2, 3):
+            wb.active.append([value, f"=A{value + 1}+1"])
+        wb.save(workbook)
+        with zipfile.ZipFile(workbook) as zf:
+            members = {name: zf.read(name) for name in zf.namelist()}
+        xml = members["xl/worksheets/sheet1.xml"].decode()
+        for value in (1, 2, 3):
+            xml = xml.replace(f"<f>A{value + 1}+1</f><v />", f"<f>A{value + 1}+1</f><v>{value + 1}</v>")
+        members["xl/worksheets/sheet1.xml"] = xml.encode()
+        with zipfile.ZipFile(workbook, "w") as zf:
+            for name, data in members.items():
+                zf.writestr(name, data)
+
+        expected = [2, 3, 4]
+        self.assertEqual(self.obj.get_dataframe(workbook, sheet)["b"].tolist(), expected)
+        self.assertEqual(self.obj.get_dataframe(workbook, sheet, engine="values")["b"].tolist(), expected)
+        self.assertEqual(self.obj.get_dataframe(workbook, sheet, columns=["b"])["b"].tolist(), expected)
+        self.assertEqual(pd.concat(self.obj.iter_dataframes(workbook, sheet, chunksize=2))["b"].tolist(), expected)
+        self.assertEqual(self.obj.get_dataframes(workbook)[sheet]["b"].tolist(), expected)
+        with tempfile.TemporaryDirectory() as directory:
+            target = os.path.join(directory, "sheet.csv")
+            self.obj.export_sheet(workbook, sheet, target)
+            self.assertEqual(pd.read_csv(target)["b"].tolist(), expected)
+        counts = self.obj.upsert_dataframe(workbook, sheet, pd.DataFrame({"a": [1, 2, 3], "b": [2, 3, 4]}), ["b"])
+        self.assertEqual(counts["unchanged"], 3)
+
+    def test_get_dataframe_cache(self):
+        obj = ExcelManager(cache_size=1024 ** 2)
+        workbook = "test.xlsx"
+        sheet = "Sheet1"
+        dataframe = pd.DataFrame({"a": [1, 2, 3], "b": [4, 5, 6]})
+        obj.overwrite_sheet(workbook, sheet, dataframe)
+        cached = obj.get_dataframe(workbook, sheet)
+        cached["a"] = 0
+        self.assertTrue(dataframe.equals(obj.get_dataframe(workbook, sheet)))
+        self.assertEqual(1, obj.cache_info()["hits"])
+        obj.append_dataframe(workbook, sheet, dataframe)
+        self.assertEqual(6, len(obj.get_dataframe(workbook, sheet)))
+        self.assertEqual(1, obj.cache_info()["entries"])
+
+    @unittest.skipIf(_cache.feather is None, "pyarrow is not installed")
+    def test_get_dataframe_cache_dir(self):
+        workbook = "test.xlsx"
+        sheet = "Sheet1"
+        dataframe = pd.DataFrame({"a": [1, 2, 3], "b": ["x", "y", "z"]})
+        with tempfile.TemporaryDirectory() as cache_dir:
+            obj = ExcelManager(cache_dir=cache_dir)
+            obj.overwrite_sheet(workbook, sheet, dataframe)
+            obj.get_dataframe(workbook, sheet)
+            self.assertEqual([".feather"], [path.suffix for path in Path(cache_dir).iterdir()])
+            dataframe_test = ExcelManager(cache_dir=cache_dir).get_dataframe(workbook, sheet)
+            self.assertTrue(dataframe.equals(dataframe_test))
+
+            mixed = pd.DataFrame({"a": [1, "x", 2.5]})
+            obj.overwrite_sheet(workbook, sheet, mixed)
+            self.assertEqual(mixed["a"].tolist(), obj.get_dataframe(workbook, sheet)["a"].tolist())
+            self.assertEqual([], list(Path(cache_dir).iterdir()))
+
+    def test_iter_dataframes(self):
+        workbook = "test.xlsx"
+        sheet = "Sheet1"
+        dataframe = pd.DataFrame({"a": range(10), "b": [str(i) for i in range(10)]})
+        self.obj.overwrite_sheet(workbook, sheet, dataframe)
+        chunks = list(self.obj.iter_dataframes(workbook, sheet, chunksize=4))
+        self.assertEqual([4, 4, 2], [len(chunk) for chunk in chunks])
+        dataframe_test = pd.concat(chunks, ignore_index=True)
+        self.assertTrue(dataframe.equals(dataframe_test))
+
+    def test_iter_dataframes_blank_rows(self):
+        workbook = "test.xlsx"
+        sheet = "Sheet1"
+        wb = openpyxl.Workbook()
+        wb.active.title = sheet
+        for row in (["a"], [1], [None], [None], [2]):
+            wb.active.append(row)
+        for row in range(6, 5000):
+            wb.active.cell(row=row, column=1).number_format = "0.00"
+        wb.save(workbook)
+        chunks = list(self.obj.iter_dataframes(workbook, sheet, chunksize=2))
+        self.assertEqual([2, 2], [len(chunk) for chunk in chunks])
+        column = pd.concat(chunks, ignore_index=True)["a"]
+        self.assertEqual([False, True, True, False], column.isna().tolist())
+        self.assertEqual([1, 2], column.dropna().tolist())
+
+        tracemalloc.start()
+        try:
+            rows = ((None,) for _ in range(100000))
+            self.assertEqual([], list(excel_manager._chunk_rows(rows, 1, 1000)))
+            self.assertLess(tracemalloc.get_traced_memory()[1], 100000)
+        finally:
+            tracemalloc.stop()
+
+    def test_get_dataframes(self):
+        workbook = "test.xlsx"
+        dataframe = pd.DataFrame({"a": [1, 2, 3], "b": [4, 5, 6]})
+        self.obj.overwrite_sheet(workbook, "Sheet1", dataframe)
+        self.obj.overwrite_sheet(workbook, "Sheet2", dataframe * 2)
+        for max_workers in (None, 2):
+            dataframes = self.obj.get_dataframes(workbook, max_workers=max_workers)
+            self.assertEqual(["Sheet1", "Sheet2"], list(dataframes))
+            self.assertTrue(dataframe.equals(dataframes["Sheet1"]))
+            self.assertTrue((dataframe * 2).equals(dataframes["Sheet2"]))
+
+    def test_read_many(self):
+        workbook = "test.xlsx"
+        sheet = "Sheet1"
+        dataframe = pd.DataFrame({"a": [1, 2, 3], "b": [4, 5, 6]})
+        self.obj.overwrite_sheet(workbook, sheet, dataframe)
+        dataframes = self.obj.read_many([workbook, "missing.xlsx", workbook], sheet, max_workers=2)
+        self.assertEqual([3, 0, 3], [len(df) for df in dataframes])
+        self.assertTrue(dataframe.equals(dataframes[2]))
+        combined = self.obj.read_many([workbook, workbook], sheet, max_workers=2, concat=True)
+        self.assertEqual((6, 3), combined.shape)
+        self.assertEqual({workbook}, set(combined["source_file"]))
+
+    def test_inspect_workbook(self):
+        workbook = "test.xlsx"
+        dataframe = pd.DataFrame({"a": [1, 2, 3], "b": [4, 5, 6]})
+        self.obj.overwrite_sheet(workbook, "Sheet2", dataframe)
+        self.obj.modify_sheet_protection(workbook, "Sheet2", True, 'abc')
+        sheets = self.obj.inspect_workbook(workbook)
+        self.assertEqual(["Sheet1", "Sheet2"], [info["name"] for info in sheets])
+        self.assertEqual((4, 2), (sheets[1]["rows"], sheets[1]["columns"]))
+        self.assertEqual([False, True], [info["protected"] for info in sheets])
+        self.assertEqual("visible", sheets[0]["state"])
+
     def test_delete_sheet(self):
         workbook = "test.xlsx"
         sheet = "Sheet1"
         self.obj.delete_sheet(workbook, sheet)
         self.assertTrue(Path(workbook).is_file())
 
+    def test_delete_sheet_archive(self):
+        workbook = "test.xlsx"
+        openpyxl.Workbook().save(workbook)
+        wb = openpyxl.load_workbook(workbook)
+        for title in ("Sheet2", "Sheet3"):
+            wb.create_sheet(title)
+        wb.active = 2
+        wb.save(workbook)
+        with zipfile.ZipFile(workbook) as zf:
+            members = {name: zf.read(name) for name in zf.namelist()}
+        xml = members["xl/workbook.xml"].decode()
+        xml = xml.replace('firstSheet="0"', 'firstSheet="2"').replace("xmlns:r=", "xmlns:rel=").replace(" r:id=", " rel:id=")
+        members["xl/workbook.xml"] = xml.encode()
+        with zipfile.ZipFile(workbook, "w") as zf:
+            for name, data in members.items():
+                zf.writestr(name, data)
+
+        self.obj.delete_sheet(workbook, "Sheet")
+        with zipfile.ZipFile(workbook) as zf:
+            xml = zf.read("xl/workbook.xml").decode()
+        self.assertIn('firstSheet="0"', xml)
+        self.assertIn('activeTab="1"', xml)
+        wb = openpyxl.load_workbook(workbook)
+        self.assertEqual(["Sheet2", "Sheet3"], wb.sheetnames)
+        self.assertEqual("Sheet3", wb.active.title)
+
+        self.obj.delete_sheet(workbook, "Sheet2")
+        self.obj.delete_sheet(workbook, "Sheet3")
+        self.assertEqual(["Sheet3"], openpyxl.load_workbook(workbook).sheetnames)
+
     def test_create_sheet(self):
         workbook = "test.xlsx"
         sheet = "Sheet1"
@@ -41,6 +240,37 @@ class TestExcelManager(unittest.TestCase):
         self.obj.overwrite_sheet(workbook, sheet, dataframe)
         dataframe_test = self.obj.get_dataframe(workbook, sheet)
         self.assertTrue(dataframe.equals(dataframe_test))
+        self.assertEqual(["Sheet1", "Sheet2"], openpyxl.load_workbook(workbook).sheetnames)
+
+    def test_overwrite_sheet_single(self):
+        workbook = "test.xlsx"
+        sheet = "Data"
+        wb = openpyxl.Workbook()
+        wb.active.title = sheet
+        wb.save(workbook)
+        buffer = io.BytesIO()
+        wb.save(buffer)
+        for target in (workbook, buffer):
+            for dataframe in (pd.DataFrame({"a": [1, 2, 3]}), pd.DataFrame({"a": [4, 5]})):
+                self.obj.overwrite_sheet(target, sheet, dataframe)
+                self.assertTrue(dataframe.equals(self.obj.get_dataframe(target, sheet)))
+            self.assertEqual([sheet], openpyxl.load_workbook(target).sheetnames)
+
+    def test_overwrite_sheet_streaming(self):
+        workbook = "test.xlsx"
+        sheet = "Sheet1"
+        dataframe = pd.DataFrame({
+            "a": [1, 2, 3],
+            "b": [4.5, None, 6.5],
+            "c": ["x", "y & z", None],
+            "d": pd.date_range("2022-01-01", periods=3),
+        })
+        self.obj.overwrite_sheet(workbook, sheet, dataframe, streaming=True, chunksize=2)
+        wb = openpyxl.load_workbook(workbook)
+        self.assertEqual(["Sheet1", "Sheet2"], wb.sheetnames)
+        dataframe_test = self.obj.get_dataframe(workbook, sheet)
+        expected = self.obj.obj_date.timestamp_to_date(dataframe.copy())
+        pd.testing.assert_frame_equal(expected, dataframe_test, check_dtype=False)
 
     def test_reposition_sheet(self):
         workbook = "test.xlsx"
@@ -58,6 +288,138 @@ class TestExcelManager(unittest.TestCase):
         dataframe_test = dataframe_test.rename(columns={'Unnamed: 0': 'a', 'Unnamed: 1': 'b'})
         self.assertTrue(dataframe.equals(dataframe_test))
 
+    def test_append_dataframe_protected(self):
+        workbook = "test.xlsx"
+        sheet = "Sheet1"
+        dataframe = pd.DataFrame({"a": [1, 2, 3], "b": [4, 5, 6]})
+        self.obj.overwrite_sheet(workbook, sheet, dataframe)
+        self.obj.append_dataframe(workbook, sheet, dataframe, password='abc')
+        self.obj.append_dataframe(workbook, sheet, dataframe, password='abc')
+        dataframe_test = self.obj.get_dataframe(workbook, sheet)
+        self.assertTrue(pd.concat([dataframe] * 3, ignore_index=True).equals(dataframe_test))
+        wb = openpyxl.load_workbook(workbook)
+        self.assertTrue(wb[sheet].protection.sheet)
+
+    def test_upsert_dataframe(self):
+        workbook = "test.xlsx"
+        sheet = "Sheet1"
+        dataframe = pd.DataFrame({"id": [1, 2, 3], "value": ["a", "b", "c"]})
+        self.obj.overwrite_sheet(workbook, sheet, dataframe)
+        mtime = os.stat(workbook).st_mtime_ns
+        counts = self.obj.upsert_dataframe(workbook, sheet, dataframe, key_columns=["id"])
+        self.assertEqual(counts, {"inserted": 0, "updated": 0, "unchanged": 3, "deleted": 0})
+        self.assertEqual(os.stat(workbook).st_mtime_ns, mtime)
+        update = pd.DataFrame({"id": [3, 1, 4], "value": ["c", "z", "d"]})
+        counts = self.obj.upsert_dataframe(workbook, sheet, update, key_columns=["id"], delete_missing=True)
+        self.assertEqual(counts, {"inserted": 1, "updated": 1, "unchanged": 1, "deleted": 1})
+        dataframe_test = self.obj.get_dataframe(workbook, sheet)
+        self.assertEqual(dataframe_test["id"].tolist(), [1, 3, 4])
+        self.assertEqual(dataframe_test["value"].tolist(), ["z", "c", "d"])
+
+        counts = self.obj.upsert_dataframe(workbook, "New", dataframe, key_columns=["id"])
+        self.assertEqual(counts, {"inserted": 3, "updated": 0, "unchanged": 0, "deleted": 0})
+        self.assertTrue(dataframe.equals(self.obj.get_dataframe(workbook, "New")))
+        self.assertEqual({}, self.obj.upsert_dataframe(workbook, "Invalid/Name", dataframe, key_columns=["id"]))
+        self.assertEqual(["Sheet1", "Sheet2", "New"], openpyxl.load_workbook(workbook).sheetnames)
+
+    def test_sheet_changed(self):
+        workbook = "test.xlsx"
+        sheet = "Sheet1"
+        dataframe = pd.DataFrame({"a": [1, 2, 3], "b": ["x", "y", "z"]})
+        obj = ExcelManager(track_fingerprints=True)
+        self.assertTrue(obj.sheet_changed(workbook, sheet, dataframe))
+        obj.overwrite_sheet(workbook, sheet, dataframe)
+        self.assertFalse(obj.sheet_changed(workbook, sheet, dataframe))
+        self.assertTrue(obj.sheet_changed(workbook, sheet, dataframe.assign(a=[1, 2, 4])))
+        mtime = os.stat(workbook).st_mtime_ns
+        obj.overwrite_sheet(workbook, sheet, dataframe.copy())
+        self.assertEqual(os.stat(workbook).st_mtime_ns, mtime)
+        obj.append_dataframe(workbook, sheet, dataframe)
+        self.assertTrue(obj.sheet_changed(workbook, sheet, dataframe))
+
+        buffer = io.BytesIO()
+        obj.overwrite_sheet(buffer, sheet, dataframe)
+        with self.assertNoLogs("ExcelManager", level="ERROR"):
+            self.assertTrue(obj.sheet_changed(buffer, sheet, dataframe))
+
+        aware = pd.DataFrame({
+            "t": pd.date_range("2024-01-01", periods=3, tz="Europe/Paris"),
+            "n": pd.array([1, None, 3], dtype="Int64"),
+        })
+        self.assertEqual(_fingerprint.fingerprint(aware), _fingerprint.fingerprint(aware.copy(deep=True)))
+        self.assertNotEqual(
+            _fingerprint.fingerprint(aware), _fingerprint.fingerprint(aware.assign(t=aware["t"] + pd.Timedelta(1))))
+
+    def test_export_sheet(self):
+        workbook = "test.xlsx"
+        sheet = "Sheet1"
+        dataframe = pd.DataFrame({"a": list(range(25)), "b": ["x"] * 25})
+        self.obj.overwrite_sheet(workbook, sheet, dataframe)
+        with tempfile.TemporaryDirectory() as directory:
+            target = str(Path(directory) / "sheet.csv")
+            self.assertEqual(self.obj.export_sheet(workbook, sheet, target, chunksize=10), 25)
+            self.assertTrue(dataframe.equals(pd.read_csv(target)))
+            self.assertIsNone(self.obj.export_sheet(workbook, sheet, str(Path(directory) / "sheet.txt")))
+
+    @unittest.skipIf(_export.pa is None, "pyarrow is not installed")
+    def test_export_sheet_type_change(self):
+        workbook = "test.xlsx"
+        sheet = "Sheet1"
+        dataframe = pd.DataFrame({
+            "a": list(range(12)) + [1.5, None, 3.5],
+            "b": [None] * 12 + ["x", "y", "z"],
+        })
+        self.obj.overwrite_sheet(workbook, sheet, dataframe)
+        with tempfile.TemporaryDirectory() as directory:
+            for format in ("parquet", "feather"):
+                target = str(Path(directory) / f"sheet.{format}")
+                self.assertEqual(self.obj.export_sheet(workbook, sheet, target, chunksize=5), 15)
+                exported = pd.read_parquet(target) if format == "parquet" else pd.read_feather(target)
+                self.assertEqual("float64", str(exported["a"].dtype))
+                self.assertEqual(dataframe["a"].tolist()[:13], exported["a"].tolist()[:13])
+                self.assertTrue(pd.isna(exported["a"][13]))
+                self.assertEqual(["x", "y", "z"], exported["b"].tolist()[12:])
+                self.assertTrue(exported["b"][:12].isna().all())
+
+    def test_in_memory_workbook(self):
+        sheet = "Sheet1"
+        dataframe = pd.DataFrame({"a": [1, 2, 3], "b": ["x", "y", "z"]})
+        buffer = io.BytesIO()
+        self.obj.overwrite_sheet(buffer, sheet, dataframe)
+        self.obj.append_dataframe(buffer, sheet, dataframe, password='abc')
+        self.assertEqual([info["name"] for info in self.obj.inspect_workbook(buffer)], [sheet])
+        dataframe_test = self.obj.get_dataframe(buffer.getvalue(), sheet)
+        self.assertTrue(pd.concat([dataframe] * 2, ignore_index=True).equals(dataframe_test))
+        content = buffer.getvalue()
+        self.obj.create_sheet(content, "Sheet2")
+        self.assertEqual(content, buffer.getvalue())
+
+    def test_metrics(self):
+        workbook = "test.xlsx"
+        sheet = "Sheet1"
+        registry.reset()
+        dataframe = pd.DataFrame({"a": range(10), "b": range(10)})
+        self.obj.overwrite_sheet(workbook, sheet, dataframe)
+        self.obj.get_dataframe(workbook, sheet)
+        snapshot = registry.snapshot()
+        self.assertEqual(snapshot["counters"]['excel_rows_written_total{operation="overwrite_sheet"}'], 10)
+        self.assertEqual(snapshot["counters"]["excel_rows_read_total"], 10)
+        self.assertEqual(snapshot["counters"]["excel_bytes_written_total"], os.path.getsize(workbook))
+        self.assertEqual(snapshot["histograms"]['excel_save_seconds{operation="session"}']["count"], 1)
+        self.assertEqual(snapshot["histograms"]['excel_load_seconds{operation="get_dataframe"}']["count"], 1)
+
+    def test_queue_append(self):
+        workbook = "test.xlsx"
+        sheet = "Sheet1"
+        dataframe = pd.DataFrame({"a": [1, 2, 3], "b": [4, 5, 6]})
+        self.obj.overwrite_sheet(workbook, sheet, dataframe)
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = list(executor.map(
+                lambda _: self.obj.queue_append(workbook, sheet, dataframe), range(8)))
+        self.obj.flush(workbook)
+        self.assertTrue(all(future.result() for future in futures))
+        self.assertEqual(27, len(self.obj.get_dataframe(workbook, sheet)))
+
     def test_modify_sheet_protection(self):
         workbook = "test.xlsx"
         sheet = "Sheet1"
@@ -68,6 +430,28 @@ class TestExcelManager(unittest.TestCase):
         self.obj.modify_sheet_protection(workbook, sheet, False)
         self.assertTrue(ws.protection.sheet)
 
+    def test_session(self):
+        workbook = "test.xlsx"
+        sheet = "Sheet2"
+        dataframe = pd.DataFrame({"a": [1, 2, 3], "b": [4, 5, 6]})
+        with self.obj.session(workbook):
+            self.obj.overwrite_sheet(workbook, sheet, dataframe)
+            self.obj.reposition_sheet(workbook, sheet)
+            self.obj.modify_sheet_protection(workbook, sheet, True, 'abc')
+        wb = openpyxl.load_workbook(workbook)
+        self.assertEqual(sheet, wb.sheetnames[0])
+        self.assertTrue(wb[sheet].protection.sheet)
+        dataframe_test = self.obj.get_dataframe(workbook, sheet)
+        self.assertTrue(dataframe.equals(dataframe_test))
+
+    def test_session_rollback(self):
+        workbook = "test.xlsx"
+        with self.obj.session(workbook):
+            self.obj.delete_sheet(workbook, "Sheet1")
+            self.obj.delete_sheet(workbook, "Missing")
+        wb = openpyxl.load_workbook(workbook)
+        self.assertEqual(["Sheet1", "Sheet2"], wb.sheetnames)
+
 
 if __name__ == '__main__':
     unittest.main()
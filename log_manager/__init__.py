@@ -5,6 +5,7 @@
 Modules exported by this package:
 
 - `log_manager`: Provide several frequently used logs operations.
+- `metrics`: Record counters, gauges and latency histograms and report them.
 """
 
-from log_manager.log_manager import LogManager  # noqa: F401
+from log_manager.log_manager import LogManager, traced  # noqa: F401
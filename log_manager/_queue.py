@@ -0,0 +1,152 @@
+# log_manager/_queue.py
+
+"""Queue-based handlers moving log I/O off the logging threads.
+
+An `AsyncHandler` only puts records in a bounded queue; a listener thread
+takes them in batches, hands them to the target handlers and flushes the
+targets once per batch. A `BufferedFileHandler` target writes without
+flushing, so a batch costs one flush of the file instead of one per record.
+"""
+
+import logging
+import logging.handlers
+import queue
+import threading
+
+
+OVERFLOW_POLICIES = ("block", "drop_oldest", "drop_debug")
+
+_STOP = object()
+
+
+class BufferedFileHandler(logging.FileHandler):
+    """A file handler leaving the flushes to its caller."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+class AsyncHandler(logging.handlers.QueueHandler):
+    """A handler putting records in a bounded queue drained by a listener thread.
+
+    When the queue is full, `block` waits for room, `drop_oldest` drops the
+    oldest queued record and `drop_debug` drops debug records while other
+    records wait for room.
+    """
+
+    def __init__(
+            self, targets: tuple, queue_size: int = 10000, overflow: str = "block",
+            batch_size: int = 500) -> None:
+        """
+        Args:
+            targets: The handlers the records are handed to.
+            queue_size: The maximum number of queued records.
+            overflow: One of `block`, `drop_oldest` or `drop_debug`.
+            batch_size: The maximum number of records handled between two flushes.
+
+        Raises:
+            ValueError: If the overflow policy is not supported.
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Overflow policy '{overflow}' not supported, use one of {list(OVERFLOW_POLICIES)}.")
+        super().__init__(queue.Queue(queue_size))
+        self.targets = tuple(targets)
+        self.overflow = overflow
+        self.batch_size = batch_size
+        self._counts = {"dropped": 0, "written": 0, "batches": 0, "max_depth": 0}
+        self._counts_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._listen, name="LogManagerListener", daemon=True)
+        self._thread.start()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Merge the arguments into the message, leaving the formatting to the listener.
+
+        The record is not copied, so the calling thread only pays for the merge.
+        """
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.overflow == "block" or (self.overflow == "drop_debug" and record.levelno > logging.DEBUG):
+            self.queue.put(record)
+        else:
+            while True:
+                try:
+                    self.queue.put_nowait(record)
+                    break
+                except queue.Full:
+                    if self.overflow == "drop_debug":
+                        with self._counts_lock:
+                            self._counts["dropped"] += 1
+                        return
+                try:
+                    self.queue.get_nowait()
+                    self.queue.task_done()
+                except queue.Empty:
+                    continue
+                with self._counts_lock:
+                    self._counts["dropped"] += 1
+        depth = len(self.queue.queue)
+        if depth > self._counts["max_depth"]:
+            self._counts["max_depth"] = depth
+
+    def _listen(self) -> None:
+        """Hand the queued records to the targets in batches until stopped."""
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            records = [record for record in batch if record is not _STOP]
+            for record in records:
+                for target in self.targets:
+                    if record.levelno >= target.level:
+                        target.handle(record)
+            for target in self.targets:
+                target.flush()
+            with self._counts_lock:
+                self._counts["written"] += len(records)
+                self._counts["batches"] += 1
+            for _ in batch:
+                self.queue.task_done()
+            if len(records) < len(batch):
+                return
+
+    def flush(self) -> None:
+        """Wait until the queued records are written and flushed."""
+        if self._thread.is_alive() and threading.current_thread() is not self._thread:
+            self.queue.join()
+
+    def close(self) -> None:
+        """Write the queued records and stop the listener thread."""
+        if self._thread.is_alive() and threading.current_thread() is not self._thread:
+            self.queue.put(_STOP)
+            self._thread.join()
+        super().close()
+
+    def stats(self) -> dict:
+        """Return the queue depth and the counts of enqueued, dropped and written records.
+
+        The largest depth is sampled without locking, so it may miss a record under
+        contention.
+        """
+        with self._counts_lock:
+            counts = dict(self._counts)
+        counts["queue_depth"] = self.queue.qsize()
+        counts["enqueued"] = counts["written"] + counts["queue_depth"]
+        if self.overflow == "drop_oldest":
+            counts["enqueued"] += counts["dropped"]
+        counts["queue_size"] = self.queue.maxsize
+        counts["overflow"] = self.overflow
+        return counts
@@ -0,0 +1,204 @@
+# log_manager/_rotation.py
+
+"""Log file rotation with background compression, and a JSON-lines formatter.
+
+A `RotatingFileHandler` renames its file to a timestamped segment when the
+file reaches a size or an age, and opens a new one. The segment is handed to a
+single compressor thread, which gzips it and deletes the segments beyond the
+retention count, so the logging call only pays for a rename.
+"""
+
+from datetime import datetime
+import glob
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import re
+import shutil
+import threading
+import time
+
+
+_STAMP = "%Y%m%d-%H%M%S-%f"
+_SEGMENT = re.compile(r"\.(\d{8}-\d{6}-\d{6})(?:-(\d+))?(?:\.gz)?")
+
+_tasks = queue.Queue()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """A formatter writing each record as one JSON object per line.
+
+    The objects hold the `time` in ISO 8601 with the local offset, the `level`,
+    the `logger`, the `message` and, when there is one, the `exception`.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created).astimezone().isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def segments(path: str) -> list:
+    """Return the rotated segments of a log file, oldest first."""
+    found = []
+    for name in glob.glob(glob.escape(path) + ".*"):
+        match = _SEGMENT.fullmatch(name[len(path):])
+        if match:
+            found.append(((match.group(1), int(match.group(2) or 0)), name))
+    return [name for _, name in sorted(found)]
+
+
+def _compress(segment: str) -> None:
+    """Gzip a segment next to itself and remove the uncompressed one."""
+    temp = f"{segment}.gz.tmp"
+    with open(segment, "rb") as source, gzip.open(temp, "wb") as target:
+        shutil.copyfileobj(source, target, 1024 * 1024)
+    os.replace(temp, f"{segment}.gz")
+    os.remove(segment)
+
+
+def _prune(path: str, backup_count: int) -> None:
+    """Delete the oldest segments of a log file beyond the retention count."""
+    old = segments(path)
+    for segment in old[:max(len(old) - backup_count, 0)]:
+        try:
+            os.remove(segment)
+        except FileNotFoundError:
+            pass
+
+
+def _work() -> None:
+    while True:
+        segment, path, compress, backup_count = _tasks.get()
+        try:
+            if compress:
+                _compress(segment)
+            if backup_count:
+                _prune(path, backup_count)
+        except OSError as e:
+            logging.lastResort.handle(logging.makeLogRecord(
+                {"msg": f"Log segment {segment} not compressed: {e}.", "levelno": logging.WARNING,
+                 "levelname": "WARNING"}))
+        finally:
+            _tasks.task_done()
+
+
+def _submit(segment: str, path: str, compress: bool, backup_count: int) -> None:
+    """Queue a segment for the compressor thread, starting it on first use."""
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=_work, name="LogManagerCompressor", daemon=True)
+            _worker.start()
+    _tasks.put((segment, path, compress, backup_count))
+
+
+def wait() -> None:
+    """Wait until the queued segments are compressed and pruned."""
+    if _worker is not None and _worker.is_alive():
+        _tasks.join()
+
+
+class RotatingFileHandler(logging.handlers.BaseRotatingHandler):
+    """A file handler rotating its file by size and by age.
+
+    The size is counted from the formatted records rather than asked to the
+    file, so it is checked without a system call. Segments are named after the
+    time of the rotation, to the microsecond, such as `app.log.20240101-120000-000123.gz`.
+    """
+
+    def __init__(
+            self, filename: str, max_bytes: int = 0, rotate_seconds: float = 0,
+            backup_count: int = 5, compress: bool = True, buffered: bool = False) -> None:
+        """
+        Args:
+            filename: The path of the log file.
+            max_bytes: The size the file is rotated at, no limit with 0.
+            rotate_seconds: The age the file is rotated at, no limit with 0.
+            backup_count: The number of segments kept, all of them with 0.
+            compress: Whether the segments are gzipped.
+            buffered: Whether the records are written without a flush, left to the caller.
+        """
+        super().__init__(filename, "a", encoding="utf-8")
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.backup_count = backup_count
+        self.compress = compress
+        self.buffered = buffered
+        self._size = os.path.getsize(self.baseFilename) if os.path.exists(self.baseFilename) else 0
+        self._rollover_at = self._started() + rotate_seconds if rotate_seconds else None
+
+    def _started(self) -> float:
+        """Return when the current file was started, so its age survives a restart of the process.
+
+        That is its creation time where the platform records it, else the time of
+        the last rotation, else its last modification, and now for a new file.
+        """
+        try:
+            stat = os.stat(self.baseFilename)
+        except OSError:
+            return time.time()
+        created = getattr(stat, "st_birthtime", None)
+        if created:
+            return created
+        previous = segments(self.baseFilename)
+        if previous:
+            stamp = _SEGMENT.fullmatch(previous[-1][len(self.baseFilename):]).group(1)
+            return datetime.strptime(stamp, _STAMP).timestamp()
+        return stat.st_mtime
+
+    def shouldRollover(self, record: logging.LogRecord, size: int = 0) -> bool:
+        if self._rollover_at is not None and record.created >= self._rollover_at:
+            return True
+        return bool(self.max_bytes) and self._size > 0 and self._size + size > self.max_bytes
+
+    def doRollover(self) -> None:
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+        stamp = f"{self.baseFilename}.{datetime.now().strftime(_STAMP)}"
+        segment = stamp
+        number = 0
+        while os.path.exists(segment) or os.path.exists(f"{segment}.gz"):
+            number += 1
+            segment = f"{stamp}-{number}"
+        if os.path.exists(self.baseFilename):
+            os.replace(self.baseFilename, segment)
+            _submit(segment, self.baseFilename, self.compress, self.backup_count)
+        self.stream = self._open()
+        self._size = 0
+        if self.rotate_seconds:
+            self._rollover_at = time.time() + self.rotate_seconds
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            message = self.format(record) + self.terminator
+            size = len(message.encode("utf-8")) if not message.isascii() else len(message)
+            if self.shouldRollover(record, size):
+                self.doRollover()
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(message)
+            self._size += size
+            if not self.buffered:
+                self.flush()
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
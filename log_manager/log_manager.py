@@ -13,99 +13,499 @@ Examples:
     >>> log_manager.warning("Important message.")
     >>> log_manager.critical("Critical Issue occurred.")
 
+    >>> # managers sharing a file, level and format share their handlers.
+    >>> other = LogManager(log_name='Other')
+    >>> log_manager.flush()
+
+    >>> # queue the records and write them from a background thread.
+    >>> fast = LogManager(log_name='Fast', asynchronous=True, queue_size=10000, overflow='drop_debug')
+    >>> fast.stats()
+
+    >>> # switch the managers created afterwards, e.g. those of ExcelManager, to queued logging.
+    >>> from log_manager.log_manager import configure
+    >>> configure(asynchronous=True, overflow='drop_oldest')
+
+    >>> # messages are formatted only if their level is enabled.
+    >>> log_manager.debug("%d rows read from %s.", 1000, "test.xlsx")
+
+    >>> # log the calls of the methods of a class holding a LogManager in `log`.
+    >>> from log_manager import traced
+    >>> class Mailer:
+    ...     def __init__(self):
+    ...         self.log = LogManager(log_name='Mailer')
+    ...     @traced("sender", "password")
+    ...     def send(self, sender, password):
+    ...         return True
+    >>> Mailer().send("abc@xyz.com", "abcd1234")  # logs send:\nsender='abc@xyz.com', password='***'.
+
+    >>> # rotate the file at 100 MB or daily, keeping 10 gzipped segments.
+    >>> worker = LogManager(log_name='Worker', max_bytes=100 * 1024 ** 2, rotate_seconds=86400, backup_count=10)
+
+    >>> # write one JSON object per line instead of formatted text.
+    >>> structured = LogManager(log_file='./structured.log', log_name='Structured', log_format='json')
+
+    >>> # flush and close every handler, e.g. before the process exits.
+    >>> from log_manager.log_manager import shutdown
+    >>> shutdown()
+
 
 The module contains the following methods:
 
-- `__init__(log_file, log_level, log_name)` - creates the instance of the class.
-- `info(msg)` - logs the informational message.
-- `error(msg)` - logs the error message.
-- `warning(msg)` - logs the warning message.
-- `debug(msg)` - logs the debug message.
-- `critical(msg)` - logs the critical message.
+- `__init__(log_file, log_level, log_name, log_format, asynchronous, queue_size, overflow, max_bytes, rotate_seconds, backup_count, compress)` - creates the instance of the class.
+- `info(msg, *args)` - logs the informational message.
+- `error(msg, *args)` - logs the error message.
+- `warning(msg, *args)` - logs the warning message.
+- `debug(msg, *args)` - logs the debug message.
+- `critical(msg, *args)` - logs the critical message.
+- `flush()` - flushes the handlers of the logger, waiting for queued records.
+- `stats()` - returns the queue depth and record counts of a queued logger.
+- `configure(asynchronous, queue_size, overflow, max_bytes, rotate_seconds, backup_count, compress)` - sets the defaults of the managers created afterwards.
+- `shutdown()` - flushes, closes and forgets every shared handler.
+- `traced(*arguments, level, redact)` - decorates a method to log its calls, arguments and duration.
 """
 
+from typing import Callable
+import atexit
+import functools
+import inspect
 import logging
+import os
+import reprlib
+import threading
+import time
+from log_manager import _rotation
+from log_manager._queue import OVERFLOW_POLICIES, AsyncHandler, BufferedFileHandler
+from log_manager._rotation import JsonFormatter, RotatingFileHandler
+
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+JSON_FORMAT = 'json'
+
+_handlers = {}
+_handlers_lock = threading.Lock()
+_defaults = {
+    "asynchronous": False, "queue_size": 10000, "overflow": "block",
+    "max_bytes": 0, "rotate_seconds": 0, "backup_count": 5, "compress": True,
+}
+_ROTATION = ("max_bytes", "rotate_seconds", "backup_count", "compress")
+
+REDACTED = frozenset({"password", "sender_credentials", "credentials", "token", "secret"})
+
+_repr = reprlib.Repr()
+_repr.maxstring = 200
+_repr.maxother = 200
+
+
+def _shared_handler(key: tuple, factory) -> logging.Handler:
+    """Return the handler registered under a key, creating it on first use."""
+    with _handlers_lock:
+        handler = _handlers.get(key)
+        if handler is None:
+            handler = _handlers[key] = factory()
+        return handler
+
+
+def _destinations(key: tuple) -> set:
+    """Return where the handler registered under a key writes: its file, the console or both."""
+    kind, path = key[:2]
+    if kind == "console":
+        return {None}
+    if kind == "async":
+        return {path, None}
+    return {path}
+
+
+def _formatter(log_format: str) -> logging.Formatter:
+    """Return the formatter of a log format, JSON lines for `json`."""
+    return JsonFormatter() if log_format == JSON_FORMAT else logging.Formatter(log_format)
+
+
+def _file_handler(
+        log_file: str, log_level: int, log_format: str, buffered: bool = False,
+        rotation: dict = None) -> logging.Handler:
+    """Return the shared handler writing to a log file with a level and a format.
+
+    A buffered handler does not flush after each record, see `BufferedFileHandler`.
+    The file is rotated when the rotation settings set a size or an age; the
+    settings are those of the first manager of the file, level and format.
+    """
+    path = os.path.abspath(log_file)
+
+    def factory():
+        if rotation and (rotation["max_bytes"] or rotation["rotate_seconds"]):
+            handler = RotatingFileHandler(path, buffered=buffered, **rotation)
+        else:
+            handler = BufferedFileHandler(path) if buffered else logging.FileHandler(path)
+        handler.setLevel(log_level)
+        handler.setFormatter(_formatter(log_format))
+        return handler
+
+    return _shared_handler(("buffered" if buffered else "file", path, log_level, log_format), factory)
+
+
+def _rotation_of(handler: logging.Handler) -> dict:
+    """Return the rotation settings of a file handler, None if it does not rotate."""
+    if isinstance(handler, RotatingFileHandler):
+        return {name: getattr(handler, name) for name in _ROTATION}
+    return None
+
+
+def _console_handler(log_level: int, log_format: str) -> logging.Handler:
+    """Return the shared handler writing to the console with a level and a format."""
+    def factory():
+        handler = logging.StreamHandler()
+        handler.setLevel(log_level)
+        handler.setFormatter(_formatter(log_format))
+        return handler
+
+    return _shared_handler(("console", None, log_level, log_format), factory)
+
+
+def _async_handler(
+        log_file: str, log_level: int, log_format: str, queue_size: int, overflow: str,
+        rotation: dict = None) -> logging.Handler:
+    """Return the shared handler queueing the records of a log file for a listener thread.
+
+    The queue size and the overflow policy are those of the first manager of the
+    file, level and format.
+    """
+    targets = (_file_handler(log_file, log_level, log_format, buffered=True, rotation=rotation),
+               _console_handler(log_level, log_format))
+
+    def factory():
+        handler = AsyncHandler(targets, queue_size, overflow)
+        handler.setLevel(log_level)
+        return handler
+
+    return _shared_handler(("async", os.path.abspath(log_file), log_level, log_format), factory)
+
+
+def configure(
+        asynchronous: bool = None, queue_size: int = None, overflow: str = None, max_bytes: int = None,
+        rotate_seconds: float = None, backup_count: int = None, compress: bool = None) -> None:
+    """Set the logging mode of the managers created without one afterwards.
+
+    Args:
+        asynchronous: Whether records are queued and written by a listener thread.
+        queue_size: The maximum number of queued records.
+        overflow: What happens when the queue is full: `block` waits for room,
+            `drop_oldest` drops the oldest record and `drop_debug` drops debug records.
+        max_bytes: The size log files are rotated at, 0 for no limit.
+        rotate_seconds: The age log files are rotated at, 0 for no limit.
+        backup_count: The number of rotated segments kept, 0 to keep them all.
+        compress: Whether rotated segments are gzipped in a background thread.
+
+    Raises:
+        ValueError: If the overflow policy is not supported.
+    """
+    if overflow is not None and overflow not in OVERFLOW_POLICIES:
+        raise ValueError(f"Overflow policy '{overflow}' not supported, use one of {list(OVERFLOW_POLICIES)}.")
+    settings = {
+        "asynchronous": asynchronous, "queue_size": queue_size, "overflow": overflow, "max_bytes": max_bytes,
+        "rotate_seconds": rotate_seconds, "backup_count": backup_count, "compress": compress,
+    }
+    for name, value in settings.items():
+        if value is not None:
+            _defaults[name] = value
+
+
+def registered_handlers() -> int:
+    """Return the number of handlers in the process-wide registry."""
+    with _handlers_lock:
+        return len(_handlers)
+
+
+def shutdown() -> None:
+    """Flush and close every shared handler and detach it from the loggers.
+
+    Queued records are written first, and the rotated segments are compressed
+    before it returns. Handlers whose stream was already closed elsewhere, such
+    as a console stream closed by a test runner, are skipped. Managers created
+    afterwards register new handlers. Called when the process exits.
+    """
+    with _handlers_lock:
+        handlers = sorted(_handlers.values(), key=lambda handler: not isinstance(handler, AsyncHandler))
+        _handlers.clear()
+    loggers = [logging.getLogger()] + [
+        logger for logger in logging.Logger.manager.loggerDict.values() if isinstance(logger, logging.Logger)
+    ]
+    for logger in loggers:
+        for handler in handlers:
+            if handler in logger.handlers:
+                logger.removeHandler(handler)
+    for handler in handlers:
+        try:
+            handler.flush()
+            handler.close()
+        except (OSError, ValueError):
+            pass
+    _rotation.wait()
+
+
+atexit.register(shutdown)
+
+
+def _describe(value) -> str:
+    """Return a short description of an argument for the logs.
+
+    Dataframes and arrays are described by their shape and bytes by their size,
+    so their content is never formatted; other values are shortened reprs.
+    """
+    shape = getattr(value, "shape", None)
+    if isinstance(shape, tuple):
+        return f"{type(value).__name__}{shape}"
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return f"<{len(value)} bytes>"
+    if hasattr(value, "read") and hasattr(value, "seek"):
+        return f"<{type(value).__name__}>"
+    return _repr.repr(value)
+
+
+class _Arguments:
+    """The arguments of a call, formatted only when a handler writes the record."""
+
+    __slots__ = ("names", "values", "redact")
+
+    def __init__(self, names: tuple, values: tuple, redact: frozenset) -> None:
+        self.names = names
+        self.values = values
+        self.redact = redact
+
+    def __str__(self) -> str:
+        return ", ".join(
+            f"{name}='***'" if name in self.redact and value is not None else f"{name}={_describe(value)}"
+            for name, value in zip(self.names, self.values))
+
+
+def traced(*arguments: str, level: int = logging.INFO, redact: frozenset = REDACTED) -> Callable:
+    """Decorate a method to log its calls, chosen arguments and duration.
+
+    The method must belong to an object holding a `LogManager` in its `log`
+    attribute. The call and its duration are logged at the given level with lazy
+    formatting; when the level is disabled, the wrapper only checks the level.
+    The parameters are looked up once, when the method is decorated. The
+    duration of a generator method runs until it is exhausted or closed.
+
+    Args:
+        *arguments: The names of the arguments to log, all but `self` if none.
+        level: The logging level of the records.
+        redact: The names of the arguments whose values are replaced by `***`.
+
+    Returns:
+        Callable: The decorator.
+    """
+    def decorator(method: Callable) -> Callable:
+        parameters = list(inspect.signature(method).parameters.values())[1:]
+        names = arguments or tuple(parameter.name for parameter in parameters)
+        positions = {parameter.name: index for index, parameter in enumerate(parameters)}
+        defaults = {parameter.name: parameter.default for parameter in parameters
+                    if parameter.default is not inspect.Parameter.empty}
+        unknown = [name for name in names if name not in positions]
+        if unknown:
+            raise ValueError(f"{method.__qualname__} has no arguments {unknown}.")
+        name = method.__name__
+
+        def log_call(logger: logging.Logger, args: tuple, kwargs: dict) -> None:
+            values = tuple(
+                args[positions[argument]] if positions[argument] < len(args)
+                else kwargs.get(argument, defaults.get(argument))
+                for argument in names)
+            logger.log(level, "%s:\n%s.", name, _Arguments(names, values, redact))
+
+        if inspect.isgeneratorfunction(method):
+            @functools.wraps(method)
+            def wrapper(self, *args, **kwargs):
+                logger = self.log.logger
+                if not logger.isEnabledFor(level):
+                    return (yield from method(self, *args, **kwargs))
+                log_call(logger, args, kwargs)
+                start = time.perf_counter()
+                try:
+                    return (yield from method(self, *args, **kwargs))
+                finally:
+                    logger.log(level, "%s done in %.3f s.", name, time.perf_counter() - start)
+
+            return wrapper
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            logger = self.log.logger
+            if not logger.isEnabledFor(level):
+                return method(self, *args, **kwargs)
+            log_call(logger, args, kwargs)
+            start = time.perf_counter()
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                logger.log(level, "%s done in %.3f s.", name, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
 
 
 class LogManager:
-    def __init__(self, log_file: str = './Custom-Python_Tools.log', log_level: int = logging.DEBUG, log_name: str = 'LogManager') -> None:
+    def __init__(
+            self, log_file: str = './Custom-Python_Tools.log', log_level: int = logging.DEBUG,
+            log_name: str = 'LogManager', log_format: str = LOG_FORMAT, asynchronous: bool = None,
+            queue_size: int = None, overflow: str = None, max_bytes: int = None, rotate_seconds: float = None,
+            backup_count: int = None, compress: bool = None) -> None:
         """
         Initialize the LogManager class.
 
+        Handlers are kept in a process-wide registry keyed by file, level and
+        format, and a logger gets each handler once. Creating many managers
+        therefore opens each log file once and writes every line once. A logger
+        writes to a file or the console through one handler only: the handlers
+        of an earlier manager of the same logger writing there, with another
+        level, format or mode, are replaced, as the logger level is.
+
+        In asynchronous mode the logging calls only queue the records, and a
+        listener thread writes them in batches with one flush per batch.
+
+        With a size or an age limit, the file is renamed to a timestamped segment
+        when it reaches it, such as `app.log.20240101-120000-000123`, and a new file is
+        started. A background thread gzips the segment and deletes the oldest ones
+        beyond `backup_count`, so logging never waits for the compression. The
+        rotation settings are those of the first manager opening the file with a
+        level and a format: a later manager sharing its handler with other
+        settings keeps the handler as it is and logs a warning.
+
         Args:
             log_file: The name of the log file.
             log_level: The logging level.
             log_name: The logging name.
+            log_format: The format of the log lines, or `json` for one JSON object
+                per line with the time, level, logger, message and exception.
+            asynchronous: Whether records are queued and written by a listener
+                thread, the default set with `configure` if None.
+            queue_size: The maximum number of queued records.
+            overflow: What happens when the queue is full: `block`, `drop_oldest`
+                or `drop_debug`.
+            max_bytes: The size the file is rotated at, 0 for no limit.
+            rotate_seconds: The age, in seconds, the file is rotated at, 0 for no limit.
+            backup_count: The number of rotated segments kept, 0 to keep them all.
+            compress: Whether rotated segments are gzipped.
+
+        Raises:
+            ValueError: If the overflow policy is not supported.
         """
         self.log_file = log_file
         self.log_level = log_level
+        self.asynchronous = _defaults["asynchronous"] if asynchronous is None else asynchronous
         self.logger = logging.getLogger(log_name)
         self.logger.setLevel(self.log_level)
 
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        settings = {"max_bytes": max_bytes, "rotate_seconds": rotate_seconds, "backup_count": backup_count,
+                    "compress": compress}
+        rotation = {name: _defaults[name] if settings[name] is None else settings[name] for name in _ROTATION}
+        if self.asynchronous:
+            handlers = (_async_handler(
+                self.log_file, self.log_level, log_format, queue_size or _defaults["queue_size"],
+                overflow or _defaults["overflow"], rotation),)
+        else:
+            handlers = (_file_handler(self.log_file, self.log_level, log_format, rotation=rotation),
+                        _console_handler(self.log_level, log_format))
+        file_handler = handlers[0].targets[0] if self.asynchronous else handlers[0]
+        ignored = (rotation["max_bytes"] or rotation["rotate_seconds"]) and _rotation_of(file_handler) != rotation
+        with _handlers_lock:
+            keys = {handler: key for key, handler in _handlers.items()}
+        wanted = set().union(*(_destinations(keys[handler]) for handler in handlers))
+        for handler in list(self.logger.handlers):
+            key = keys.get(handler)
+            if key is not None and handler not in handlers and _destinations(key) & wanted:
+                self.logger.removeHandler(handler)
+        for handler in handlers:
+            if handler not in self.logger.handlers:
+                self.logger.addHandler(handler)
+        if ignored:
+            self.logger.warning(
+                "Rotation settings %s ignored, %s is already open with %s.",
+                rotation, file_handler.baseFilename, _rotation_of(file_handler) or "no rotation")
 
-        file_handler = logging.FileHandler(self.log_file)
-        file_handler.setLevel(self.log_level)
-        file_handler.setFormatter(formatter)
+    def flush(self) -> None:
+        """Flush the handlers of the logger.
 
-        console_handler = logging.StreamHandler()
-        console_handler.setLevel(self.log_level)
-        console_handler.setFormatter(formatter)
+        Returns:
+            None
+        """
+        for handler in self.logger.handlers:
+            handler.flush()
 
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
+    def stats(self) -> dict:
+        """Return the statistics of the queue of an asynchronous logger.
 
-    def info(self, message: str) -> None:
+        Returns:
+            dict: The queue depth and size, the largest depth seen and the counts of
+                enqueued, dropped and written records and of written batches. Empty
+                for a synchronous logger.
+        """
+        for handler in self.logger.handlers:
+            if isinstance(handler, AsyncHandler):
+                return handler.stats()
+        return {}
+
+    def info(self, message: str, *args) -> None:
         """Log a message with severity 'INFO'.
 
         Args:
-            message: The message to log.
+            message (str): The message to log.
+            *args: The arguments merged into the message with %-formatting, only
+                if the level is enabled.
 
         Returns:
             None
         """
-        self.logger.info(message)
+        self.logger.info(message, *args)
 
-    def debug(self, message: str) -> None:
+    def debug(self, message: str, *args) -> None:
         """Log a message with severity 'DEBUG'.
 
         Args:
             message (str): The message to log.
+            *args: The arguments merged into the message with %-formatting, only
+                if the level is enabled.
 
         Returns:
             None
         """
-        self.logger.debug(message)
+        self.logger.debug(message, *args)
 
-    def warning(self, message: str) -> None:
+    def warning(self, message: str, *args) -> None:
         """Log a message with severity 'WARNING'.
 
         Args:
             message (str): The message to log.
+            *args: The arguments merged into the message with %-formatting, only
+                if the level is enabled.
 
         Returns:
             None
         """
-        self.logger.warning(message)
+        self.logger.warning(message, *args)
 
-    def error(self, message: str) -> None:
+    def error(self, message: str, *args) -> None:
         """Log a message with severity 'ERROR'.
 
         Args:
             message (str): The message to log.
+            *args: The arguments merged into the message with %-formatting, only
+                if the level is enabled.
 
         Returns:
             None
         """
-        self.logger.error(message)
+        self.logger.error(message, *args)
 
-    def critical(self, message: str) -> None:
+    def critical(self, message: str, *args) -> None:
         """Log a message with severity 'CRITICAL'.
 
         Args:
             message (str): The message to log.
+            *args: The arguments merged into the message with %-formatting, only
+                if the level is enabled.
 
         Returns:
             None
         """
-        self.logger.critical(message)
+        self.logger.critical(message, *args)
@@ -0,0 +1,309 @@
+# log_manager/metrics.py
+
+"""This module allows the user to record and report operation metrics.
+
+Examples:
+
+    >>> from log_manager.metrics import registry
+    >>> registry.increment("excel_rows_read_total", 1000, operation="get_dataframe")
+    >>> registry.set_gauge("queue_depth", 3)
+    >>> with registry.timer("excel_load_seconds", operation="session"):
+    ...     pass
+
+    >>> registry.snapshot()["counters"]
+    {'excel_rows_read_total{operation="get_dataframe"}': 1000.0}
+
+    >>> # write the metrics in the Prometheus text format, e.g. for the node exporter.
+    >>> registry.write_prometheus("./metrics.prom")
+
+    >>> # log a summary line and rewrite the dump file every minute.
+    >>> registry.start_reporting(LogManager(log_name='Metrics'), interval=60, path="./metrics.prom")
+    >>> registry.stop_reporting()
+
+The module contains the following methods:
+
+- `increment(name, value, **labels)` - adds to a counter.
+- `set_gauge(name, value, **labels)` - sets a gauge.
+- `observe(name, value, **labels)` - records a value in a histogram.
+- `timer(name, **labels)` - records the duration of a block in a histogram.
+- `snapshot()` - returns the current values of the metrics.
+- `summary()` - returns the metrics as a single log line.
+- `prometheus_text()` - returns the metrics in the Prometheus text format.
+- `write_prometheus(path)` - writes the metrics in the Prometheus text format to a file.
+- `start_reporting(log_manager, interval, path)` - logs and dumps the metrics periodically.
+- `stop_reporting()` - stops the periodic reports after a last one.
+- `reset()` - forgets every metric.
+"""
+
+from contextlib import contextmanager
+from typing import Iterator
+import atexit
+import bisect
+import math
+import os
+import tempfile
+import threading
+import time
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _key(name: str, labels: dict) -> str:
+    """Return the Prometheus spelling of a metric and its labels."""
+    if not labels:
+        return name
+    text = ",".join(f'{label}="{value}"' for label, value in sorted(labels.items()))
+    return f"{name}{{{text}}}"
+
+
+def _number(value: float) -> str:
+    """Return a number in the Prometheus text format."""
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class Histogram:
+    """The counts of the values observed in fixed buckets, with their sum.
+
+    Attributes:
+        buckets (tuple): The upper bounds of the buckets, the last one infinite.
+        counts (list): The number of values of each bucket, not cumulated.
+        total (float): The sum of the values.
+        maximum (float): The largest value.
+    """
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self.counts = [0] * len(self.buckets)
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.maximum = max(self.maximum, value)
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def cumulative(self) -> dict:
+        """Return the number of values at most each bound, as Prometheus reports them."""
+        counts = {}
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            counts[bound] = running
+        return counts
+
+    def quantile(self, q: float) -> float:
+        """Return the upper bound of the bucket holding a quantile of the values."""
+        rank = q * self.count
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            if running >= rank and count:
+                return bound if bound != math.inf else self.maximum
+        return 0.0
+
+
+class MetricsRegistry:
+    """Thread-safe counters, gauges and histograms keyed by name and labels."""
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS) -> None:
+        """
+        Args:
+            buckets: The upper bounds of the buckets of the histograms, in seconds
+                for durations.
+        """
+        self.buckets = buckets
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._reporter = None
+        self._stop = threading.Event()
+
+    def increment(self, name: str, value: float = 1, **labels) -> None:
+        """Add a value to a counter.
+
+        Args:
+            name: The name of the counter.
+            value: The value added.
+            **labels: The labels telling apart counters of the same name.
+        """
+        key = _key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def set_gauge(self, name: str, value: float, **labels) -> None:
+        """Set the value of a gauge.
+
+        Args:
+            name: The name of the gauge.
+            value: The new value.
+            **labels: The labels telling apart gauges of the same name.
+        """
+        key = _key(name, labels)
+        with self._lock:
+            self._gauges[key] = float(value)
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Record a value, such as a duration in seconds, in a histogram.
+
+        Args:
+            name: The name of the histogram.
+            value: The value recorded.
+            **labels: The labels telling apart histograms of the same name.
+        """
+        key = (name, _key("", labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """Record the duration of a block, in seconds, in a histogram.
+
+        The duration is recorded even if the block raises.
+
+        Args:
+            name: The name of the histogram.
+            **labels: The labels telling apart histograms of the same name.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def snapshot(self) -> dict:
+        """Return the current values of the metrics.
+
+        Returns:
+            dict: The `counters` and `gauges` by key, and the `histograms` by key
+                with their `count`, `sum`, `max`, `p50`, `p95` and cumulative `buckets`.
+        """
+        with self._lock:
+            histograms = {
+                f"{name}{labels}": {
+                    "count": histogram.count,
+                    "sum": histogram.total,
+                    "max": histogram.maximum,
+                    "p50": histogram.quantile(0.5),
+                    "p95": histogram.quantile(0.95),
+                    "buckets": histogram.cumulative(),
+                }
+                for (name, labels), histogram in self._histograms.items()
+            }
+            return {"counters": dict(self._counters), "gauges": dict(self._gauges), "histograms": histograms}
+
+    def summary(self) -> str:
+        """Return the metrics as a single log line.
+
+        Histograms show their count, mean and the bucket bounds of their median
+        and 95th percentile.
+        """
+        snapshot = self.snapshot()
+        parts = [f"{key}={_number(value)}" for key, value in {**snapshot["counters"], **snapshot["gauges"]}.items()]
+        for key, histogram in snapshot["histograms"].items():
+            mean = histogram["sum"] / histogram["count"] if histogram["count"] else 0.0
+            parts.append(
+                f"{key} count={histogram['count']} mean={mean:.3f} "
+                f"p50<={histogram['p50']:.3f} p95<={histogram['p95']:.3f} max={histogram['max']:.3f}")
+        return "Metrics: " + ("; ".join(parts) if parts else "none recorded") + "."
+
+    def prometheus_text(self) -> str:
+        """Return the metrics in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = []
+        for kind, values in (("counter", snapshot["counters"]), ("gauge", snapshot["gauges"])):
+            typed = set()
+            for key, value in sorted(values.items()):
+                name = key.split("{", 1)[0]
+                if name not in typed:
+                    lines.append(f"# TYPE {name} {kind}")
+                    typed.add(name)
+                lines.append(f"{key} {_number(value)}")
+        with self._lock:
+            histograms = sorted(
+                ((name, labels, histogram.cumulative(), histogram.total, histogram.count)
+                 for (name, labels), histogram in self._histograms.items()),
+                key=lambda item: item[:2])
+        typed = set()
+        for name, labels, buckets, total, count in histograms:
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            inner = labels[1:-1] + "," if labels else ""
+            for bound, running in buckets.items():
+                lines.append(f'{name}_bucket{{{inner}le="{_number(bound)}"}} {running}')
+            lines.append(f"{name}_sum{labels} {_number(total)}")
+            lines.append(f"{name}_count{labels} {count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """Write the metrics in the Prometheus text format, replacing the file atomically.
+
+        Args:
+            path: The path of the dump file.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        descriptor, temp = tempfile.mkstemp(dir=directory, prefix=".metrics-", suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "w", encoding="utf-8") as handle:
+                handle.write(self.prometheus_text())
+            os.replace(temp, path)
+        except BaseException:
+            os.unlink(temp)
+            raise
+
+    def _report(self, log_manager, path: str) -> None:
+        if log_manager is not None:
+            log_manager.info(self.summary())
+        if path is not None:
+            self.write_prometheus(path)
+
+    def start_reporting(self, log_manager=None, interval: float = 60.0, path: str = None) -> None:
+        """Log a summary line and rewrite a Prometheus dump file periodically.
+
+        The reports run in a daemon thread, and a last one is made when the
+        reporting stops or the process exits.
+
+        Args:
+            log_manager: The LogManager the summary lines are logged to, none if None.
+            interval: The number of seconds between two reports.
+            path: The path of the Prometheus dump file, none written if None.
+        """
+        self.stop_reporting()
+        self._stop.clear()
+
+        def report():
+            while not self._stop.wait(interval):
+                self._report(log_manager, path)
+            self._report(log_manager, path)
+
+        self._reporter = threading.Thread(target=report, name="MetricsReporter", daemon=True)
+        self._reporter.start()
+
+    def stop_reporting(self) -> None:
+        """Stop the periodic reports after a last one."""
+        if self._reporter is not None:
+            self._stop.set()
+            self._reporter.join()
+            self._reporter = None
+
+    def reset(self) -> None:
+        """Forget every metric."""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+
+registry = MetricsRegistry()
+atexit.register(registry.stop_reporting)
@@ -0,0 +1,258 @@
+from datetime import datetime
+import gzip
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+import unittest
+
+from log_manager import LogManager, traced
+from log_manager import _queue
+from log_manager import _rotation
+from log_manager import log_manager
+from log_manager.metrics import MetricsRegistry
+
+
+class TestLogManager(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.log_file = os.path.join(self.directory.name, 'test.log')
+
+    def tearDown(self) -> None:
+        log_manager.shutdown()
+        self.directory.cleanup()
+
+    def test_handlers_shared(self) -> None:
+        managers = [LogManager(log_file=self.log_file, log_name='TestShared') for _ in range(50)]
+        self.assertEqual(len(logging.getLogger('TestShared').handlers), 2)
+        registered = log_manager.registered_handlers()
+        LogManager(log_file=self.log_file, log_name='TestSharedOther')
+        self.assertEqual(log_manager.registered_handlers(), registered)
+        managers[-1].info('logged once')
+        managers[-1].flush()
+        with open(self.log_file) as handle:
+            self.assertEqual(handle.read().count('logged once'), 1)
+
+    def test_handlers_replaced(self) -> None:
+        LogManager(log_file=self.log_file, log_name='TestReplaced', log_level=logging.DEBUG)
+        manager = LogManager(log_file=self.log_file, log_name='TestReplaced', log_level=logging.INFO)
+        self.assertEqual(len(manager.logger.handlers), 2)
+        manager.info('logged once')
+        manager = LogManager(log_file=self.log_file, log_name='TestReplaced', log_format='%(message)s')
+        self.assertEqual(len(manager.logger.handlers), 2)
+        manager.info('logged once again')
+        manager.flush()
+        with open(self.log_file) as handle:
+            text = handle.read()
+        self.assertEqual(text.count('logged once'), 2)
+        self.assertEqual(text.count('logged once again'), 1)
+
+    def test_shutdown(self) -> None:
+        manager = LogManager(log_file=self.log_file, log_name='TestShutdown')
+        log_manager.shutdown()
+        self.assertEqual(logging.getLogger('TestShutdown').handlers, [])
+        self.assertEqual(log_manager.registered_handlers(), 0)
+        manager = LogManager(log_file=self.log_file, log_name='TestShutdown')
+        self.assertEqual(len(manager.logger.handlers), 2)
+
+    def test_asynchronous(self) -> None:
+        manager = LogManager(log_file=self.log_file, log_name='TestAsync', asynchronous=True, log_level=logging.INFO)
+        for index in range(1000):
+            manager.info(f'record {index}')
+        manager.flush()
+        with open(self.log_file) as handle:
+            self.assertEqual(handle.read().count('record'), 1000)
+        stats = manager.stats()
+        self.assertEqual((stats['enqueued'], stats['written'], stats['dropped']), (1000, 1000, 0))
+        self.assertEqual(len(manager.logger.handlers), 1)
+        LogManager(log_file=self.log_file, log_name='TestAsync', log_level=logging.INFO)
+        self.assertEqual(manager.stats(), {})
+
+    def test_overflow(self) -> None:
+        release = threading.Event()
+
+        class Target(logging.Handler):
+            def __init__(self) -> None:
+                super().__init__()
+                self.messages = []
+
+            def emit(self, record: logging.LogRecord) -> None:
+                release.wait()
+                self.messages.append(record.getMessage())
+
+        for overflow, expected, dropped in (
+                ('drop_oldest', ['0', '7', '8', '9'], 6), ('drop_debug', ['0', '1', '2', '3', '9'], 5)):
+            release.clear()
+            target = Target()
+            handler = _queue.AsyncHandler((target,), queue_size=3, overflow=overflow)
+            logger = logging.getLogger(f'TestOverflow{overflow}')
+            logger.setLevel(logging.DEBUG)
+            logger.addHandler(handler)
+            logger.debug('0')
+            while handler.queue.qsize():
+                pass
+            for index in range(1, 9):
+                logger.debug(str(index))
+            threading.Timer(0.1, release.set).start()
+            logger.warning('9')
+            handler.close()
+            logger.removeHandler(handler)
+            self.assertEqual(target.messages, expected)
+            self.assertEqual(handler.stats()['dropped'], dropped)
+
+        with self.assertRaises(ValueError):
+            LogManager(log_file=self.log_file, asynchronous=True, overflow='drop_all')
+
+    def test_traced(self) -> None:
+        class Sender:
+            def __init__(self, log_file: str) -> None:
+                self.log = LogManager(log_file=log_file, log_name='TestTraced', log_level=logging.INFO)
+
+            @traced('sender', 'sender_credentials', 'content')
+            def send(self, sender: str, sender_credentials: str, content: bytes = b'', copies: int = 1) -> str:
+                return sender
+
+        sender = Sender(self.log_file)
+        self.assertEqual(sender.send.__name__, 'send')
+        self.assertEqual(sender.send('abc@xyz.com', 'abcd1234', content=b'12345'), 'abc@xyz.com')
+        sender.log.flush()
+        with open(self.log_file) as handle:
+            text = handle.read()
+        self.assertIn("send:\nsender='abc@xyz.com', sender_credentials='***', content=<5 bytes>.", text)
+        self.assertNotIn('abcd1234', text)
+        self.assertRegex(text, r'send done in \d+\.\d{3} s\.')
+
+        sender.log.logger.setLevel(logging.WARNING)
+        sender.send('abc@xyz.com', 'abcd1234')
+        sender.log.flush()
+        with open(self.log_file) as handle:
+            self.assertEqual(handle.read(), text)
+
+        with self.assertRaises(ValueError):
+            traced('receiver')(Sender.send)
+
+    def test_traced_generator(self) -> None:
+        class Reader:
+            def __init__(self, log_file: str) -> None:
+                self.log = LogManager(log_file=log_file, log_name='TestTracedGenerator', log_level=logging.INFO)
+
+            @traced('count')
+            def rows(self, count: int):
+                for row in range(count):
+                    yield row
+                    time.sleep(0.01)
+
+        reader = Reader(self.log_file)
+        rows = reader.rows(5)
+        reader.log.flush()
+        with open(self.log_file) as handle:
+            self.assertNotIn('rows done', handle.read())
+        self.assertEqual(list(rows), [0, 1, 2, 3, 4])
+        reader.log.flush()
+        with open(self.log_file) as handle:
+            seconds = float(re.search(r'rows done in (\d+\.\d+) s\.', handle.read()).group(1))
+        self.assertGreaterEqual(seconds, 0.04)
+
+        rows = reader.rows(5)
+        next(rows)
+        rows.close()
+        reader.log.flush()
+        with open(self.log_file) as handle:
+            self.assertEqual(handle.read().count('rows done'), 2)
+
+    def test_metrics(self) -> None:
+        metrics = MetricsRegistry(buckets=(0.1, 1.0))
+        metrics.increment('mail_sent_total', service='smtp')
+        metrics.increment('mail_sent_total', 2, service='smtp')
+        metrics.set_gauge('queue_depth', 4)
+        for value in (0.05, 0.5, 0.7, 3.0):
+            metrics.observe('smtp_connect_seconds', value)
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot['counters'], {'mail_sent_total{service="smtp"}': 3})
+        self.assertEqual(snapshot['gauges'], {'queue_depth': 4})
+        histogram = snapshot['histograms']['smtp_connect_seconds']
+        self.assertEqual((histogram['count'], histogram['p50'], histogram['max']), (4, 1.0, 3.0))
+        self.assertEqual(list(histogram['buckets'].values()), [1, 3, 4])
+
+        path = os.path.join(self.directory.name, 'metrics.prom')
+        metrics.write_prometheus(path)
+        with open(path) as handle:
+            text = handle.read()
+        self.assertIn('# TYPE smtp_connect_seconds histogram\n', text)
+        self.assertIn('smtp_connect_seconds_bucket{le="+Inf"} 4\n', text)
+        self.assertIn('mail_sent_total{service="smtp"} 3\n', text)
+
+        manager = LogManager(log_file=self.log_file, log_name='TestMetrics')
+        metrics.start_reporting(manager, interval=3600)
+        metrics.stop_reporting()
+        manager.flush()
+        with open(self.log_file) as handle:
+            self.assertIn('Metrics: mail_sent_total{service="smtp"}=3; queue_depth=4; smtp_connect_seconds count=4', handle.read())
+
+    def test_rotation(self) -> None:
+        manager = LogManager(
+            log_file=self.log_file, log_name='TestRotation', log_level=logging.INFO,
+            max_bytes=2000, backup_count=3, log_format='json')
+        for index in range(200):
+            manager.info('record %d', index)
+        log_manager.shutdown()
+        segments = _rotation.segments(self.log_file)
+        self.assertEqual(len(segments), 3)
+        self.assertTrue(all(segment.endswith('.gz') for segment in segments))
+        with gzip.open(segments[-1], 'rt') as handle:
+            lines = handle.read().splitlines()
+        with open(self.log_file) as handle:
+            lines += handle.read().splitlines()
+        self.assertLessEqual(os.path.getsize(self.log_file), 2000)
+        entries = [json.loads(line) for line in lines]
+        self.assertEqual(entries[-1]['message'], 'record 199')
+        self.assertEqual(entries[-1]['level'], 'INFO')
+        self.assertEqual(entries[-1]['logger'], 'TestRotation')
+        messages = [entry['message'] for entry in entries]
+        self.assertEqual(messages, [f'record {index}' for index in range(200 - len(messages), 200)])
+
+
+    def test_rotation_ignored(self) -> None:
+        LogManager(log_file=self.log_file, log_name='TestRotationFirst')
+        with self.assertLogs('TestRotationIgnored', level=logging.WARNING) as captured:
+            manager = LogManager(log_file=self.log_file, log_name='TestRotationIgnored', max_bytes=500)
+        self.assertIn('Rotation settings', captured.output[0])
+        self.assertIn('no rotation', captured.output[0])
+        for index in range(50):
+            manager.info('record %d', index)
+        log_manager.shutdown()
+        self.assertEqual(_rotation.segments(self.log_file), [])
+        with self.assertNoLogs('TestRotationRepeated', level=logging.WARNING):
+            LogManager(log_file=self.log_file, log_name='TestRotationRepeated', max_bytes=500)
+
+
+    def test_rotation_age_restart(self) -> None:
+        record = logging.makeLogRecord({'msg': 'record', 'levelno': logging.INFO, 'levelname': 'INFO'})
+        with open(self.log_file, 'w') as handle:
+            handle.write('old\n')
+        hour_ago = time.time() - 3600
+        os.utime(self.log_file, (hour_ago, hour_ago))
+        handler = _rotation.RotatingFileHandler(self.log_file, rotate_seconds=1800, compress=False)
+        self.assertTrue(handler.shouldRollover(record))
+        handler.close()
+
+        segment = f"{self.log_file}.{datetime.fromtimestamp(hour_ago).strftime('%Y%m%d-%H%M%S-%f')}"
+        os.replace(self.log_file, segment)
+        with open(self.log_file, 'w') as handle:
+            handle.write('new\n')
+        handler = _rotation.RotatingFileHandler(self.log_file, rotate_seconds=1800, compress=False)
+        if not hasattr(os.stat(self.log_file), 'st_birthtime'):
+            # without a recorded creation time, the age is counted from the last rotation.
+            self.assertTrue(handler.shouldRollover(record))
+        handler.close()
+        handler = _rotation.RotatingFileHandler(self.log_file, rotate_seconds=7200, compress=False)
+        self.assertFalse(handler.shouldRollover(record))
+        handler.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
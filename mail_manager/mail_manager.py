@@ -12,6 +12,16 @@ Examples:
     >>> sender_credentials = "abcd1234"
     >>> result = mail_manager.send_mail(sender=sender, sender_credentials=sender_credentials, copy_receiver=copy_receiver, attachment=attachment)
 
+    >>> # attach a workbook built in memory, as a (file name, content) pair.
+    >>> report = io.BytesIO()
+    >>> ExcelManager().overwrite_sheet(report, "Sheet1", dataframe)
+    >>> attachment = [("report.xlsx", report), 'abc.txt']
+    >>> result = mail_manager.send_mail(sender=sender, sender_credentials=sender_credentials, copy_receiver=copy_receiver, attachment=attachment)
+
+    >>> # sends and SMTP connection times are recorded in the metrics registry.
+    >>> from log_manager.metrics import registry
+    >>> registry.snapshot()["counters"]['mail_sent_total{service="smtp",status="sent"}']
+
 The module contains the following methods:
 
 - `__init__(subject, receiver, body, log_file)` - creates the instance of the class.
@@ -20,9 +30,12 @@ The module contains the following methods:
 
 from email import encoders
 from email.mime.base import MIMEBase
-import inspect
+from pathlib import Path
+import io
 import os
-from log_manager import LogManager
+import tempfile
+from log_manager import LogManager, traced
+from log_manager.metrics import registry
 from win32com.client import Dispatch
 from typing import Union
 import smtplib
@@ -30,6 +43,13 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
 
+def _attachment_content(content: Union[bytes, io.BytesIO]):
+    """Return the bytes of an in-memory attachment, without copying a BytesIO."""
+    if isinstance(content, io.BytesIO):
+        return content.getbuffer()
+    return content
+
+
 class MailManager:
     """A class for managing email operations.
 
@@ -59,6 +79,7 @@ class MailManager:
         self.body = body
         self.log.info("MailManager initialized.")
 
+    @traced("copy_receiver")
     def _copy_receiver_modify(self, copy_receiver: Union[list, str, None]) -> Union[str, None]:
         """This function takes in a list of email addresses as input and returns a string containing all the email addresses separated by a semicolon.
         If the input is not a list, it returns the input unchanged.
@@ -69,10 +90,9 @@ class MailManager:
         Returns:
             Union[str, None]: A list of email addresses separated by a semicolon or the input unchanged.
         """
-        self.log.info(f"{inspect.stack()[0][3]}:\ncopy_receiver={copy_receiver}.")
         if copy_receiver:
             if isinstance(copy_receiver, list):
-                self.log.info(f"copy_receiver modified = {"; ".join(copy_receiver)}.")
+                self.log.info("copy_receiver modified = %s.", "; ".join(copy_receiver))
                 return "; ".join(copy_receiver)
             else:
                 self.log.info("No modification needed.")
@@ -81,28 +101,29 @@ class MailManager:
             self.log.info("None received in copy_receiver.")
             return None
 
-    def _attachment_modify(self, attachment: Union[list, str, None]) -> Union[list, None]:
-        """This function takes in a list of email addresses as input and returns a string containing all the email addresses separated by a semicolon.
-        If the input is not a list, it returns the input unchanged.
+    @traced("attachment")
+    def _attachment_modify(self, attachment: Union[list, str, tuple, None]) -> Union[list, None]:
+        """This function takes in a list of attachments as input and returns it unchanged.
+        If the input is a single attachment, a file path or a (file name, content) pair, it returns it in a list.
         
         Args:
-            attachment: A list of email addresses or a single email address.
+            attachment: A list of attachments or a single attachment.
         
         Returns:
-            Union[list, str]: A list of email addresses separated by a semicolon or the input unchanged.
+            Union[list, None]: A list of attachments or None.
         """
-        self.log.info(f"{inspect.stack()[0][3]}:\nattachment={attachment}.")
         if attachment:
             if isinstance(attachment, list):
                 self.log.info("No modification needed.")
                 return attachment
             else:
-                self.log.info(f"attachments modified = {[attachment]}.")
+                self.log.info("attachments modified = %s.", [attachment])
                 return [attachment]
         else:
             self.log.info("None received in attachment.")
             return None
 
+    @traced("receiver")
     def _receiver_modify(self, receiver: Union[list, str]) -> str:
         """This function takes in a list of email addresses as input and returns a string containing all the email addresses separated by a semicolon.
         If the input is not a list, it returns the input unchanged.
@@ -113,23 +134,24 @@ class MailManager:
         Returns:
             str: A list of email addresses separated by a semicolon or the input unchanged.
         """
-        self.log.info(f"{inspect.stack()[0][3]}:\nreceiver={receiver}.")
         if isinstance(receiver, list):
-            self.log.info(f"receiver modified = {"; ".join(receiver)}.")
+            self.log.info("receiver modified = %s.", "; ".join(receiver))
             return "; ".join(receiver)
         else:
             self.log.info("No modification needed.")
             return receiver
 
+    @traced("copy_receiver", "attachment", "sender", "sender_credentials")
     def send_mail(
             self, copy_receiver: Union[list, str, None],
-            attachment: Union[list, str, None], sender: str = None,
+            attachment: Union[list, str, tuple, None], sender: str = None,
             sender_credentials: str = None,) -> bool:
         """This function sends an email using the selected service.
 
         Args:
             copy_receiver: A list of email addresses or a single email address to be added as a carbon copy (CC) of the email.
-            attachment: A list of email addresses or a single email address to be attached to the email.
+            attachment: A list of attachments or a single attachment, each a file path or a
+                (file name, content) pair whose content is bytes or a BytesIO.
             sender: The email address of the sender. If not specified, the default sender set in the system will be used.
             sender_credentials: The password or API key of the sender. If not specified, the default credentials set in the system will be used.
         
@@ -139,20 +161,29 @@ class MailManager:
         Raises:
             ValueError: If the selected service is not supported.
         """
-        self.log.info(f"{inspect.stack()[0][3]}:\ncopy_receiver={copy_receiver}, attachment={attachment}, sender={sender}, sender_credentials={sender_credentials}, service={self.service}.")
-        if self.service == "windows":
-            return self.windows_service(copy_receiver, attachment)
-        elif self.service == "smtp":
-            return self.smtp_service(sender, sender_credentials, copy_receiver, attachment)
+        self.log.info("service=%s.", self.service)
+        with registry.timer("mail_send_seconds", service=self.service):
+            if self.service == "windows":
+                sent = self._windows_service(copy_receiver, attachment)
+            elif self.service == "smtp":
+                sent = self._smtp_service(sender, sender_credentials, copy_receiver, attachment)
+            else:
+                return None
+        registry.increment("mail_sent_total", service=self.service, status="sent" if sent else "failed")
+        return sent
 
+    @traced("copy_receiver", "attachment")
     def _windows_service(
             self, copy_receiver: Union[list, str, None],
-            attachment: Union[list, str, None]):
+            attachment: Union[list, str, tuple, None]):
         """This function is used to send an email using the outlook application.
 
+        Outlook only attaches files, so in-memory attachments are written to a
+        temporary directory removed once the email is sent.
+
         Args:
             copy_receiver: A list of email addresses to be copied on the email.
-            attachment: A list of file paths or email addresses of the attachments to be added to the email.
+            attachment: A list of file paths or (file name, content) pairs of the attachments to be added to the email.
 
         Returns:
             bool: A boolean value indicating whether the email was sent successfully or not.
@@ -160,10 +191,9 @@ class MailManager:
         Raises:
             Exception: An exception is raised if there is an error in sending the email.
         """
-        self.log.info(f"{inspect.stack()[0][3]}:\ncopy_receiver={copy_receiver}, attachment={attachment}.")
-        receiver = self.receiver_modify(self.receiver)
-        copy_receiver = self.copy_receiver_modify(copy_receiver)
-        attachment = self.attachment_modify(attachment)
+        receiver = self._receiver_modify(self.receiver)
+        copy_receiver = self._copy_receiver_modify(copy_receiver)
+        attachment = self._attachment_modify(attachment) or []
 
         try:
             outlook = Dispatch('outlook.application')
@@ -173,16 +203,23 @@ class MailManager:
             mail.To = receiver
             mail.CC = copy_receiver
             mail.HTMLBody = self.body
-            for att in attachment:
-                mail.Attachments.Add(att)
-            mail.Send()
-            self.log.info(f"Email sent with following details:\nFrom=Windows User\nTo={receiver}\nCC={copy_receiver}")
-            self.log.info(f"Subject={self.subject}\nBody={self.body}\nAttachment={attachment}")
+            with tempfile.TemporaryDirectory() as directory:
+                for att in attachment:
+                    if isinstance(att, tuple):
+                        name, content = att
+                        path = Path(directory) / os.path.basename(name)
+                        path.write_bytes(_attachment_content(content))
+                        att = str(path)
+                    mail.Attachments.Add(att)
+                mail.Send()
+            self.log.info("Email sent with following details:\nFrom=Windows User\nTo=%s\nCC=%s", receiver, copy_receiver)
+            self.log.info("Subject=%s\nBody=%s\nAttachment=%s", self.subject, self.body, attachment)
             return True
         except Exception as e:
             self.log.error(f"Undefined Error: {e}.")
             return False
 
+    @traced("sender")
     def _smtp_server(self, sender: str) -> str:
         """This function determines the SMTP server to use based on the email sender's domain.
 
@@ -192,7 +229,6 @@ class MailManager:
         Returns:
             str: The SMTP server to use.
         """
-        self.log.info(f"{inspect.stack()[0][3]}:\nsender={sender}.")
         if 'gmail.com' in sender:
             self.log.info("smtp_server=smtp.gmail.com")
             return 'smtp.gmail.com'
@@ -200,27 +236,28 @@ class MailManager:
             self.log.info("smtp_server=smtp-mail.outlook.com")
             return 'smtp-mail.outlook.com'
 
+    @traced("sender", "attachment", "copy_receiver")
     def _smtp_service(
             self, sender: str, sender_credentials: str, copy_receiver: Union[list, str, None],
-            attachment: Union[list, str, None]):
+            attachment: Union[list, str, tuple, None]):
         """A function to send an email through SMTP.
 
         Args:
             sender: The email address of the sender
             sender_credentials: The password of the sender
             copy_receiver: A list of email addresses to be copied, or a single email address
-            attachment: A list of file paths to be attached, or a single file path
+            attachment: A list of attachments, or a single one, each a file path or a
+                (file name, content) pair whose content is bytes or a BytesIO
 
         Returns:
             bool: A boolean indicating whether the email was sent successfully or not
         """
-        self.log.info(f"{inspect.stack()[0][3]}:\nsender={sender}, attachment={attachment}, copy_receiver={copy_receiver}.")
-
-        receiver = self.receiver_modify(self.receiver)
-        copy_receiver = self.copy_receiver_modify(copy_receiver)
-        attachments = self.attachment_modify(attachment)
+        receiver = self._receiver_modify(self.receiver)
+        copy_receiver = self._copy_receiver_modify(copy_receiver)
+        attachments = self._attachment_modify(attachment) or []
 
         flag = True
+        server = None
         try:
             message = MIMEMultipart()
             self.log.info("MIME item created.")
@@ -232,34 +269,41 @@ class MailManager:
             message.attach(MIMEText(self.body, 'plain'))
 
             for file in attachments:
+                if isinstance(file, tuple):
+                    file, content = file
+                    payload = _attachment_content(content)
+                else:
+                    with open(file, 'rb') as attachment:
+                        payload = attachment.read()
                 file = os.path.basename(file)
-                with open(file, 'rb') as attachment:
-                    part = MIMEBase('application', 'octet-stream')
-                    part.set_payload(attachment.read())
-                    encoders.encode_base64(part)
-                    part.add_header(
-                        'Content-Disposition',
-                        f'attachment; filename= {file}',
-                    )
-                    message.attach(part)
-                self.log.info(f"{file} attached.")
-
-            server = smtplib.SMTP(self.smtp_server(sender), 587)
-            server.starttls()
-            server.login(sender, sender_credentials)
+                part = MIMEBase('application', 'octet-stream')
+                part.set_payload(payload)
+                encoders.encode_base64(part)
+                part.add_header(
+                    'Content-Disposition',
+                    f'attachment; filename= {file}',
+                )
+                message.attach(part)
+                self.log.info("%s attached.", file)
+
+            with registry.timer("smtp_connect_seconds"):
+                server = smtplib.SMTP(self._smtp_server(sender), 587)
+                server.starttls()
+                server.login(sender, sender_credentials)
             text = message.as_string()
             server.sendmail(sender, receiver, text)
-            self.log.info(f"Email sent with following details:\nFrom={sender}\nTo={receiver}\nCC={copy_receiver}")
-            self.log.info(f"Subject={self.subject}\nBody={self.body}\nAttachment={attachment}")
+            self.log.info("Email sent with following details:\nFrom=%s\nTo=%s\nCC=%s", sender, receiver, copy_receiver)
+            self.log.info("Subject=%s\nBody=%s\nAttachment=%s", self.subject, self.body, attachment)
 
         except smtplib.SMTPException as e:
             flag = False
-            self.log.error("SMTP error occurred:", e)
+            self.log.error("SMTP error occurred: %s", e)
         except Exception as e:
             flag = False
-            self.log.error("An error occurred:", e)
+            self.log.error("An error occurred: %s", e)
 
         finally:
-            server.quit()
-            self.log.info("SMTP server closed successfully.")
+            if server is not None:
+                server.quit()
+                self.log.info("SMTP server closed successfully.")
             return flag
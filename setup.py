@@ -30,5 +30,7 @@ setup(
     ],
     packages=["date_manager", "log_manager", "excel_manager", "mail_manager"],
     include_package_data=True,
-    install_requires=["pandas", "openpyxl"]
+    install_requires=["pandas", "openpyxl"],
+    extras_require={"export": ["pyarrow"], "cache": ["pyarrow"], "dates": ["pyarrow"]},
+    entry_points={"console_scripts": ["excel-export=excel_manager.__main__:main"]},
 )